@@ -138,12 +138,79 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Process-local caches. 'auth' holds resolved API tokens (user + profile) for
+# OPTIFUSE_AUTH_CACHE_TTL seconds; see core/authentication.py.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'optifuse-auth',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # GitHub file contents keyed by blob SHA (see simulation/connectors/github.py)
+    'blobs': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'optifuse-github-blobs',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    # Locks and shared results of coalesced live simulations (see simulation/coalesce.py).
+    # Process-local by default; point it at a shared backend (database, Redis,
+    # Memcached) to coalesce identical requests across worker processes too.
+    'coalesce': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'optifuse-coalesce',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+}
+OPTIFUSE_AUTH_CACHE_TTL = config('OPTIFUSE_AUTH_CACHE_TTL', default=30, cast=int)
+# Blobs are content-addressed, so entries never go stale; the TTL only bounds memory.
+OPTIFUSE_BLOB_CACHE_TTL = config('OPTIFUSE_BLOB_CACHE_TTL', default=86400, cast=int)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'core.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         # By default, all endpoints will require authentication
         'rest_framework.permissions.IsAuthenticated',
     ]
-}
\ No newline at end of file
+}
+
+# Solver admission control (see simulation/scheduler.py). Per-tier policies can be
+# overridden with OPTIFUSE_TIER_POLICIES = {'FREE': {'ilp_time_limit': 10}, ...}
+OPTIFUSE_SOLVER_SLOTS = config('OPTIFUSE_SOLVER_SLOTS', default=4, cast=int)
+
+# Threads the async live view uses for blocking boto3 calls (STS, CloudWatch Logs)
+OPTIFUSE_AWS_IO_THREADS = config('OPTIFUSE_AWS_IO_THREADS', default=64, cast=int)
+
+# JSON runtime models for the deadline planner, written by `manage.py fit_runtime_models`;
+# empty uses the defaults in simulation/planner.py
+OPTIFUSE_RUNTIME_MODELS = config('OPTIFUSE_RUNTIME_MODELS', default='')
+
+# Skip mtx_ilp once a heuristic's cost is provably within this share of the optimum
+# (simulation/algorithms/bounds.py); 0 always runs it
+OPTIFUSE_EXACT_SKIP_GAP = config('OPTIFUSE_EXACT_SKIP_GAP', default=0.01, cast=float)
+
+# Profile every algorithm run with cProfile/tracemalloc (staff can also ask per request
+# with `profile`), and dump the anonymized application of profiled runs to this directory
+OPTIFUSE_PROFILE_ALGORITHMS = config('OPTIFUSE_PROFILE_ALGORITHMS', default=False, cast=bool)
+OPTIFUSE_PROFILE_DUMP_DIR = config('OPTIFUSE_PROFILE_DUMP_DIR', default='')
+
+# JSON file where mtx_ilp_portfolio records which configurations won its races
+# (simulation/algorithms/optimal.py); empty keeps the counts in memory
+OPTIFUSE_PORTFOLIO_STATS = config('OPTIFUSE_PORTFOLIO_STATS', default='')
+
+# Identical concurrent live simulations (same repo, serverless.yml, AWS role and tier) share
+# one CloudWatch query and solve, and a request waits at most OPTIFUSE_COALESCE_LOCK_TTL seconds
+# on another's computation. OPTIFUSE_COALESCE_TTL > 0 also serves a finished result to repeats
+# for that many seconds, i.e. caches results whose live metrics are then up to that old
+OPTIFUSE_COALESCE_LIVE = config('OPTIFUSE_COALESCE_LIVE', default=True, cast=bool)
+OPTIFUSE_COALESCE_TTL = config('OPTIFUSE_COALESCE_TTL', default=0, cast=int)
+OPTIFUSE_COALESCE_LOCK_TTL = config('OPTIFUSE_COALESCE_LOCK_TTL', default=300, cast=int)
+OPTIFUSE_COALESCE_POLL_INTERVAL = config('OPTIFUSE_COALESCE_POLL_INTERVAL', default=0.5, cast=float)
+
+# Worker processes for constraint sweeps (simulation/sweep.py); 0 solves in the request thread.
+# A sweep only uses as many as it holds solver slots, so more than OPTIFUSE_SOLVER_SLOTS sit idle
+OPTIFUSE_SWEEP_WORKERS = config('OPTIFUSE_SWEEP_WORKERS', default=OPTIFUSE_SOLVER_SLOTS, cast=int)
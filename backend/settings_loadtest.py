@@ -0,0 +1,53 @@
+"""
+Settings profile for load tests.
+
+Points the GitHub and AWS connectors at the local stand-ins from
+simulation.loadtest.stubs and uses a local database, so LiveSimulationView can
+be driven end to end without touching GitHub or AWS:
+
+    python -m simulation.loadtest.stubs --port 8765
+    DJANGO_SETTINGS_MODULE=backend.settings_loadtest python manage.py migrate
+    DJANGO_SETTINGS_MODULE=backend.settings_loadtest gunicorn backend.wsgi -w 4
+    DJANGO_SETTINGS_MODULE=backend.settings_loadtest python -m simulation.loadtest.driver
+"""
+
+import os
+
+os.environ.setdefault('SECRET_KEY', 'loadtest-insecure-secret-key')
+os.environ.setdefault('DEBUG', 'False')
+os.environ.setdefault('DATABASE_URL', 'sqlite:///loadtest.sqlite3')
+# boto3 still signs requests to the stubs, so it needs some credentials and a region.
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'loadtest')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'loadtest')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from .settings import *  # noqa: E402,F401,F403
+from decouple import config  # noqa: E402
+import dj_database_url  # noqa: E402
+
+DEBUG = False
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+
+DATABASES = {
+    'default': dj_database_url.parse(
+        config('LOADTEST_DATABASE_URL', default=f"sqlite:///{BASE_DIR / 'loadtest.sqlite3'}")
+    )
+}
+if DATABASES['default']['ENGINE'].endswith('sqlite3'):
+    # Concurrent writers wait for the lock instead of failing immediately.
+    DATABASES['default']['OPTIONS'] = {'timeout': 30}
+
+LOADTEST_STUB_URL = config('LOADTEST_STUB_URL', default='http://127.0.0.1:8765')
+OPTIFUSE_GITHUB_API_URL = LOADTEST_STUB_URL
+OPTIFUSE_AWS_ENDPOINT_URLS = {'sts': LOADTEST_STUB_URL, 'logs': LOADTEST_STUB_URL}
+OPTIFUSE_LOGS_POLL_INTERVAL = config('LOADTEST_LOGS_POLL_INTERVAL', default=0.05, cast=float)
+# The driver repeats identical requests; coalescing them would measure one pipeline run per burst.
+OPTIFUSE_COALESCE_LIVE = config('LOADTEST_COALESCE', default=False, cast=bool)
+
+# Restrict every tier to these algorithms (comma-separated), e.g. to measure the
+# I/O stages without the exact solver dominating.
+LOADTEST_ALGORITHMS = config('LOADTEST_ALGORITHMS', default='')
+if LOADTEST_ALGORITHMS:
+    OPTIFUSE_TIER_POLICIES = {
+        tier: {'algorithms': LOADTEST_ALGORITHMS.split(',')} for tier in ('FREE', 'PRO', 'ENTERPRISE')
+    }
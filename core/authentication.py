@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from .models import Profile
+
+AUTH_CACHE_ALIAS = 'auth'
+
+
+def _token_cache_key(key: str) -> str:
+    return f"auth-token:{key}"
+
+
+def _user_cache_key(user_id: int) -> str:
+    return f"auth-user:{user_id}"
+
+
+def invalidate_user(user_id: int):
+    """Drops the cached token resolution for a user (profile/token/user changed)."""
+    cache = caches[AUTH_CACHE_ALIAS]
+    key = cache.get(_user_cache_key(user_id))
+    if key:
+        cache.delete_many([_token_cache_key(key), _user_cache_key(user_id)])
+
+
+def invalidate_token(key: str):
+    caches[AUTH_CACHE_ALIAS].delete(_token_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that caches the resolved token, user and profile for a
+    short TTL, so authenticated requests (and their `request.user.profile`
+    lookups) need no database round trips once the cache is warm.
+    Entries are dropped when the Profile, User or Token is saved or deleted
+    (see core.signals); other processes converge within the TTL.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = caches[AUTH_CACHE_ALIAS]
+        token = cache.get(_token_cache_key(key))
+        if token is None:
+            token = self._resolve(key)
+            ttl = getattr(settings, 'OPTIFUSE_AUTH_CACHE_TTL', 30)
+            cache.set(_token_cache_key(key), token, ttl)
+            cache.set(_user_cache_key(token.user_id), key, ttl)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return (token.user, token)
+
+    def _resolve(self, key):
+        model = self.get_model()
+        try:
+            token = model.objects.select_related('user').get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        try:
+            # Attach the profile so `user.profile` is served from the cached object.
+            token.user.profile = Profile.objects.get(user_id=token.user_id)
+        except Profile.DoesNotExist:
+            pass
+        return token
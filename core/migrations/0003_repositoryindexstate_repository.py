@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_profile_aws_external_id_profile_aws_role_arn_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepositoryIndexState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_checked', models.DateTimeField(null=True)),
+                ('last_full_sync', models.DateTimeField(null=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='repository_index_state', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Repository',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('github_id', models.BigIntegerField()),
+                ('name', models.CharField(max_length=255)),
+                ('owner', models.CharField(max_length=255)),
+                ('full_name', models.CharField(max_length=511)),
+                ('default_branch', models.CharField(blank=True, max_length=255)),
+                ('private', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='repositories', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-updated_at', 'id'],
+                'indexes': [models.Index(fields=['user', '-updated_at'], name='repository_user_updated'), models.Index(fields=['user', 'owner', 'name'], name='repository_user_owner_name')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'github_id'), name='repository_user_github_id')],
+            },
+        ),
+    ]
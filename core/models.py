@@ -18,4 +18,43 @@ class Profile(models.Model):
     )
 
     def __str__(self):
-        return f"{self.user.username} - {self.get_subscription_display()}"
\ No newline at end of file
+        return f"{self.user.username} - {self.get_subscription_display()}"
+
+class Repository(models.Model):
+    """
+    Trimmed projection of a GitHub repository the user can access, kept as a
+    local index so the repository picker never has to page through GitHub.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='repositories')
+    github_id = models.BigIntegerField()
+    name = models.CharField(max_length=255)
+    owner = models.CharField(max_length=255)
+    full_name = models.CharField(max_length=511)
+    default_branch = models.CharField(max_length=255, blank=True)
+    private = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(null=True)
+
+    class Meta:
+        ordering = ['-updated_at', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'github_id'], name='repository_user_github_id'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-updated_at'], name='repository_user_updated'),
+            models.Index(fields=['user', 'owner', 'name'], name='repository_user_owner_name'),
+        ]
+
+    def __str__(self):
+        return self.full_name
+
+
+class RepositoryIndexState(models.Model):
+    """Sync bookkeeping for a user's repository index."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='repository_index_state')
+    # ETag of the first page of /user/repos?sort=updated; any push or new repo changes it.
+    etag = models.CharField(max_length=255, blank=True)
+    last_checked = models.DateTimeField(null=True)
+    last_full_sync = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"{self.user.username} repository index"
@@ -0,0 +1,142 @@
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from typing import Optional
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Repository, RepositoryIndexState
+
+PER_PAGE = 100
+# Pages fetched in parallel once the page count is known from the Link header.
+MAX_PARALLEL_PAGES = 8
+# How long the index is served without asking GitHub at all.
+CHECK_INTERVAL = timedelta(seconds=60)
+# Page 1's ETag misses deletions further down the list; re-read everything this often.
+FULL_SYNC_INTERVAL = timedelta(hours=1)
+
+_LAST_PAGE_RE = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+
+def _github_api_url() -> str:
+    return getattr(settings, 'OPTIFUSE_GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+
+
+def _last_page(link_header: str) -> int:
+    match = _LAST_PAGE_RE.search(link_header or '')
+    return int(match.group(1)) if match else 1
+
+
+def _project(user, repo: dict) -> Repository:
+    """Keeps only the fields the repository picker needs."""
+    return Repository(
+        user=user,
+        github_id=repo['id'],
+        name=repo.get('name', ''),
+        owner=(repo.get('owner') or {}).get('login', ''),
+        full_name=repo.get('full_name', ''),
+        default_branch=repo.get('default_branch') or '',
+        private=bool(repo.get('private', False)),
+        updated_at=parse_datetime(repo['updated_at']) if repo.get('updated_at') else None,
+    )
+
+
+def _store_page(user, repos: list[dict]) -> set[int]:
+    """Upserts one page of repositories and returns their GitHub IDs."""
+    Repository.objects.bulk_create(
+        [_project(user, repo) for repo in repos],
+        update_conflicts=True,
+        unique_fields=['user', 'github_id'],
+        update_fields=['name', 'owner', 'full_name', 'default_branch', 'private', 'updated_at'],
+    )
+    return {repo['id'] for repo in repos}
+
+
+def sync_repository_index(user, github_token: str, force: bool = False) -> bool:
+    """
+    Brings the user's local repository index up to date with GitHub.
+
+    Within CHECK_INTERVAL of the last check nothing is requested. After that,
+    page 1 is re-requested with If-None-Match; a 304 (which does not count
+    against the rate limit) means nothing changed. Otherwise the page count is
+    read from the Link header and the remaining pages are fetched concurrently;
+    only the fetching runs in worker threads. The pages are then written from
+    the calling thread in one transaction, and repositories that disappeared
+    are removed only if every page arrived. Returns True if the index changed.
+    Raises requests.HTTPError when GitHub rejects the listing or a page (the
+    pages that did arrive are still stored, and the next check re-syncs).
+    """
+    state, _ = RepositoryIndexState.objects.get_or_create(user=user)
+    now = timezone.now()
+    if not force and state.last_checked and now - state.last_checked < CHECK_INTERVAL:
+        return False
+    full_sync = force or not state.last_full_sync or now - state.last_full_sync >= FULL_SYNC_INTERVAL
+
+    session = requests.Session()
+    session.headers.update({'Authorization': f'token {github_token}', 'Accept': 'application/vnd.github.v3+json'})
+    url = f"{_github_api_url()}/user/repos"
+    params = {'sort': 'updated', 'per_page': PER_PAGE}
+
+    headers = {'If-None-Match': state.etag} if state.etag and not full_sync else {}
+    first = session.get(url, params={**params, 'page': 1}, headers=headers)
+    if first.status_code == 304:
+        state.last_checked = now
+        state.save(update_fields=['last_checked'])
+        return False
+    first.raise_for_status()
+    last_page = _last_page(first.headers.get('Link', ''))
+
+    def fetch(page: int) -> list[dict]:
+        res = session.get(url, params={**params, 'page': page})
+        res.raise_for_status()
+        return res.json()
+
+    pages, error = [first.json()], None
+    if last_page > 1:
+        with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_PAGES, last_page - 1)) as pool:
+            futures = [pool.submit(fetch, page) for page in range(2, last_page + 1)]
+            for future in as_completed(futures):
+                try:
+                    pages.append(future.result())
+                except requests.exceptions.RequestException as e:
+                    error = error or e
+
+    with transaction.atomic():
+        seen = set()
+        for page in pages:
+            seen |= _store_page(user, page)
+        if error is None:
+            Repository.objects.filter(user=user).exclude(github_id__in=seen).delete()
+            state.etag = first.headers.get('ETag', '')
+            state.last_full_sync = now
+        state.last_checked = now
+        state.save(update_fields=['etag', 'last_checked', 'last_full_sync'])
+    if error is not None:
+        raise error
+    return True
+
+
+def serialize_repository(repo: Repository) -> dict:
+    """GitHub-shaped subset, so existing clients keep reading name/owner.login/full_name."""
+    return {
+        'id': repo.github_id,
+        'name': repo.name,
+        'full_name': repo.full_name,
+        'owner': {'login': repo.owner},
+        'default_branch': repo.default_branch,
+        'private': repo.private,
+        'updated_at': repo.updated_at.isoformat() if repo.updated_at else None,
+    }
+
+
+def filtered_repositories(user, query: Optional[str] = None, owner: Optional[str] = None):
+    repos = Repository.objects.filter(user=user)
+    if owner:
+        repos = repos.filter(owner=owner)
+    if query:
+        repos = repos.filter(name__icontains=query)
+    return repos
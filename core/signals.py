@@ -0,0 +1,23 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_user, invalidate_token
+from .models import Profile
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def invalidate_profile_auth_cache(sender, instance, **kwargs):
+    invalidate_user(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_auth_cache(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Token)
+def invalidate_token_auth_cache(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+    invalidate_user(instance.user_id)
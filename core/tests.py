@@ -1,3 +1,111 @@
+import json
+from unittest import mock
+
+import requests
+from django.contrib.auth.models import User
+from django.core.cache import caches
 from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from .authentication import AUTH_CACHE_ALIAS
+from .models import Profile, Repository
+from .repository_index import PER_PAGE, sync_repository_index
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        caches[AUTH_CACHE_ALIAS].clear()
+        self.user = User.objects.create(username='octocat')
+        self.profile = Profile.objects.create(user=self.user, aws_role_arn='arn:aws:iam::123456789012:role/old')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_warm_requests_need_no_queries(self):
+        self.client.get('/api/profile/settings/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/profile/settings/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['username'], 'octocat')
+
+    def test_profile_save_invalidates_cache(self):
+        self.client.get('/api/profile/settings/')
+        self.client.post('/api/profile/settings/', {'aws_role_arn': 'arn:aws:iam::123456789012:role/new'}, format='json')
+        response = self.client.get('/api/profile/settings/')
+        self.assertEqual(response.json()['aws_role_arn'], 'arn:aws:iam::123456789012:role/new')
+
+    def test_rotated_token_is_rejected(self):
+        self.client.get('/api/profile/settings/')
+        self.token.delete()
+        Token.objects.create(user=self.user)
+        response = self.client.get('/api/profile/settings/')
+        self.assertEqual(response.status_code, 401)
+
+
+class FakeGitHub:
+    """/user/repos over `repos` GitHub IDs, PER_PAGE per page; pages in `failing` answer 500."""
+
+    def __init__(self, repos):
+        self.repos, self.failing = list(repos), set()
+
+    def get(self, session, url, params=None, headers=None):
+        page = params['page']
+        response = requests.Response()
+        response.url = f"{url}?page={page}"
+        response.status_code = 500 if page in self.failing else 200
+        last = max(1, -(-len(self.repos) // PER_PAGE))
+        response.headers['Link'] = f'<{url}?page={last}>; rel="last"'
+        chunk = self.repos[(page - 1) * PER_PAGE:page * PER_PAGE]
+        response._content = json.dumps([
+            {'id': gid, 'name': f'repo{gid}', 'full_name': f'octocat/repo{gid}', 'owner': {'login': 'octocat'},
+             'updated_at': f'2026-01-01T00:00:{gid % 60:02d}Z'}
+            for gid in chunk
+        ]).encode('utf-8')
+        return response
+
+
+class RepositoryIndexTests(TestCase):
+    def setUp(self):
+        caches[AUTH_CACHE_ALIAS].clear()
+        self.user = User.objects.create(username='octocat')
+        Profile.objects.create(user=self.user, github_access_token='gho_test')
+        self.github = FakeGitHub(range(1, 251))
+        patcher = mock.patch.object(requests.Session, 'get', autospec=True, side_effect=self.github.get)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _indexed(self) -> set[int]:
+        return set(Repository.objects.filter(user=self.user).values_list('github_id', flat=True))
+
+    def test_sync_stores_every_page(self):
+        self.assertTrue(sync_repository_index(self.user, 'gho_test'))
+        self.assertEqual(self._indexed(), set(range(1, 251)))
+
+    def test_full_sync_removes_deleted_repositories(self):
+        sync_repository_index(self.user, 'gho_test')
+        self.github.repos.remove(7)
+        sync_repository_index(self.user, 'gho_test', force=True)
+        self.assertEqual(self._indexed(), set(range(1, 251)) - {7})
+
+    def test_failed_page_deletes_nothing(self):
+        sync_repository_index(self.user, 'gho_test')
+        self.github.repos = [gid for gid in range(1, 302) if gid != 7]
+        self.github.failing = {2}
+        with self.assertRaises(requests.HTTPError):
+            sync_repository_index(self.user, 'gho_test', force=True)
+        indexed = self._indexed()
+        self.assertIn(7, indexed)
+        self.assertIn(301, indexed)
 
-# Create your tests here.
+    def test_list_keeps_array_body_and_pages_in_headers(self):
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        response = client.get('/api/repositories/', {'pageSize': 100, 'page': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.json(), list)
+        self.assertEqual(len(response.json()), 100)
+        self.assertEqual(response['X-Total-Count'], '250')
+        self.assertIn('rel="next"', response['Link'])
+        self.assertIn('rel="prev"', response['Link'])
@@ -7,8 +7,10 @@ from rest_framework.permissions import AllowAny      # <-- NEW IMPORT
 from rest_framework.authtoken.models import Token     # <-- NEW IMPORT
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
+from rest_framework.pagination import PageNumberPagination
 from django.contrib.auth.models import User
-from .models import Profile
+from .models import Profile, Repository
+from .repository_index import sync_repository_index, filtered_repositories, serialize_repository
 
 class GitHubLogin(APIView):
     permission_classes = [AllowAny]
@@ -60,7 +62,33 @@ class GitHubLogin(APIView):
         
         return Response(response_data, status=status.HTTP_200_OK)
 
+class RepositoryPagination(PageNumberPagination):
+    """
+    Pages the repository list while keeping the body a plain array, as it was
+    when the list came straight from GitHub: the total is sent in
+    X-Total-Count and the neighbouring pages in a GitHub-style Link header.
+    """
+    page_size = 50
+    page_size_query_param = 'pageSize'
+    max_page_size = 500
+
+    def get_paginated_response(self, data):
+        response = Response(data)
+        links = [f'<{url}>; rel="{rel}"' for url, rel in ((self.get_next_link(), 'next'),
+                                                          (self.get_previous_link(), 'prev')) if url]
+        if links:
+            response['Link'] = ', '.join(links)
+        response['X-Total-Count'] = str(self.page.paginator.count)
+        return response
+
+
 class RepositoryListView(APIView):
+    """
+    Lists the user's repositories from the local index, which is synced with
+    GitHub (all pages, conditional requests) at most once per check interval.
+    Query params: q (name contains), owner, page, pageSize, refresh=true.
+    The body is a list of repositories; see RepositoryPagination for paging.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
@@ -73,26 +101,26 @@ class RepositoryListView(APIView):
         except Profile.DoesNotExist:
             return Response({'error': 'Profile not found for this user.'}, status=status.HTTP_404_NOT_FOUND)
 
-        repo_headers = {'Authorization': f'token {github_token}', 'Accept': 'application/vnd.github.v3+json'}
-        repo_res = requests.get('https://api.github.com/user/repos?sort=updated', headers=repo_headers)
-        
-        if repo_res.status_code != 200:
-            return Response({'error': 'Failed to fetch repositories from GitHub.'}, status=repo_res.status_code)
+        force = request.query_params.get('refresh', '').lower() in ('1', 'true', 'yes')
+        stale = False
+        try:
+            sync_repository_index(user, github_token, force=force)
+        except requests.exceptions.RequestException as e:
+            # Serve the last known index if we have one; otherwise surface the failure.
+            if not Repository.objects.filter(user=user).exists():
+                status_code = e.response.status_code if getattr(e, 'response', None) is not None else status.HTTP_502_BAD_GATEWAY
+                return Response({'error': 'Failed to fetch repositories from GitHub.'}, status=status_code)
+            stale = True
+
+        repos = filtered_repositories(user, request.query_params.get('q'), request.query_params.get('owner'))
+        paginator = RepositoryPagination()
+        page = paginator.paginate_queryset(repos, request, view=self)
+        response = paginator.get_paginated_response([serialize_repository(repo) for repo in page])
+        if stale:
+            response['X-Repository-Index-Stale'] = 'true'
+        return response
 
-        return Response(repo_res.json())
-        # auth_header = request.headers.get('Authorization')
-        # if not auth_header or not auth_header.startswith('Bearer '):
-        #     return Response({'error': 'Authorization token not provided'}, status=status.HTTP_401_UNAUTHORIZED)
-        
-        # token = auth_header.split(' ')[1]
-        
-        # repo_headers = {'Authorization': f'token {token}', 'Accept': 'application/vnd.github.v3+json'}
-        # repo_res = requests.get('https://api.github.com/user/repos?sort=updated', headers=repo_headers)
-        
-        # if repo_res.status_code != 200:
-        #     return Response({'error': 'Failed to fetch repositories'}, status=repo_res.status_code)
 
-        # return Response(repo_res.json())
 def robust_b64decode(s):
     """A more robust base64 decoder that handles padding errors."""
     # Strip any whitespace from the input string
@@ -176,9 +204,9 @@ class ProfileSettingsView(APIView):
         user = request.user
         
         try:
-            # We use select_related('user') for a small performance optimization.
-            # It fetches the related User object in the same database query.
-            profile = Profile.objects.select_related('user').get(user=user)
+            # The authentication backend attaches the profile (and caches both),
+            # so this normally costs no database query.
+            profile = user.profile
             
             # Prepare the data to be sent back as JSON
             response_data = {
@@ -209,7 +237,7 @@ class ProfileSettingsView(APIView):
             )
             
         try:
-            profile = Profile.objects.get(user=user)
+            profile = user.profile
             # Update the field and save the change to the database
             profile.aws_role_arn = aws_role_arn
             profile.save(update_fields=['aws_role_arn']) # More efficient save
@@ -0,0 +1,15 @@
+# Gunicorn settings, read automatically when gunicorn is started from the repository root.
+# With OPTIFUSE_PRELOAD=True the app and the solver, AWS and numpy stacks (which the
+# app otherwise imports on first use, see simulation/utils/lazy.py) are loaded once
+# in the master, so workers fork with them already in (shared) memory.
+# Module-level names are read as gunicorn settings, so `config` must not be one.
+import decouple
+
+if decouple.config('OPTIFUSE_PRELOAD', default=False, cast=bool):
+    preload_app = True
+
+    def on_starting(server):
+        from simulation.utils.lazy import preload
+        missing = preload()
+        if missing:
+            server.log.warning("Could not preload: %s", ', '.join(missing))
@@ -8,6 +8,10 @@ from .heuristics import (
     costless_csp
 )
 from .metrics import calculate_metrics
-from .optimal import mtx_ilp
+from .optimal import mtx_ilp, mtx_ilp_portfolio
+from .incremental import incremental_reoptimize
+from .pareto import pareto_frontier
+from .multilevel import multilevel_partitioning
+from .bounds import lower_bound, optimality_gap
 
-__all__ = ["singleton", "no_fusion", "min_w_cut_heuristic", "greedy_tree_partitioning", "costless_csp", "calculate_metrics", "mtx_ilp"]
\ No newline at end of file
+__all__ = ["singleton", "no_fusion", "min_w_cut_heuristic", "greedy_tree_partitioning", "costless_csp", "calculate_metrics", "mtx_ilp", "mtx_ilp_portfolio", "incremental_reoptimize", "pareto_frontier", "multilevel_partitioning", "lower_bound", "optimality_gap"]
\ No newline at end of file
@@ -0,0 +1,119 @@
+# Cheap lower bounds on the cost of any feasible plan, and optimality gaps against them
+import math
+from typing import Optional
+from ..core.structures import Application
+from .pareto import EXEC_PRICE
+
+# Memory buckets per group in _group_bound; more is tighter and slower
+BOUND_BUCKETS = 32
+
+
+def _edge_bound(app: Application) -> float:
+    """
+    Edge part of lower_bound from each edge alone, with the latency budget.
+
+    A group's execution cost EXEC_PRICE * (sum m) * (sum r) contains, for
+    every pair of its members, the term EXEC_PRICE * (m_u * r_v + m_v * r_u)
+    on top of each member's own m * r, and distinct edges are distinct pairs.
+    So each edge (u, v) costs at least min(its transfer cost, that pair term):
+    it is either cut or fused. Edges whose endpoints alone exceed max_memory
+    must be cut; beyond the hop budget, the cheapest further critical-path
+    edges must be fused.
+    """
+    index = app.index
+    critical = index.critical_edges
+    if app.network_hop_delay:
+        # An integer, since it slices fuse_premiums; max_latency may be a float.
+        max_hops = int(math.floor((app.max_latency - index.critical_runtime) / app.network_hop_delay))
+    else:
+        max_hops = len(critical)
+    if max_hops < 0:
+        return math.inf
+
+    total = 0.0
+    # Extra cost over the per-edge minimum of fusing each fusable critical edge
+    fuse_premiums = []
+    order = index.order
+    for pos, parent in enumerate(index.parent):
+        if parent < 0:
+            continue
+        u, v, transfer = order[parent], order[pos], index.edge_cost[pos]
+        if u.memory + v.memory > app.max_memory:
+            total += transfer
+            continue
+        fused = EXEC_PRICE * (u.memory * v.runtime + v.memory * u.runtime)
+        total += min(transfer, fused)
+        if (u.id, v.id) in critical:
+            fuse_premiums.append(max(fused - transfer, 0.0))
+
+    must_fuse = len(critical) - max_hops
+    if must_fuse > len(fuse_premiums):
+        return math.inf
+    if must_fuse > 0:
+        total += sum(sorted(fuse_premiums)[:must_fuse])
+    return total
+
+
+def _group_bound(app: Application, buckets: int) -> float:
+    """
+    Edge part of lower_bound from the memory limit: the exact optimum, by a
+    bottom-up DP, of a relaxation where fusing an edge costs its pair term (as
+    in _edge_bound), memories are rounded down to multiples of q and latency
+    is ignored. A plan within max_memory stays within it after rounding down,
+    so every feasible plan is feasible here and costs no less. The DP keeps,
+    per subtree, the cheapest cost for each rounded memory of the open group
+    at its root; q is the largest of the memories' GCD and
+    max_memory / `buckets`, so there are at most `buckets` + 1 such states.
+    Separate trees (parentless functions) add up.
+    """
+    gcd = 0
+    for f in app.functions:
+        gcd = math.gcd(gcd, f.memory)
+    q = max(gcd, -(-app.max_memory // buckets), 1)
+    capacity = app.max_memory // q
+
+    index = app.index
+    open_costs = {}
+    for u in reversed(index.order):
+        costs = {u.memory // q: 0.0}
+        for v in u.children:
+            child = open_costs.pop(v.id)
+            cut = min(child.values()) + index.transfer_cost(v)
+            fused = EXEC_PRICE * (u.memory * v.runtime + v.memory * u.runtime)
+            merged = {}
+            for size, cost in costs.items():
+                if cost + cut < merged.get(size, math.inf):
+                    merged[size] = cost + cut
+                for child_size, child_cost in child.items():
+                    total = size + child_size
+                    if total <= capacity and cost + child_cost + fused < merged.get(total, math.inf):
+                        merged[total] = cost + child_cost + fused
+            # Only sizes that are cheaper than every smaller size can matter.
+            costs, cheapest = {}, math.inf
+            for size in sorted(merged):
+                if merged[size] < cheapest:
+                    costs[size] = cheapest = merged[size]
+        open_costs[u.id] = costs
+    return sum(min(costs.values()) for costs in open_costs.values())
+
+
+def lower_bound(app: Application, buckets: int = BOUND_BUCKETS) -> float:
+    """
+    A lower bound on the cost (as in calculate_metrics) of every feasible
+    plan: each function's own execution cost plus the larger of two bounds
+    on what the edges add, _edge_bound and _group_bound. Takes well under a
+    second for 50k functions. Returns inf when the constraints cannot be met.
+    """
+    if any(f.memory > app.max_memory for f in app.functions):
+        return math.inf
+    own = EXEC_PRICE * sum(f.memory * f.runtime for f in app.functions)
+    return own + max(_edge_bound(app), _group_bound(app, buckets))
+
+
+def optimality_gap(cost: Optional[float], bound: float) -> Optional[float]:
+    """(cost - bound) / cost, the share of `cost` that may be above optimal; None without a finite cost or bound."""
+    if cost is None or not math.isfinite(cost) or not math.isfinite(bound):
+        return None
+    if cost <= 0:
+        return 0.0
+    return max(cost - bound, 0.0) / cost
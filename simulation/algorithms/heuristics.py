@@ -9,6 +9,7 @@ from collections import defaultdict
 import heapq
 from typing import Tuple
 from ..core.structures import Application, LambdaFunction
+from ..utils.skyline import Skyline
 
 def no_fusion(app: Application) -> dict:
     start_time = time.time()
@@ -20,20 +21,7 @@ def no_fusion(app: Application) -> dict:
 
 def singleton(app: Application) -> dict:
     start_time = time.time()
-    q = [app.root_function]
-    head = 0
-    topo_sorted_funcs = []
-    visited = {app.root_function.id}
-    while head < len(q):
-        node = q[head];
-        head += 1
-        topo_sorted_funcs.append(node)
-        for child in node.children:
-            if child.id not in visited:
-                visited.add(child.id)
-                q.append(child)
-
-    groups = [topo_sorted_funcs]
+    groups = [list(app.index.order)]
     metrics = calculate_metrics(groups, app)
     return {'name': 'Singleton', 'groups': groups, **metrics,
             'runtime': (time.time() - start_time) * 1000}
@@ -42,9 +30,10 @@ def min_w_cut_heuristic(app: Application) -> dict:
         start_time = time.time()
         groups = [[f] for f in app.functions]
         merge_candidates = []
+        transfer_cost = app.index.transfer_cost
         for f in app.functions:
             for child in f.children:
-                merge_candidates.append((f.get_data_transfer_cost(child.id), f, child))
+                merge_candidates.append((transfer_cost(child), f, child))
         merge_candidates.sort(key=lambda x: x[0], reverse=True)
 
         for _, parent, child in merge_candidates:
@@ -63,9 +52,10 @@ def min_w_cut_heuristic(app: Application) -> dict:
 def greedy_tree_partitioning(app: Application) -> dict:
         start_time = time.time()
         initial_cuts = set()
-        critical_path = app.critical_path_functions
+        index = app.index
+        critical_path = index.critical
         critical_path_edges = list(zip(critical_path[:-1], critical_path[1:]))
-        base_latency = sum(f.runtime for f in critical_path)
+        base_latency = index.critical_runtime
         if base_latency > app.max_latency:
              return {'name': 'Greedy TP (GrTP)', 'groups': [], 'cost': float('inf'), 'latency': base_latency, 'feasible': False, 'runtime': (time.time() - start_time) * 1000}
 
@@ -100,7 +90,7 @@ def greedy_tree_partitioning(app: Application) -> dict:
         for f in app.functions:
             for child in f.children:
                 if (f, child) not in initial_cuts:
-                    merge_candidates.append((f.get_data_transfer_cost(child.id), f, child))
+                    merge_candidates.append((index.transfer_cost(child), f, child))
         merge_candidates.sort(key=lambda x: x[0], reverse=True)
 
         for _, parent, child in merge_candidates:
@@ -117,7 +107,8 @@ def greedy_tree_partitioning(app: Application) -> dict:
 
 def costless_csp(app: Application) -> dict:
         start_time = time.time()
-        chain = app.critical_path_functions
+        index = app.index
+        chain = index.critical
         if not chain: return {'name': 'Costless (CSP)', 'groups': [], 'feasible': False, 'error': 'No critical path.'}
 
         @dataclass
@@ -125,32 +116,29 @@ def costless_csp(app: Application) -> dict:
             cost: float; latency: int; current_group_mem: int; partitioning: Tuple[Tuple[LambdaFunction, ...], ...]
             def __lt__(self, other): return self.cost < other.cost
 
-        labels = defaultdict(list)
+        # Non-dominated (latency, cost) labels per function
+        labels = defaultdict(Skyline)
         pq = []
         start_node = chain[0]
         initial_label = CSPLabel(cost=0, latency=start_node.runtime, current_group_mem=start_node.memory, partitioning=((start_node,),))
-        labels[start_node.id].append(initial_label)
+        labels[start_node.id].insert(initial_label.latency, initial_label.cost, initial_label)
         heapq.heappush(pq, (initial_label.cost, start_node.id, initial_label))
 
         while pq:
             _, u_id, u_label = heapq.heappop(pq)
             u = app.functions_map[u_id]
-            u_index = chain.index(u)
+            u_index = index.chain_position[u_id]
             if u_index + 1 >= len(chain): continue
             v = chain[u_index + 1]
 
             if u_label.current_group_mem + v.memory <= app.max_memory:
                 new_part_merge = list(u_label.partitioning); new_part_merge[-1] += (v,)
                 new_label_merge = CSPLabel(cost=u_label.cost, latency=u_label.latency + v.runtime, current_group_mem=u_label.current_group_mem + v.memory, partitioning=tuple(new_part_merge))
-                if not any(l.cost <= new_label_merge.cost and l.latency <= new_label_merge.latency for l in labels[v.id]):
-                    labels[v.id] = [l for l in labels[v.id] if not (new_label_merge.cost <= l.cost and new_label_merge.latency <= l.latency)]
-                    labels[v.id].append(new_label_merge)
+                if labels[v.id].insert(new_label_merge.latency, new_label_merge.cost, new_label_merge):
                     heapq.heappush(pq, (new_label_merge.cost, v.id, new_label_merge))
 
             new_label_cut = CSPLabel(cost=u_label.cost + u.get_data_transfer_cost(v.id), latency=u_label.latency + v.runtime + app.network_hop_delay, current_group_mem=v.memory, partitioning=u_label.partitioning + ((v,),))
-            if not any(l.cost <= new_label_cut.cost and l.latency <= new_label_cut.latency for l in labels[v.id]):
-                labels[v.id] = [l for l in labels[v.id] if not (new_label_cut.cost <= l.cost and new_label_cut.latency <= l.latency)]
-                labels[v.id].append(new_label_cut)
+            if labels[v.id].insert(new_label_cut.latency, new_label_cut.cost, new_label_cut):
                 heapq.heappush(pq, (new_label_cut.cost, v.id, new_label_cut))
 
         best_label = min([l for l in labels[chain[-1].id] if l.latency <= app.max_latency], key=lambda l: l.cost, default=None)
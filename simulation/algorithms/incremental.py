@@ -0,0 +1,108 @@
+# Will contain incremental re-optimization of a previously computed plan
+import time
+from typing import Optional
+from ..core.structures import Application, CompositeFunction
+from .metrics import calculate_metrics
+from .optimal import mtx_ilp
+
+
+def incremental_reoptimize(app: Application, previous_plan: list[list[str]],
+                           previous_metrics: dict[str, tuple[int, int]],
+                           previous_cost: Optional[float] = None,
+                           previous_latency: Optional[float] = None,
+                           previous_optimal: bool = False,
+                           tolerance: float = 0.05, time_limit: int = 60) -> dict:
+    """
+    Re-checks a previous plan against drifted function metrics and only re-solves
+    the part of the tree that the drift affects.
+
+    `previous_plan` is the old plan as lists of function IDs and
+    `previous_metrics` maps each function ID to the (memory, runtime) it had
+    when the plan was computed. The application's topology and constraints are
+    assumed unchanged; callers fall back to a full run otherwise.
+
+    The old plan is returned as-is ('reused': True) when it is still feasible and
+    either every change is within `tolerance` (relative), or the plan was
+    ILP-optimal and no function got cheaper (the feasible region only shrank, so
+    the optimum cannot have moved). The feasibility check, cost and latency of a
+    reused plan are derived from the changed functions and their groups only.
+    Otherwise the affected groups and their neighbours are re-solved with
+    mtx_ilp, warm-started from the old plan, while every other group stays fixed.
+    'optimal' is only set when the plan is proven optimal for the whole
+    application: a reused optimal plan whose functions only grew, or a
+    re-solve that pinned no group.
+    Only the scan for changed functions is linear in the application size.
+    """
+    start_time = time.time()
+    func_map = app.functions_map
+
+    changed, max_drift, only_grew = [], 0.0, True
+    for fid, (old_memory, old_runtime) in previous_metrics.items():
+        func = func_map[fid]
+        if func.memory == old_memory and func.runtime == old_runtime:
+            continue
+        changed.append(func)
+        for old, new in ((old_memory, func.memory), (old_runtime, func.runtime)):
+            max_drift = max(max_drift, abs(new - old) / old if old else float('inf'))
+            only_grew = only_grew and new >= old
+
+    group_of = {fid: idx for idx, group in enumerate(previous_plan) for fid in group}
+    if len(group_of) != len(func_map):
+        # The old plan does not cover every function (e.g. an infeasible result).
+        result = mtx_ilp(app, time_limit=time_limit)
+        return {**result, 'name': 'Incremental Re-optimization', 'changed_functions': [f.id for f in changed],
+                'reused': False, 'resolved_functions': len(func_map),
+                'runtime': (time.time() - start_time) * 1000}
+    affected = sorted({group_of[f.id] for f in changed})
+
+    # Memory feasibility only has to be re-checked for groups with a changed member.
+    mem_feasible = True
+    exec_cost_delta = 0.0
+    for idx in affected:
+        members = [func_map[fid] for fid in previous_plan[idx]]
+        new_group = CompositeFunction(members)
+        mem_feasible = mem_feasible and new_group.memory <= app.max_memory
+        old_memory = sum(previous_metrics[fid][0] for fid in previous_plan[idx])
+        old_runtime = sum(previous_metrics[fid][1] for fid in previous_plan[idx])
+        exec_cost_delta += new_group.get_execution_cost() - 0.00001667 * (old_memory / 1024) * (old_runtime / 1000)
+
+    if previous_latency is not None:
+        critical_ids = set(app.critical_path_ids)
+        latency = previous_latency + sum(f.runtime - previous_metrics[f.id][1] for f in changed if f.id in critical_ids)
+    else:
+        latency = calculate_metrics([[func_map[fid] for fid in g] for g in previous_plan], app)['latency']
+    feasible = mem_feasible and latency <= app.max_latency
+
+    base = {'name': 'Incremental Re-optimization', 'changed_functions': [f.id for f in changed]}
+    if feasible and (max_drift <= tolerance or (previous_optimal and only_grew)):
+        groups = [[func_map[fid] for fid in g] for g in previous_plan]
+        if previous_cost is not None and previous_latency is not None:
+            metrics = {'cost': previous_cost + exec_cost_delta, 'latency': latency, 'feasible': True}
+        else:
+            metrics = calculate_metrics(groups, app)
+        return {**base, 'groups': groups, **metrics, 'reused': True, 'resolved_functions': 0,
+                'optimal': previous_optimal and only_grew,
+                'runtime': (time.time() - start_time) * 1000}
+
+    # Re-solve the affected groups plus every group adjacent to them in the tree,
+    # so functions can move across the old boundaries.
+    region = set(affected)
+    for idx in affected:
+        for fid in previous_plan[idx]:
+            func = func_map[fid]
+            if func.parent is not None:
+                region.add(group_of[func.parent.id])
+            for child in func.children:
+                region.add(group_of[child.id])
+
+    plan = [[func_map[fid] for fid in g] for g in previous_plan]
+    fixed = [group for idx, group in enumerate(plan) if idx not in region]
+    result = mtx_ilp(app, time_limit=time_limit, warm_start=plan, fixed_groups=fixed)
+    if not result.get('feasible') and fixed:
+        # Pinning the untouched groups made the problem infeasible; free everything.
+        result = mtx_ilp(app, time_limit=time_limit, warm_start=plan)
+        region, fixed = set(range(len(plan))), []
+
+    return {**result, **base, 'reused': False, 'optimal': bool(result.get('optimal')) and not fixed,
+            'resolved_functions': sum(len(previous_plan[idx]) for idx in region),
+            'runtime': (time.time() - start_time) * 1000}
@@ -0,0 +1,277 @@
+# Will contain the multilevel (coarsen / solve / refine) partitioner for very large trees
+import time
+from typing import Optional
+from ..core.structures import Application, LambdaFunction
+from .metrics import calculate_metrics
+from .pareto import EXEC_PRICE, _root_labels, _cut_children, _groups_from_cuts
+
+
+class _Level:
+    """
+    One level of the coarsening hierarchy: a forest of nodes in topological
+    order (parents before children; roots, i.e. the application's parentless
+    functions and the clusters containing them, have parent -1). Each node stands for
+    a connected cluster of the level below it; `coarse_of` maps this level's
+    nodes onto the next coarser one. Per node: the edge to its parent is
+    described by `transfer` (cost if cut) and `critical` (cutting it adds a hop).
+    """
+    __slots__ = ('parent', 'children', 'memory', 'runtime', 'transfer', 'critical', 'coarse_of')
+
+    def __init__(self, parent, memory, runtime, transfer, critical):
+        self.parent = parent
+        self.memory = memory
+        self.runtime = runtime
+        self.transfer = transfer
+        self.critical = critical
+        self.children = [[] for _ in parent]
+        for node, p in enumerate(parent):
+            if p >= 0:
+                self.children[p].append(node)
+        self.coarse_of: Optional[list[int]] = None
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def merge_gain(self, a: int, b: int) -> float:
+        """Cost saved by fusing singleton clusters a (parent) and b (child)."""
+        return self.transfer[b] - EXEC_PRICE * (self.memory[a] * self.runtime[b] + self.memory[b] * self.runtime[a])
+
+    def coarsen(self, max_memory: int, max_hops: int) -> Optional['_Level']:
+        """
+        Contracts the heaviest edges first, i.e. those whose endpoints save the
+        most when fused, as long as the cluster they join fits in `max_memory`
+        and the edge saves anything; at most half of the nodes are contracted
+        away per level. While cutting every critical-path edge would take more
+        than `max_hops`, the critical path is left alone, so that the coarsest
+        solve still decides how it is packed (and can always fit the budget if
+        the original tree can). Returns the coarser level, or None if no edge
+        could be contracted.
+        """
+        edges = sorted(((self.merge_gain(self.parent[b], b), b) for b in range(len(self)) if self.parent[b] >= 0),
+                       reverse=True)
+        critical_edges = [b for b in range(len(self)) if self.critical[b]]
+        on_path = set(critical_edges) | {self.parent[b] for b in critical_edges} if len(critical_edges) > max_hops else set()
+
+        # Union-find over the clusters formed so far, with each cluster's memory at its representative
+        head, cluster_memory = list(range(len(self))), list(self.memory)
+
+        def find(node: int) -> int:
+            while head[node] != node:
+                head[node] = head[head[node]]
+                node = head[node]
+            return node
+
+        contracted, budget = [False] * len(self), len(self) // 2
+        for gain, b in edges:
+            if gain <= 0 or not budget:
+                break
+            a, c = find(self.parent[b]), find(b)
+            if b not in on_path and a not in on_path and cluster_memory[a] + cluster_memory[c] <= max_memory:
+                head[c] = a
+                cluster_memory[a] += cluster_memory[c]
+                contracted[b] = True
+                budget -= 1
+        if not any(contracted):
+            return None
+
+        # A contracted child joins its parent's cluster; clusters keep the order of their top node.
+        coarse_of, tops = [0] * len(self), []
+        for node in range(len(self)):
+            if contracted[node]:
+                coarse_of[node] = coarse_of[self.parent[node]]
+            else:
+                coarse_of[node] = len(tops)
+                tops.append(node)
+        memory, runtime = [0] * len(tops), [0] * len(tops)
+        for node, c in enumerate(coarse_of):
+            memory[c] += self.memory[node]
+            runtime[c] += self.runtime[node]
+        self.coarse_of = coarse_of
+        return _Level([coarse_of[self.parent[t]] if self.parent[t] >= 0 else -1 for t in tops], memory, runtime,
+                      [self.transfer[t] for t in tops], [self.critical[t] for t in tops])
+
+    def project(self, coarse_cut: list[bool]) -> list[bool]:
+        """This level's cuts for a plan of the next coarser level: only edges between clusters can be cut."""
+        coarse_of = self.coarse_of
+        return [self.parent[node] >= 0 and coarse_of[node] != coarse_of[self.parent[node]] and coarse_cut[coarse_of[node]]
+                for node in range(len(self))]
+
+    def refine(self, cut: list[bool], max_memory: int, max_hops: int, max_passes: int) -> list[bool]:
+        """
+        Greedy local search within `max_memory` and `max_hops`; groups are
+        connected, so each is named by its top node. Bottom-up, every cut edge
+        has the two groups it separates re-split at whichever single edge of
+        their union is cheapest (or fused, if they fit together), which also
+        moves functions between neighbouring groups; every uncut edge is cut
+        if splitting its group there is cheaper.
+        """
+        parent, children, transfer, critical = self.parent, self.children, self.transfer, self.critical
+        memory, runtime = self.memory, self.runtime
+        top = [0] * len(self)
+        group_memory, group_runtime = {}, {}
+        for node in range(len(self)):
+            top[node] = node if parent[node] < 0 or cut[node] else top[parent[node]]
+            group_memory[top[node]] = group_memory.get(top[node], 0) + memory[node]
+            group_runtime[top[node]] = group_runtime.get(top[node], 0) + runtime[node]
+        hops = sum(1 for node in range(len(self)) if cut[node] and critical[node])
+
+        def members(node: int, joined: int = -1) -> list[int]:
+            """Nodes of node's group at or below it, parents first, as if `joined`'s edge were not cut."""
+            nodes, stack = [], [node]
+            while stack:
+                current = stack.pop()
+                nodes.append(current)
+                stack.extend(child for child in children[current] if not cut[child] or child == joined)
+            return nodes
+
+        # Groups changed in the last pass; later passes only revisit edges touching them.
+        changed = None
+        for _ in range(max_passes):
+            touched = set()
+            for node in range(len(self) - 1, -1, -1):
+                if parent[node] < 0:
+                    continue
+                if changed is not None and top[node] not in changed and top[parent[node]] not in changed:
+                    continue
+                if cut[node]:
+                    a = top[parent[node]]
+                    union = members(a, node)
+                    sub_memory = {n: memory[n] for n in union}
+                    sub_runtime = {n: runtime[n] for n in union}
+                    for n in reversed(union[1:]):
+                        sub_memory[parent[n]] += sub_memory[n]
+                        sub_runtime[parent[n]] += sub_runtime[n]
+                    total_memory, total_runtime = sub_memory[a], sub_runtime[a]
+                    other_hops = hops - critical[node]
+
+                    def split_cost(x: int) -> float:
+                        return EXEC_PRICE * (sub_memory[x] * sub_runtime[x] + (total_memory - sub_memory[x])
+                                             * (total_runtime - sub_runtime[x])) + transfer[x]
+
+                    best, best_cost = node, split_cost(node)
+                    if total_memory <= max_memory and EXEC_PRICE * total_memory * total_runtime < best_cost:
+                        best, best_cost = None, EXEC_PRICE * total_memory * total_runtime
+                    for x in union[1:]:
+                        if (sub_memory[x] <= max_memory and total_memory - sub_memory[x] <= max_memory
+                                and other_hops + critical[x] <= max_hops and split_cost(x) < best_cost):
+                            best, best_cost = x, split_cost(x)
+                    if best == node:
+                        continue
+                    cut[node] = False
+                    del group_memory[node], group_runtime[node]
+                    group_memory[a], group_runtime[a] = total_memory, total_runtime
+                    hops = other_hops
+                    if best is not None:
+                        cut[best] = True
+                        group_memory[a] -= sub_memory[best]
+                        group_runtime[a] -= sub_runtime[best]
+                        group_memory[best], group_runtime[best] = sub_memory[best], sub_runtime[best]
+                        hops += critical[best]
+                    for n in union:
+                        top[n] = n if cut[n] or n == a else top[parent[n]]
+                    touched.update((a, node, best))
+                elif not critical[node] or hops < max_hops:
+                    g, part = top[node], members(node)
+                    memory_s = sum(memory[n] for n in part)
+                    runtime_s = sum(runtime[n] for n in part)
+                    memory_g, runtime_g = group_memory[g], group_runtime[g]
+                    if transfer[node] < EXEC_PRICE * (memory_s * (runtime_g - runtime_s) + (memory_g - memory_s) * runtime_s):
+                        cut[node] = True
+                        for n in part:
+                            top[n] = node
+                        group_memory[g] -= memory_s
+                        group_runtime[g] -= runtime_s
+                        group_memory[node], group_runtime[node] = memory_s, runtime_s
+                        hops += critical[node]
+                        touched.update((g, node))
+            if not touched:
+                break
+            changed = touched
+        return cut
+
+
+def _finest_level(app: Application) -> _Level:
+    index = app.index
+    order, critical = index.order, index.critical_edges
+    return _Level(list(index.parent), [f.memory for f in order], [f.runtime for f in order], list(index.edge_cost),
+                  [f.parent is not None and (f.parent.id, f.id) in critical for f in order])
+
+
+def _level_application(app: Application, level: _Level, critical_nodes: list[int]) -> Application:
+    """A level as an Application of one LambdaFunction per cluster, for the exact DP."""
+    functions = [LambdaFunction(id=str(node), name=str(node), memory=level.memory[node],
+                                baseline_runtime=level.runtime[node]) for node in range(len(level))]
+    for node in range(len(level)):
+        if level.parent[node] < 0:
+            continue
+        # Transfer costs are carried over as bytes, which get_data_transfer_cost converts back.
+        functions[level.parent[node]].add_child(functions[node], round(level.transfer[node] * (1024 ** 3) / 0.01))
+    return Application(name=app.name, functions=functions, critical_path_ids=[str(node) for node in critical_nodes],
+                       max_memory=app.max_memory, max_latency=app.max_latency, network_hop_delay=app.network_hop_delay)
+
+
+def multilevel_partitioning(app: Application, coarse_size: int = 200, max_labels: int = 64, max_passes: int = 4) -> dict:
+    """
+    Multilevel partitioning for trees too large for the exact methods, with
+    connected groups as in pareto_frontier.
+
+    The tree is coarsened by repeatedly contracting the heavy data-transfer
+    edges (those that save the most when fused) whose clusters fit in
+    max_memory, until it has at most `coarse_size` clusters or nothing
+    is worth contracting. The coarsest tree is solved with pareto_frontier's
+    DP (exact unless it exceeds `max_labels` labels per hop count), then the
+    plan is projected back level by level with refinement passes (see
+    _Level.refine) at each one.
+
+    Refinement never exceeds the hop budget, and contraction only removes
+    hops, so every level's plan meets the latency constraint. When the budget
+    is too tight to cut the whole critical path, coarsening leaves the path
+    alone and the exact solve decides how it is packed.
+    """
+    start_time = time.time()
+    critical_runtime = app.index.critical_runtime
+    max_hops = (app.max_latency - critical_runtime) // app.network_hop_delay if app.network_hop_delay else len(app.index.critical_edges)
+    if max_hops < 0:
+        return {'name': 'Multilevel', 'groups': [], 'cost': float('inf'), 'latency': critical_runtime,
+                'feasible': False, 'runtime': (time.time() - start_time) * 1000,
+                'error': 'Critical path alone exceeds max_latency'}
+    if any(f.memory > app.max_memory for f in app.functions):
+        return {'name': 'Multilevel', 'groups': [], 'cost': float('inf'), 'latency': float('inf'),
+                'feasible': False, 'runtime': (time.time() - start_time) * 1000,
+                'error': 'A function exceeds max_memory on its own'}
+
+    order, index = app.index.order, app.index.position
+
+    levels = [_finest_level(app)]
+    while len(levels[-1]) > coarse_size:
+        coarser = levels[-1].coarsen(app.max_memory, max_hops)
+        if coarser is None:
+            break
+        levels.append(coarser)
+
+    # The critical path as a chain of coarsest clusters
+    critical_nodes = []
+    for fid in app.critical_path_ids:
+        node = index[fid]
+        for level in levels[:-1]:
+            node = level.coarse_of[node]
+        if not critical_nodes or critical_nodes[-1] != node:
+            critical_nodes.append(node)
+
+    coarsest = _level_application(app, levels[-1], critical_nodes)
+    root_labels, exact = _root_labels(coarsest, max_hops, max_labels)
+    cheapest = min(root_labels.labels(), key=lambda label: label.total_cost(), default=None)
+    if cheapest is None:
+        return {'name': 'Multilevel', 'groups': [], 'cost': float('inf'), 'latency': float('inf'),
+                'feasible': False, 'runtime': (time.time() - start_time) * 1000,
+                'error': 'No plan of the coarsest tree satisfies the memory and latency constraints'}
+    cut_ids = _cut_children(cheapest)
+    cut = [str(node) in cut_ids for node in range(len(levels[-1]))]
+    cut = levels[-1].refine(cut, app.max_memory, max_hops, max_passes)
+    for level in reversed(levels[:-1]):
+        cut = level.refine(level.project(cut), app.max_memory, max_hops, max_passes)
+
+    groups = _groups_from_cuts(app, {order[node].id for node in range(len(order)) if cut[node]})
+    metrics = calculate_metrics(groups, app)
+    return {'name': 'Multilevel', 'groups': groups, **metrics, 'levels': [len(level) for level in levels],
+            'exact_coarsest': exact, 'runtime': (time.time() - start_time) * 1000}
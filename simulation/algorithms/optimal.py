@@ -1,48 +1,375 @@
 # Will contain mtx_ilp
-import pulp
-from ..core.structures import Application
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+from typing import Optional
+from django.conf import settings
+from ..core.builder import ApplicationBuilder
+from ..core.structures import Application, LambdaFunction
 import time
 from collections import defaultdict
 from .metrics import calculate_metrics
+from ..utils.lazy import lazy_import
 
-def mtx_ilp(app: Application) -> dict:
-        start_time = time.time()
-        if not pulp: return {'name': 'MtxILP (Optimal)', 'feasible': False, 'runtime': 0, 'error': 'pulp not installed'}
+# The solver stack loads on the first solve, not when the algorithms are imported
+pulp = lazy_import('pulp')
+
+
+def _candidate_roots(app: Application, funcs: list[LambdaFunction], fixed_group_of: dict[str, int]) -> dict[str, list[LambdaFunction]]:
+    """
+    Presolve: per free function f, the functions that may be the root (topmost
+    member) of its group, from f upwards: an ancestor b qualifies if the path
+    b..f fits in max_memory, has no pinned function and crosses no zero-byte
+    edge off the critical path. Cutting such an edge is free and can only
+    shrink groups, so it is fixed as cut.
+    """
+    index = app.index
+    critical = index.critical_edges
+    candidates = {}
+    for f in funcs:
+        roots, memory, node = [f], f.memory, f
+        while node.parent is not None and node.parent.id not in fixed_group_of:
+            parent = node.parent
+            memory += parent.memory
+            if memory > app.max_memory:
+                break
+            if index.transfer_cost(node) == 0 and (parent.id, node.id) not in critical:
+                break
+            roots.append(parent)
+            node = parent
+        candidates[f.id] = roots
+    return candidates
+
+
+def _presolved_model(app: Application, funcs: list[LambdaFunction], fixed_group_of: dict[str, int],
+                     warm_start: Optional[list[list[LambdaFunction]]]):
+    """
+    The matrix ILP restricted to connected groups rooted at their topmost
+    member. The objective only counts transfer, and splitting a group into
+    its connected parts never cuts another edge, so some optimum has this
+    form. x[b, f] then only exists for f's candidate roots b, f may join b's
+    group only if its parent did, and an edge (u, v) is cut exactly when v
+    is a root: is_cut[u, v] = x[v, v], which replaces the 2 * E * N cut
+    constraints of the full model.
+    """
+    candidates = _candidate_roots(app, funcs, fixed_group_of)
+    free = {f.id for f in funcs}
+    # Functions with no candidate but themselves are roots: constants, not variables.
+    fixed_roots = {f.id for f in funcs if len(candidates[f.id]) == 1}
+    prob = pulp.LpProblem("Fusion_MtxILP", pulp.LpMinimize)
+    x = pulp.LpVariable.dicts("x", ((b.id, f.id) for f in funcs if f.id not in fixed_roots
+                                    for b in candidates[f.id]), cat='Binary')
+
+    def assigned(b, f):
+        return 1 if f.id in fixed_roots else x[b.id, f.id]
+
+    def edge_cut(u, v):
+        if u.id in free and v.id in free:
+            return assigned(v, v)
+        return int(fixed_group_of.get(u.id) != fixed_group_of.get(v.id))
+
+    transfer_cost = app.index.transfer_cost
+    prob += pulp.lpSum(transfer_cost(v) * assigned(v, v)
+                       for u in funcs for v in u.children if v.id in free), "Minimize_Transfer_Cost"
+
+    members = defaultdict(list)
+    for f in funcs:
+        if f.id not in fixed_roots:
+            prob += pulp.lpSum(x[b.id, f.id] for b in candidates[f.id]) == 1, f"Assign_{f.id}"
+        for b in candidates[f.id]:
+            members[b.id].append(f)
+            if b is not f:
+                prob += x[b.id, f.id] <= assigned(b, f.parent), f"Connected_{b.id}_{f.id}"
+    for b in funcs:
+        # Groups that fit whatever they take need no memory row.
+        if sum(f.memory for f in members[b.id]) > app.max_memory:
+            prob += (pulp.lpSum(f.memory * assigned(b, f) for f in members[b.id])
+                     <= app.max_memory * assigned(b, b)), f"Memory_{b.id}"
+
+    if warm_start:
+        # The plan's groups, split where they are not connected through candidate roots
+        group_of = {f.id: idx for idx, group in enumerate(warm_start) for f in group}
+        for f in funcs:
+            if f.id in fixed_roots:
+                continue
+            root = f
+            for b in candidates[f.id][1:]:
+                if group_of.get(b.id) != group_of.get(f.id):
+                    break
+                root = b
+            for b in candidates[f.id]:
+                x[b.id, f.id].setInitialValue(1 if b is root else 0)
+
+    def plan(value):
+        root_of = {f.id: f if f.id in fixed_roots else next(b for b in candidates[f.id] if value(x[b.id, f.id]) > 0.5)
+                   for f in funcs}
+        groups = {b.id: [] for b in funcs if root_of[b.id] is b}
+        for f in funcs:
+            groups[root_of[f.id].id].append(f)
+        return list(groups.values())
+
+    return prob, edge_cut, plan
 
-        prob = pulp.LpProblem("Fusion_MtxILP", pulp.LpMinimize)
-        roots = app.functions
-        x = pulp.LpVariable.dicts("x", ((b.id, f.id) for b in roots for f in app.functions), cat='Binary')
-        all_edges = [(u, v) for u in app.functions for v in u.children]
-        is_cut = pulp.LpVariable.dicts("is_cut", ((e[0].id, e[1].id) for e in all_edges), cat='Binary')
 
-        prob += pulp.lpSum(u.get_data_transfer_cost(v.id) * is_cut[u.id, v.id] for u, v in all_edges), "Minimize_Transfer_Cost"
+def _full_model(app: Application, funcs: list[LambdaFunction], fixed_group_of: dict[str, int],
+                warm_start: Optional[list[list[LambdaFunction]]]):
+    """The matrix ILP as formulated: any free function may root a group of any others."""
+    prob = pulp.LpProblem("Fusion_MtxILP", pulp.LpMinimize)
+    roots = funcs
+    x = pulp.LpVariable.dicts("x", ((b.id, f.id) for b in roots for f in funcs), cat='Binary')
+    all_edges = [(u, v) for u in funcs for v in u.children if v.id not in fixed_group_of]
+    is_cut = pulp.LpVariable.dicts("is_cut", ((e[0].id, e[1].id) for e in all_edges), cat='Binary')
 
-        for f in app.functions: prob += pulp.lpSum(x[b.id, f.id] for b in roots) == 1, f"Assign_{f.id}"
+    def edge_cut(u, v):
+        """is_cut variable for free edges; a 0/1 constant when an endpoint is pinned."""
+        if u.id in fixed_group_of or v.id in fixed_group_of:
+            return int(fixed_group_of.get(u.id) != fixed_group_of.get(v.id))
+        return is_cut[u.id, v.id]
+
+    transfer_cost = app.index.transfer_cost
+    prob += pulp.lpSum(transfer_cost(v) * is_cut[u.id, v.id] for u, v in all_edges), "Minimize_Transfer_Cost"
+
+    for f in funcs: prob += pulp.lpSum(x[b.id, f.id] for b in roots) == 1, f"Assign_{f.id}"
+    for b in roots:
+        for f in funcs:
+            prob += x[b.id, f.id] <= x[b.id, b.id], f"Root_Integrity_{b.id}_{f.id}"
+        prob += pulp.lpSum(f.memory * x[b.id, f.id] for f in funcs) <= app.max_memory * x[b.id, b.id], f"Memory_{b.id}"
+    for u, v in all_edges:
+        for b in roots:
+            prob += is_cut[u.id, v.id] >= x[b.id, u.id] - x[b.id, v.id], f"Cut_A_{b.id}_{u.id}_{v.id}"
+            prob += is_cut[u.id, v.id] >= x[b.id, v.id] - x[b.id, u.id], f"Cut_B_{b.id}_{u.id}_{v.id}"
+
+    if warm_start:
+        group_root = {f.id: group[0].id for group in warm_start for f in group}
         for b in roots:
-            for f in app.functions:
-                prob += x[b.id, f.id] <= x[b.id, b.id], f"Root_Integrity_{b.id}_{f.id}"
-            prob += pulp.lpSum(f.memory * x[b.id, f.id] for f in app.functions) <= app.max_memory * x[b.id, b.id], f"Memory_{b.id}"
+            for f in funcs:
+                x[b.id, f.id].setInitialValue(1 if group_root.get(f.id) == b.id else 0)
         for u, v in all_edges:
-            for b in roots:
-                prob += is_cut[u.id, v.id] >= x[b.id, u.id] - x[b.id, v.id], f"Cut_A_{b.id}_{u.id}_{v.id}"
-                prob += is_cut[u.id, v.id] >= x[b.id, v.id] - x[b.id, u.id], f"Cut_B_{b.id}_{u.id}_{v.id}"
+            is_cut[u.id, v.id].setInitialValue(0 if group_root.get(u.id) == group_root.get(v.id) else 1)
+
+    def plan(value):
+        groups_dict = defaultdict(list)
+        for b in roots:
+            if value(x[b.id, b.id]) > 0.5:
+                for f in funcs:
+                    if value(x[b.id, f.id]) > 0.5: groups_dict[b.id].append(f)
+        return list(groups_dict.values())
+
+    return prob, edge_cut, plan
+
+
+def mtx_ilp(app: Application, time_limit: int = 60,
+            warm_start: Optional[list[list[LambdaFunction]]] = None,
+            fixed_groups: Optional[list[list[LambdaFunction]]] = None,
+            presolve: bool = True, options: Optional[list[str]] = None) -> dict:
+        """
+        Exact fusion via the matrix ILP. `warm_start` is a plan handed to CBC as
+        its initial incumbent; every group in `fixed_groups` is pinned as-is, so
+        only the remaining functions are actually re-partitioned. With
+        `presolve` (the default) the model is first reduced to connected groups
+        rooted at their topmost member (see _presolved_model), which has the
+        same optimal transfer cost and is far smaller. `options` are passed
+        to CBC as-is (e.g. 'randomCbcSeed 2'). 'optimal' tells whether CBC
+        proved the plan optimal; PuLP also reports the incumbent of a solve
+        stopped by the time limit as 'Optimal', which then is only feasible.
+        """
+        start_time = time.time()
+        if not pulp: return {'name': 'MtxILP (Optimal)', 'feasible': False, 'runtime': 0, 'error': 'pulp not installed'}
+
+        fixed_groups = fixed_groups or []
+        fixed_group_of = {f.id: idx for idx, group in enumerate(fixed_groups) for f in group}
+        # Only the functions outside the pinned groups become variables.
+        funcs = [f for f in app.functions if f.id not in fixed_group_of]
 
-        critical_path_edges = list(zip(app.critical_path_functions[:-1], app.critical_path_functions[1:]))
-        runtime_sum = sum(f.runtime for f in app.critical_path_functions)
-        network_overhead = pulp.lpSum(app.network_hop_delay * is_cut[u.id, v.id] for u, v in critical_path_edges)
+        build = _presolved_model if presolve else _full_model
+        prob, edge_cut, plan = build(app, funcs, fixed_group_of, warm_start)
+
+        critical_path = app.index.critical
+        critical_path_edges = list(zip(critical_path[:-1], critical_path[1:]))
+        runtime_sum = app.index.critical_runtime
+        network_overhead = pulp.lpSum(app.network_hop_delay * edge_cut(u, v) for u, v in critical_path_edges)
         prob += runtime_sum + network_overhead <= app.max_latency, "Latency_Constraint"
 
-        prob.solve(pulp.PULP_CBC_CMD(msg=0, timeLimit=60))
+        prob.solve(pulp.PULP_CBC_CMD(msg=0, timeLimit=time_limit, warmStart=bool(warm_start), options=options))
         runtime = (time.time() - start_time) * 1000
 
         if pulp.LpStatus[prob.status] == 'Optimal':
-            groups_dict = defaultdict(list)
-            for b in roots:
-                if pulp.value(x[b.id, b.id]) > 0.5:
-                    for f in app.functions:
-                        if pulp.value(x[b.id, f.id]) > 0.5: groups_dict[b.id].append(app.functions_map[f.id])
-            groups = list(groups_dict.values())
+            groups = [[app.functions_map[f.id] for f in group] for group in plan(pulp.value)]
+            groups += [list(group) for group in fixed_groups]
             metrics = calculate_metrics(groups, app)
-            return {'name': 'MtxILP (Optimal)', 'groups': groups, **metrics, 'runtime': runtime}
+            return {'name': 'MtxILP (Optimal)', 'groups': groups, **metrics, 'runtime': runtime,
+                    'optimal': prob.sol_status == pulp.LpSolutionOptimal}
         else:
-            return {'name': 'MtxILP (Optimal)', 'groups': [], 'cost': float('inf'), 'latency': float('inf'), 'feasible': False, 'runtime': runtime, 'error': pulp.LpStatus[prob.status]}
\ No newline at end of file
+            return {'name': 'MtxILP (Optimal)', 'groups': [], 'cost': float('inf'), 'latency': float('inf'), 'feasible': False, 'runtime': runtime, 'optimal': False, 'error': pulp.LpStatus[prob.status]}
+
+
+# Configurations mtx_ilp_portfolio races: name -> mtx_ilp keyword arguments
+PORTFOLIO = {
+    'presolved': {},
+    'presolved-seed-1': {'options': ['randomCbcSeed 1', 'randomSeed 1']},
+    'presolved-seed-2': {'options': ['randomCbcSeed 2', 'randomSeed 2']},
+    'presolved-no-cuts': {'options': ['cuts off']},
+    'presolved-no-preprocess': {'options': ['preprocess off']},
+    'full': {'presolve': False},
+}
+
+# Seconds past the time limit to wait for workers (process start-up and model building)
+PORTFOLIO_GRACE = 10
+
+
+def _settles(result: dict) -> bool:
+    """Whether a configuration's result settles the instance: a proven optimum, or proof that there is none."""
+    return bool(result.get('optimal')) or result.get('error') == 'Infeasible'
+
+
+class PortfolioStats:
+    """
+    Races entered and won per portfolio configuration. When fewer workers
+    than configurations are available, the ones with the highest (smoothed)
+    win rate are raced. Kept in memory, and in the JSON file at `path` if
+    given (concurrent servers may overwrite each other's latest counts).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.entered, self.won = {}, {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+                self.entered, self.won = dict(data['entered']), dict(data['won'])
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"WARNING: Could not load portfolio stats from {path}: {e}")
+
+    def win_rate(self, name: str) -> float:
+        """Wins over races, with one prior win and loss, so untried configurations start at 0.5."""
+        return (self.won.get(name, 0) + 1) / (self.entered.get(name, 0) + 2)
+
+    def ranked(self, names: list[str]) -> list[str]:
+        return sorted(names, key=self.win_rate, reverse=True)
+
+    def record(self, entered: list[str], winner: str):
+        with self._lock:
+            for name in entered:
+                self.entered[name] = self.entered.get(name, 0) + 1
+            self.won[winner] = self.won.get(winner, 0) + 1
+            if self.path:
+                try:
+                    tmp_path = f"{self.path}.tmp"
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        json.dump({'entered': self.entered, 'won': self.won}, f)
+                    os.replace(tmp_path, self.path)
+                except OSError as e:
+                    print(f"WARNING: Could not save portfolio stats to {self.path}: {e}")
+
+
+_portfolio_stats = None
+_portfolio_stats_lock = threading.Lock()
+
+
+def portfolio_stats() -> PortfolioStats:
+    """The process-wide PortfolioStats, persisted to settings.OPTIFUSE_PORTFOLIO_STATS if set."""
+    global _portfolio_stats
+    with _portfolio_stats_lock:
+        if _portfolio_stats is None:
+            path = getattr(settings, 'OPTIFUSE_PORTFOLIO_STATS', '') if settings.configured else ''
+            _portfolio_stats = PortfolioStats(path or None)
+        return _portfolio_stats
+
+
+def _race(results, name: str, app_name: str, function_ids: list[str], inputs: dict, kwargs: dict,
+          time_limit: int, warm_start: Optional[list[list[str]]]):
+    """Portfolio worker: solves one configuration and reports (name, result with groups as IDs)."""
+    if hasattr(os, 'setpgrp'):
+        # CBC inherits this process group, so a lost race kills both at once.
+        os.setpgrp()
+    app = ApplicationBuilder.create_from_inputs(app_name, function_ids, inputs)
+    warm = [[app.functions_map[fid] for fid in group] for group in warm_start] if warm_start else None
+    try:
+        result = mtx_ilp(app, time_limit=time_limit, warm_start=warm, **kwargs)
+    except Exception as e:
+        result = {'feasible': False, 'error': f"Configuration failed with exception: {e}"}
+    result['groups'] = [[f.id for f in group] for group in result.get('groups') or []]
+    results.put((name, result))
+
+
+def _stop(process):
+    if process.is_alive():
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (AttributeError, OSError):
+            # No process groups here, or the worker has not made its own yet
+            process.kill()
+    process.join(timeout=5)
+
+
+def mtx_ilp_portfolio(app: Application, time_limit: int = 60,
+                      warm_start: Optional[list[list[LambdaFunction]]] = None,
+                      configurations: Optional[list[str]] = None, workers: Optional[int] = None,
+                      stats: Optional[PortfolioStats] = None) -> dict:
+    """
+    Races mtx_ilp configurations from PORTFOLIO (different formulations, CBC
+    options and seeds) in separate processes and returns the first that
+    settles the instance (proves an optimum or infeasibility); the others are
+    killed along with their CBC processes. With fewer `workers` (default: one
+    per CPU) than configurations, the ones that won most often so far race.
+    The winner is recorded in `stats` (default: portfolio_stats()) and
+    reported under 'portfolio' with the configurations that raced. If none
+    settles it in time, the cheapest feasible incumbent is returned with
+    'optimal' False and no winner.
+    """
+    start_time = time.time()
+    stats = stats or portfolio_stats()
+    names = stats.ranked(configurations or list(PORTFOLIO))
+    entered = names[:max(1, workers or min(len(names), os.cpu_count() or 1))]
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    function_ids = [f.id for f in app.functions]
+    inputs = ApplicationBuilder.inputs_of(app)
+    warm_ids = [[f.id for f in group] for group in warm_start] if warm_start else None
+    processes = {
+        name: context.Process(target=_race, daemon=True, args=(
+            results, name, app.name, function_ids, inputs, PORTFOLIO[name], time_limit, warm_ids))
+        for name in entered
+    }
+    for process in processes.values():
+        process.start()
+
+    winner, outcomes = None, {}
+    deadline = start_time + time_limit + PORTFOLIO_GRACE
+    try:
+        while len(outcomes) < len(processes) and time.time() < deadline:
+            try:
+                name, result = results.get(timeout=min(1.0, max(deadline - time.time(), 0.01)))
+            except queue.Empty:
+                for name, process in processes.items():
+                    if name not in outcomes and process.exitcode not in (None, 0):
+                        outcomes[name] = {'feasible': False, 'error': f"Worker exited with code {process.exitcode}"}
+                continue
+            outcomes[name] = result
+            if _settles(result):
+                winner = name
+                break
+    finally:
+        for process in processes.values():
+            _stop(process)
+
+    runtime = (time.time() - start_time) * 1000
+    portfolio = {'winner': winner, 'entered': entered}
+    if winner is not None:
+        stats.record(entered, winner)
+        result = outcomes[winner]
+    else:
+        incumbents = [result for result in outcomes.values() if result.get('feasible')]
+        if not incumbents:
+            return {'name': 'MtxILP (Portfolio)', 'groups': [], 'cost': float('inf'), 'latency': float('inf'),
+                    'feasible': False, 'runtime': runtime, 'portfolio': portfolio, 'optimal': False,
+                    'error': 'No configuration settled the instance within the time limit'}
+        result = min(incumbents, key=lambda r: r['cost'])
+    result['groups'] = [[app.functions_map[fid] for fid in group] for group in result['groups']]
+    return {**result, 'name': 'MtxILP (Portfolio)', 'runtime': runtime, 'portfolio': portfolio}
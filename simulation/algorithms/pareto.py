@@ -0,0 +1,259 @@
+# Will contain the whole-tree cost/latency Pareto frontier
+import time
+from typing import Optional
+from ..core.structures import Application, LambdaFunction
+from ..utils.skyline import Skyline
+from .metrics import calculate_metrics
+
+# Execution cost of a group is EXEC_PRICE * total memory (MB) * total runtime (ms)
+EXEC_PRICE = 0.00001667 / (1024 * 1000)
+
+
+class _Label:
+    """
+    One partial plan of a subtree: the group still open at the subtree root
+    (memory, runtime), the cost of everything already closed below it, the
+    critical-path hops so far, and how it was built (for reconstruction).
+    """
+    __slots__ = ('memory', 'runtime', 'closed', 'hops', 'trace')
+
+    def __init__(self, memory, runtime, closed, hops, trace):
+        self.memory = memory
+        self.runtime = runtime
+        self.closed = closed
+        self.hops = hops
+        # (previous trace, child, child label, merged) per child decided so far
+        self.trace = trace
+
+    def total_cost(self) -> float:
+        return self.closed + EXEC_PRICE * self.memory * self.runtime
+
+
+class _LabelSet:
+    """
+    Non-dominated labels of one subtree, bucketed by (hops, open-group memory);
+    within a bucket a Skyline over (open-group runtime, closed cost) keeps only
+    labels that no other label beats on both.
+    """
+
+    def __init__(self):
+        self.buckets: dict[int, dict[int, Skyline]] = {}
+
+    def add(self, label: _Label):
+        by_memory = self.buckets.setdefault(label.hops, {})
+        skyline = by_memory.get(label.memory)
+        if skyline is None:
+            skyline = by_memory[label.memory] = Skyline()
+        skyline.insert(label.runtime, label.closed, label)
+
+    def labels(self):
+        for by_memory in self.buckets.values():
+            for skyline in by_memory.values():
+                yield from skyline
+
+    def prune(self):
+        """
+        Drops labels dominated by a label with fewer hops and the same open-group
+        memory (no more runtime, no more closed cost); within a bucket the
+        Skyline already did this.
+        """
+        seen: dict[int, Skyline] = {}
+        for hops in sorted(self.buckets):
+            by_memory = self.buckets[hops]
+            for memory, skyline in list(by_memory.items()):
+                lower = seen.get(memory)
+                if lower is None:
+                    lower = seen[memory] = Skyline()
+                else:
+                    kept = Skyline()
+                    for x, y, label in skyline.points():
+                        if not lower.dominates(x, y):
+                            kept.insert(x, y, label)
+                    if not kept:
+                        del by_memory[memory]
+                        continue
+                    by_memory[memory] = skyline = kept
+                for x, y, label in skyline.points():
+                    lower.insert(x, y, label)
+            if not by_memory:
+                del self.buckets[hops]
+
+    def bound(self, max_labels: int) -> bool:
+        """
+        Caps the labels per hop count at `max_labels`, keeping the ones that
+        would be cheapest if their open group were closed now. Returns True if
+        any label was dropped (the result is then no longer exact).
+        """
+        dropped = False
+        for hops, by_memory in self.buckets.items():
+            labels = [label for skyline in by_memory.values() for label in skyline]
+            if len(labels) <= max_labels:
+                continue
+            dropped = True
+            labels.sort(key=_Label.total_cost)
+            rebuilt = {}
+            for label in labels[:max_labels]:
+                skyline = rebuilt.get(label.memory)
+                if skyline is None:
+                    skyline = rebuilt[label.memory] = Skyline()
+                skyline.insert(label.runtime, label.closed, label)
+            self.buckets[hops] = rebuilt
+        return dropped
+
+
+def _cheapest_by_hops(labels) -> dict[int, _Label]:
+    """Cheapest closed label per hop count, keeping only hop counts that are cheaper than all fewer ones."""
+    best = {}
+    for label in labels:
+        current = best.get(label.hops)
+        if current is None or label.total_cost() < current.total_cost():
+            best[label.hops] = label
+    staircase, last_cost = {}, float('inf')
+    for hops in sorted(best):
+        cost = best[hops].total_cost()
+        if cost < last_cost:
+            staircase[hops], last_cost = best[hops], cost
+    return staircase
+
+
+def _cut_children(label: _Label) -> set[str]:
+    """IDs of the functions whose edge to their parent is cut in the plan behind `label`."""
+    cut, stack = set(), [label]
+    while stack:
+        trace = stack.pop().trace
+        while trace is not None:
+            trace, child, child_label, merged = trace
+            if not merged:
+                cut.add(child.id)
+            stack.append(child_label)
+    return cut
+
+
+def _groups_from_cuts(app: Application, cut: set[str]) -> list[list[LambdaFunction]]:
+    """Connected groups left after cutting the edges above the functions in `cut`."""
+    groups, group_of = [], {}
+    for func in app.index.order:
+        if func.parent is None or func.id in cut:
+            group_of[func.id] = len(groups)
+            groups.append([func])
+        else:
+            group_of[func.id] = group_of[func.parent.id]
+            groups[group_of[func.id]].append(func)
+    return groups
+
+
+def _root_labels(app: Application, max_hops: int, max_labels: int) -> tuple[_LabelSet, bool]:
+    """
+    The bottom-up DP behind pareto_frontier: the non-dominated labels of the
+    whole application with at most `max_hops` cut critical-path edges, and
+    whether no label was dropped by the `max_labels` cap. Every parentless
+    function roots its own tree; the trees are joined under a virtual root,
+    as children whose edges are cut at no cost, so the labels carry no open
+    group.
+    """
+    index = app.index
+    critical_edges = index.critical_edges
+
+    exact = True
+    label_sets = {}
+    # Children before parents
+    for v in reversed(index.order):
+        current = _LabelSet()
+        current.add(_Label(v.memory, v.runtime, 0.0, 0, None))
+        for c in v.children:
+            child_set = label_sets.pop(c.id)
+            hop = 1 if (v.id, c.id) in critical_edges else 0
+            transfer = index.transfer_cost(c)
+
+            # Cutting the edge closes the child's group; only its cheapest label per hop count
+            # matters, and only if it is cheaper than the ones with fewer hops.
+            cut_best = _cheapest_by_hops(child_set.labels())
+            child_labels = list(child_set.labels())
+
+            joined = _LabelSet()
+            for a in current.labels():
+                for child_hops, b in cut_best.items():
+                    hops = a.hops + child_hops + hop
+                    if hops <= max_hops:
+                        joined.add(_Label(a.memory, a.runtime, a.closed + b.total_cost() + transfer, hops,
+                                          (a.trace, c, b, False)))
+                for b in child_labels:
+                    hops = a.hops + b.hops
+                    if hops <= max_hops and a.memory + b.memory <= app.max_memory:
+                        joined.add(_Label(a.memory + b.memory, a.runtime + b.runtime, a.closed + b.closed, hops,
+                                          (a.trace, c, b, True)))
+            joined.prune()
+            exact = not joined.bound(max_labels) and exact
+            current = joined
+        label_sets[v.id] = current
+
+    forest = _LabelSet()
+    forest.add(_Label(0, 0, 0.0, 0, None))
+    for root in (f for f, parent in zip(index.order, index.parent) if parent < 0):
+        joined = _LabelSet()
+        root_best = _cheapest_by_hops(label_sets[root.id].labels())
+        for a in forest.labels():
+            for root_hops, b in root_best.items():
+                if a.hops + root_hops <= max_hops:
+                    joined.add(_Label(0, 0, a.closed + b.total_cost(), a.hops + root_hops, (a.trace, root, b, False)))
+        joined.prune()
+        forest = joined
+    return forest, exact
+
+
+def pareto_frontier(app: Application, max_labels: int = 256, max_points: Optional[int] = None) -> dict:
+    """
+    Cost/latency Pareto frontier over the whole tree, for plans whose groups
+    are connected subtrees (as in mtx_ilp).
+
+    Latency only depends on how many critical-path edges are cut, so a
+    bottom-up DP keeps, per subtree and hop count, the non-dominated labels
+    (see _LabelSet). Joining a child either cuts the edge (the child's cheapest
+    closed label per hop count is enough) or merges the child's open group
+    into the parent's, if memory allows. Labels that already exceed the
+    latency budget are discarded. With more than `max_labels` labels per hop
+    count the set is truncated and 'exact' is False.
+
+    Returns the cheapest feasible plan as the main result plus 'frontier': the
+    feasible Pareto-optimal plans from fastest to cheapest (groups as function
+    IDs), thinned to `max_points` if given.
+    """
+    start_time = time.time()
+    index = app.index
+    critical_runtime = index.critical_runtime
+    max_hops = (app.max_latency - critical_runtime) // app.network_hop_delay if app.network_hop_delay else len(index.critical_edges)
+    if max_hops < 0:
+        return {'name': 'Pareto Frontier', 'groups': [], 'cost': float('inf'), 'latency': critical_runtime,
+                'feasible': False, 'frontier': [], 'runtime': (time.time() - start_time) * 1000,
+                'error': 'Critical path alone exceeds max_latency'}
+    if any(f.memory > app.max_memory for f in app.functions):
+        return {'name': 'Pareto Frontier', 'groups': [], 'cost': float('inf'), 'latency': float('inf'),
+                'feasible': False, 'frontier': [], 'runtime': (time.time() - start_time) * 1000,
+                'error': 'A function exceeds max_memory on its own'}
+
+    root_labels, exact = _root_labels(app, max_hops, max_labels)
+
+    # Latency grows with hops, so the root's staircase is the frontier.
+    frontier, cheapest = [], None
+    for label in _cheapest_by_hops(root_labels.labels()).values():
+        groups = _groups_from_cuts(app, _cut_children(label))
+        metrics = calculate_metrics(groups, app)
+        frontier.append((groups, metrics))
+        cheapest = (groups, metrics)
+
+    if max_points is not None and len(frontier) > max_points:
+        skyline = Skyline()
+        for groups, metrics in frontier:
+            skyline.insert(metrics['latency'], metrics['cost'], (groups, metrics))
+        skyline.thin(max_points)
+        frontier = list(skyline)
+
+    runtime = (time.time() - start_time) * 1000
+    if cheapest is None:
+        return {'name': 'Pareto Frontier', 'groups': [], 'cost': float('inf'), 'latency': float('inf'),
+                'feasible': False, 'frontier': [], 'exact': exact, 'runtime': runtime,
+                'error': 'No plan satisfies the memory and latency constraints'}
+    return {
+        'name': 'Pareto Frontier', 'groups': cheapest[0], **cheapest[1], 'runtime': runtime, 'exact': exact,
+        'frontier': [{'groups': [[f.id for f in group] for group in groups], **metrics} for groups, metrics in frontier],
+    }
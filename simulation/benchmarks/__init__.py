@@ -0,0 +1,5 @@
+"""Benchmarks"""
+
+from .generator import generate_application
+
+__all__ = ["generate_application"]
@@ -0,0 +1,38 @@
+# Throughput of the discrete-event execution simulator.
+# Run with: python -m simulation.benchmarks.bench_execution
+import time
+from ..algorithms.heuristics import no_fusion
+from ..algorithms.multilevel import multilevel_partitioning
+from ..execution import simulate_execution
+from .generator import generate_application
+
+# (functions, requests, arrival rate per second, concurrency cap); the second of each
+# pair offers more container-seconds per second than the cap allows.
+CASES = [
+    (20, 100000, 100, 1000),
+    (20, 100000, 400, 1000),
+    (200, 10000, 10, 1000),
+    (200, 10000, 40, 1000),
+    (1000, 2000, 2, 1000),
+]
+
+
+def main():
+    print(f"{'N':>5} {'plan':>10} {'requests':>9} {'rate/s':>7} {'containers':>11} {'functions':>10} "
+          f"{'p50 ms':>9} {'p99 ms':>9} {'static ms':>9} {'throttled':>10} {'seconds':>8} {'functions/min':>14}")
+    for n, requests, rate, concurrency in CASES:
+        app = generate_application(n, seed=1)
+        for plan_name, algorithm in (('no_fusion', no_fusion), ('multilevel', multilevel_partitioning)):
+            groups = algorithm(app)['groups']
+            start = time.perf_counter()
+            stats = simulate_execution(app, groups, rate, requests=requests, concurrency=concurrency, runtime_jitter=0.2)
+            seconds = time.perf_counter() - start
+            latency = stats['latency']
+            print(f"{n:>5} {plan_name:>10} {requests:>9} {rate:>7} {stats['containers']:>11} "
+                  f"{stats['function_invocations']:>10} {latency['p50']:>9.0f} {latency['p99']:>9.0f} "
+                  f"{stats['static_latency']:>9.0f} {stats['throttled']:>10} {seconds:>8.2f} "
+                  f"{stats['function_invocations'] / seconds * 60:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+# Model size and solve time of mtx_ilp with and without presolve.
+# Run with: python -m simulation.benchmarks.bench_ilp
+import time
+from ..algorithms.optimal import mtx_ilp, _full_model, _presolved_model
+from .generator import generate_application
+
+SIZES = [8, 12, 16, 20, 30, 100, 500, 2000]
+
+# Largest application the full model is built and solved for
+FULL_MAX_N = 20
+
+TIME_LIMIT = 60
+
+
+def _model_size(build, app) -> tuple[int, int]:
+    prob, _, _ = build(app, app.functions, {}, None)
+    return len(prob.variables()), len(prob.constraints)
+
+
+def main():
+    print(f"{'N':>5} {'model':>9} {'variables':>10} {'constraints':>12} {'seconds':>8} {'status':>10} {'cost':>12}")
+    for n in SIZES:
+        app = generate_application(n, seed=1)
+        for name, build, presolve in (('full', _full_model, False), ('presolved', _presolved_model, True)):
+            if not presolve and n > FULL_MAX_N:
+                continue
+            variables, constraints = _model_size(build, app)
+            start = time.perf_counter()
+            result = mtx_ilp(app, time_limit=TIME_LIMIT, presolve=presolve)
+            seconds = time.perf_counter() - start
+            status = result.get('error') or 'Optimal'
+            print(f"{n:>5} {name:>9} {variables:>10} {constraints:>12} {seconds:>8.2f} {status:>10} {result['cost']:>12.6f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# Runtime of calculate_metrics and the algorithms that read the application's structure.
+# Run with: python -m simulation.benchmarks.bench_index
+import time
+from ..algorithms import heuristics
+from ..algorithms.bounds import lower_bound
+from ..algorithms.metrics import calculate_metrics
+from ..algorithms.multilevel import multilevel_partitioning
+from ..algorithms.pareto import pareto_frontier
+from .generator import generate_application
+
+SIZES = [100, 1000, 10000]
+
+# (name, function of the app, largest N it is run for)
+CASES = [
+    ('metrics(no fusion)', lambda app: calculate_metrics([[f] for f in app.functions], app), 10000),
+    ('no_fusion', heuristics.no_fusion, 10000),
+    ('singleton', heuristics.singleton, 10000),
+    ('greedy_tree_partitioning', heuristics.greedy_tree_partitioning, 1000),
+    ('costless_csp', heuristics.costless_csp, 10000),
+    ('pareto_frontier', pareto_frontier, 1000),
+    ('multilevel_partitioning', multilevel_partitioning, 10000),
+    ('lower_bound', lower_bound, 10000),
+]
+
+
+def _ms_per_call(fn, repeat: int, rounds: int = 5) -> float:
+    """The best of `rounds` mean wall times of `fn()`, in ms."""
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - start) / repeat * 1000)
+    return best
+
+
+def main():
+    print(f"{'case':>26} " + ' '.join(f"{f'N={n} ms':>12}" for n in SIZES))
+    apps = {n: generate_application(n, seed=1) for n in SIZES}
+    for name, run, max_n in CASES:
+        cells = []
+        for n in SIZES:
+            if n > max_n:
+                cells.append(f"{'-':>12}")
+                continue
+            app = apps[n]
+            run(app)
+            cells.append(f"{_ms_per_call(lambda: run(app), max(3, 3000 // n)):>12.2f}")
+        print(f"{name:>26} " + ' '.join(cells))
+
+
+if __name__ == '__main__':
+    main()
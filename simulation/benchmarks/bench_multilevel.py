@@ -0,0 +1,38 @@
+# Cost and runtime of the multilevel partitioner against the other tree algorithms.
+# Run with: python -m simulation.benchmarks.bench_multilevel
+import time
+from ..algorithms.heuristics import no_fusion, min_w_cut_heuristic
+from ..algorithms.multilevel import multilevel_partitioning
+from ..algorithms.pareto import pareto_frontier
+from .generator import generate_application
+
+SIZES = [1000, 10000, 50000]
+
+# Largest tree each algorithm is run on; min_w_cut_heuristic is quadratic. Costs are
+# reported relative to pareto_frontier's DP, which runs first.
+ALGORITHMS = [
+    ('pareto_frontier', lambda app: pareto_frontier(app, max_labels=64, max_points=1), None),
+    ('no_fusion', no_fusion, None),
+    ('min_w_cut_heuristic', min_w_cut_heuristic, 3000),
+    ('multilevel_partitioning', multilevel_partitioning, None),
+]
+
+
+def main():
+    print(f"{'N':>7} {'algorithm':>24} {'cost':>12} {'vs pareto':>10} {'feasible':>9} {'seconds':>8}")
+    for n in SIZES:
+        app = generate_application(n, seed=1)
+        for name, algorithm, max_n in ALGORITHMS:
+            if max_n is not None and n > max_n:
+                continue
+            start = time.perf_counter()
+            result = algorithm(app)
+            seconds = time.perf_counter() - start
+            if name == 'pareto_frontier':
+                reference = result['cost']
+            ratio = f"{result['cost'] / reference:.3f}"
+            print(f"{n:>7} {name:>24} {result['cost']:>12.6f} {ratio:>10} {str(result['feasible']):>9} {seconds:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+# Replays applications dumped by profiled runs (OPTIFUSE_PROFILE_DUMP_DIR) through the algorithms.
+# Run with: python -m simulation.benchmarks.bench_replay dumps/ [algorithm ...]
+import json
+import sys
+from pathlib import Path
+from ..core.builder import ApplicationBuilder
+from ..runner import ALGORITHMS
+from ..utils.profiling import profiled_call
+
+# Functions listed per algorithm run, by cumulative time
+TOP = 5
+
+
+def load_replay(path: Path):
+    """Rebuilds the Application of a history.dump_application file."""
+    snapshot = json.loads(path.read_text(encoding='utf-8'))
+    return ApplicationBuilder.create_from_inputs(snapshot['name'], snapshot['function_ids'], snapshot['inputs'])
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python -m simulation.benchmarks.bench_replay <dump file or directory> [algorithm ...]")
+    target = Path(sys.argv[1])
+    paths = sorted(target.glob('*.json')) if target.is_dir() else [target]
+    algorithms = sys.argv[2:] or list(ALGORITHMS)
+
+    for path in paths:
+        app = load_replay(path)
+        print(f"{app.name}: {len(app.functions)} functions, critical path {len(app.critical_path_ids)}")
+        for name in algorithms:
+            result, profile = profiled_call(ALGORITHMS[name], app, top=TOP)
+            print(f"  {name:>26} {result.get('runtime', 0):>10.1f} ms {profile['peakMemoryBytes'] / 1024:>10.0f} KiB peak"
+                  f"  feasible={result.get('feasible')}")
+            for entry in profile['functions']:
+                print(f"  {'':>26} {entry['cumulativeMs']:>10.1f} ms  {entry['calls']:>8} calls  {entry['function']}")
+
+
+if __name__ == '__main__':
+    main()
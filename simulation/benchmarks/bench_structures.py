@@ -0,0 +1,50 @@
+# Micro-benchmarks for the core structures and calculate_metrics.
+# Run with: python -m simulation.benchmarks.bench_structures
+import time
+import tracemalloc
+from ..core.structures import CompositeFunction
+from ..algorithms.metrics import calculate_metrics
+from .generator import generate_application
+
+SIZES = [100, 1000, 10000]
+
+
+def _time_per_call(fn, repeat: int) -> float:
+    """Returns the mean wall time of `fn()` in microseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def _chunked_plan(app, chunk: int = 4) -> list:
+    """A plan that fuses functions in BFS order, `chunk` at a time."""
+    order, q = [], [app.root_function]
+    while q:
+        node = q.pop(0)
+        order.append(node)
+        q.extend(node.children)
+    return [order[i:i + chunk] for i in range(0, len(order), chunk)]
+
+
+def main():
+    print(f"{'N':>7} {'build KiB':>10} {'agg access us':>14} {'metrics(no fusion) us':>22} {'metrics(chunked) us':>20}")
+    for n in SIZES:
+        tracemalloc.start()
+        app = generate_application(n, seed=1)
+        build_kib = tracemalloc.get_traced_memory()[0] / 1024
+        tracemalloc.stop()
+
+        repeat = max(3, 20000 // n)
+        group = CompositeFunction(app.functions[:32])
+        agg_us = _time_per_call(lambda: (group.memory, group.runtime, group.get_execution_cost()), 20000)
+
+        singletons = [[f] for f in app.functions]
+        chunked = _chunked_plan(app)
+        nofusion_us = _time_per_call(lambda: calculate_metrics(singletons, app), repeat)
+        chunked_us = _time_per_call(lambda: calculate_metrics(chunked, app), repeat)
+        print(f"{n:>7} {build_kib:>10.1f} {agg_us:>14.2f} {nofusion_us:>22.1f} {chunked_us:>20.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+# Synthetic application generator used by the benchmark scripts
+import random
+from ..core.structures import Application, LambdaFunction
+
+
+def generate_application(n_functions: int, seed: int = 0, max_children: int = 3,
+                         max_memory: int = 1024, latency_slack: float = 1.5,
+                         network_hop_delay: int = 20) -> Application:
+    """
+    Builds a random tree-shaped Application with `n_functions` functions.
+    The critical path is the root-to-leaf chain with the largest runtime sum and
+    max_latency is set to `latency_slack` times its runtime, so instances are
+    feasible but hops on the chain are not free.
+    """
+    rng = random.Random(seed)
+    functions = []
+    for i in range(n_functions):
+        functions.append(LambdaFunction(
+            id=f"f{i}",
+            name=f"f{i}",
+            memory=rng.choice([128, 128, 256, 256, 512]),
+            baseline_runtime=rng.randint(10, 400),
+        ))
+
+    # Attach every function to a random earlier one that still has room for
+    # children, which keeps the tree connected and rooted at f0.
+    open_parents = [functions[0]]
+    for func in functions[1:]:
+        parent = rng.choice(open_parents)
+        parent.add_child(func, rng.choice([0, 1 << 20, 5 << 20, 50 << 20, 500 << 20]))
+        if len(parent.children) >= max_children:
+            open_parents.remove(parent)
+        open_parents.append(func)
+
+    # Critical path: heaviest root-to-leaf chain by runtime.
+    best_sum, best_chain = -1, []
+    stack = [(functions[0], functions[0].runtime, [functions[0].id])]
+    while stack:
+        node, total, chain = stack.pop()
+        if not node.children and total > best_sum:
+            best_sum, best_chain = total, chain
+        for child in node.children:
+            stack.append((child, total + child.runtime, chain + [child.id]))
+
+    return Application(
+        name=f"synthetic-{n_functions}-{seed}",
+        functions=functions,
+        critical_path_ids=best_chain,
+        max_memory=max_memory,
+        max_latency=int(best_sum * latency_slack),
+        network_hop_delay=network_hop_delay,
+    )
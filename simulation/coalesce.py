@@ -0,0 +1,214 @@
+# Single-flight coalescing of identical concurrent live simulations
+import asyncio
+import hashlib
+import json
+import math
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .connectors.aws import LOGS_LOOKBACK_HOURS
+from .core.builder import ApplicationBuilder
+from .core.structures import Application
+from .utils.timing import StageTimer
+
+# Holds the cross-worker locks and shared results; process-local unless pointed at a shared backend
+COALESCE_CACHE_ALIAS = 'coalesce'
+
+
+def coalescing_enabled() -> bool:
+    return getattr(settings, 'OPTIFUSE_COALESCE_LIVE', False)
+
+
+def live_simulation_key(repo_owner: str, repo_name: str, spec: dict, aws_role_arn: str, tier: str) -> str:
+    """
+    Identifies live simulations that produce the same result: the same
+    repository and serverless.yml content (file references inlined), metrics
+    read through the same AWS role over the same LOGS_LOOKBACK_HOURS window,
+    and the same tier's algorithm suite.
+    """
+    spec_hash = hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    parts = [repo_owner, repo_name, spec_hash, aws_role_arn, f"{LOGS_LOOKBACK_HOURS}h", tier]
+    return 'live:' + hashlib.sha256('\x00'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _payload(app: Application, results: list[dict]) -> dict[str, Any]:
+    """What waiters receive: the application's inputs snapshot and the results with groups as IDs."""
+    return {
+        'name': app.name,
+        'function_ids': [f.id for f in app.functions],
+        'inputs': ApplicationBuilder.inputs_of(app),
+        'results': [{**result, 'groups': [[m if isinstance(m, str) else m.id for m in group]
+                                          for group in result.get('groups') or []]}
+                    for result in results],
+    }
+
+
+def _unpack(payload: dict[str, Any]) -> tuple[Application, list[dict]]:
+    """A private copy of a shared result, since encoding rewrites the results in place."""
+    app = ApplicationBuilder.create_from_inputs(payload['name'], payload['function_ids'], payload['inputs'])
+    return app, [{**result, 'groups': [list(group) for group in result['groups']]} for result in payload['results']]
+
+
+class _Flight:
+    """One in-progress computation in this process, and the threads and event loops waiting on it."""
+    __slots__ = ('done', 'payload', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.payload = None
+        self.error = None
+        self.waiters = []
+
+
+_flights: dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+
+
+def _board(key: str) -> tuple[_Flight, bool]:
+    """The flight for `key` and whether the caller is its leader (it started it)."""
+    with _flights_lock:
+        flight = _flights.get(key)
+        if flight is not None:
+            return flight, False
+        flight = _flights[key] = _Flight()
+        return flight, True
+
+
+def _land(key: str, flight: _Flight, payload: Optional[dict] = None, error: Optional[BaseException] = None):
+    flight.payload, flight.error = payload, error
+    with _flights_lock:
+        _flights.pop(key, None)
+        flight.done.set()
+        waiters, flight.waiters = flight.waiters, []
+    for loop, future in waiters:
+        loop.call_soon_threadsafe(lambda f=future: f.done() or f.set_result(None))
+
+
+async def _wait_async(flight: _Flight):
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    with _flights_lock:
+        if flight.done.is_set():
+            return
+        flight.waiters.append((loop, future))
+    await future
+
+
+def _received(flight: _Flight) -> tuple[Application, list[dict], bool]:
+    if flight.error is not None:
+        raise flight.error
+    return (*_unpack(flight.payload), True)
+
+
+def _shared_error(exc: BaseException) -> Exception:
+    """What waiters raise when the leader failed; a cancelled or interrupted leader must not cancel them."""
+    return exc if isinstance(exc, Exception) else RuntimeError("The shared simulation was interrupted.")
+
+
+def _settings() -> tuple[int, int, float]:
+    """
+    (result TTL, lock TTL, poll interval). A result is kept at least two poll
+    intervals, so the waiters of other processes find it; a longer
+    OPTIFUSE_COALESCE_TTL makes it a cache for repeats of a finished
+    simulation, whose live metrics are then up to that old.
+    """
+    poll_interval = getattr(settings, 'OPTIFUSE_COALESCE_POLL_INTERVAL', 0.5)
+    ttl = max(getattr(settings, 'OPTIFUSE_COALESCE_TTL', 0), math.ceil(2 * poll_interval))
+    return ttl, getattr(settings, 'OPTIFUSE_COALESCE_LOCK_TTL', 300), poll_interval
+
+
+def single_flight(key: str, compute: Callable[[], tuple[Application, list[dict]]],
+                  timer: StageTimer) -> tuple[Application, list[dict], bool]:
+    """
+    Runs `compute` (returning the live application and its results) once for
+    all identical requests. Threads of this process that arrive while it runs
+    wait for it and get a copy of its result, or its exception. Across
+    processes, the one holding the lock in the 'coalesce' cache computes and
+    stores the result there (see _settings for how long); the others poll for
+    it, and compute themselves if the lock is released without a result.
+    Waiters in either case compute themselves after OPTIFUSE_COALESCE_LOCK_TTL
+    seconds. Time spent waiting is recorded as the 'coalesced' stage. Returns
+    (app, results, coalesced).
+    """
+    started = time.perf_counter()
+    ttl, lock_ttl, poll_interval = _settings()
+    flight, leader = _board(key)
+    if not leader:
+        landed = flight.done.wait(lock_ttl)
+        timer.record('coalesced', time.perf_counter() - started)
+        if landed:
+            return _received(flight)
+        return (*compute(), False)
+
+    cache = caches[COALESCE_CACHE_ALIAS]
+    result_key, lock_key, token = f"{key}:result", f"{key}:lock", uuid.uuid4().hex
+    try:
+        deadline = time.monotonic() + lock_ttl
+        while (payload := cache.get(result_key)) is None:
+            if cache.add(lock_key, token, lock_ttl) or time.monotonic() >= deadline:
+                break
+            time.sleep(poll_interval)
+        if payload is not None:
+            _land(key, flight, payload)
+            timer.record('coalesced', time.perf_counter() - started)
+            return (*_unpack(payload), True)
+
+        try:
+            app, results = compute()
+            payload = _payload(app, results)
+            cache.set(result_key, payload, ttl)
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+    except BaseException as e:
+        _land(key, flight, error=_shared_error(e))
+        raise
+    _land(key, flight, payload)
+    return app, results, False
+
+
+async def single_flight_async(key: str, compute: Callable[[], Awaitable[tuple[Application, list[dict]]]],
+                              timer: StageTimer) -> tuple[Application, list[dict], bool]:
+    """single_flight for the async view; waiting never blocks the event loop."""
+    started = time.perf_counter()
+    ttl, lock_ttl, poll_interval = _settings()
+    flight, leader = _board(key)
+    if not leader:
+        try:
+            await asyncio.wait_for(_wait_async(flight), lock_ttl)
+        except asyncio.TimeoutError:
+            timer.record('coalesced', time.perf_counter() - started)
+            return (*await compute(), False)
+        timer.record('coalesced', time.perf_counter() - started)
+        return _received(flight)
+
+    cache = caches[COALESCE_CACHE_ALIAS]
+    result_key, lock_key, token = f"{key}:result", f"{key}:lock", uuid.uuid4().hex
+    try:
+        deadline = time.monotonic() + lock_ttl
+        while (payload := await cache.aget(result_key)) is None:
+            if await cache.aadd(lock_key, token, lock_ttl) or time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(poll_interval)
+        if payload is not None:
+            _land(key, flight, payload)
+            timer.record('coalesced', time.perf_counter() - started)
+            return (*_unpack(payload), True)
+
+        try:
+            app, results = await compute()
+            payload = _payload(app, results)
+            await cache.aset(result_key, payload, ttl)
+        finally:
+            if await cache.aget(lock_key) == token:
+                await cache.adelete(lock_key)
+    except BaseException as e:
+        _land(key, flight, error=_shared_error(e))
+        raise
+    _land(key, flight, payload)
+    return app, results, False
@@ -1,13 +1,59 @@
-import boto3
+import asyncio
+import functools
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
 from datetime import datetime, timedelta, timezone
+from django.conf import settings
+from ..utils.lazy import lazy_import
 
-def get_assumed_role_session(user_role_arn: str, external_id: str):
+# Loaded on the first AWS call; botocore's service models are slow to import
+boto3 = lazy_import('boto3')
+
+
+def _endpoint_url(service: str):
+    """Per-service endpoint override (e.g. local stand-ins for load tests); None means AWS."""
+    return getattr(settings, 'OPTIFUSE_AWS_ENDPOINT_URLS', {}).get(service)
+
+_base_session = None
+_client_lock = threading.Lock()
+
+
+def _client(service: str, **credentials):
     """
-    Assumes the user's IAM role and returns a temporary boto3 session.
+    Creates a boto3 client from one process-wide session. Building a new session
+    reloads the service models (~100 ms of CPU); clients of a warm session take
+    a few ms. Sessions are not thread-safe, so client creation is serialized;
+    the clients themselves are safe to use from any thread.
     """
-    sts_client = boto3.client('sts')
+    global _base_session
+    with _client_lock:
+        if _base_session is None:
+            _base_session = boto3.session.Session()
+        return _base_session.client(service, endpoint_url=_endpoint_url(service), **credentials)
+
+
+class AssumedRoleSession:
+    """Temporary credentials of an assumed role; hands out clients that use them."""
+
+    def __init__(self, credentials: Dict[str, Any]):
+        self.credentials = credentials
+
+    def client(self, service: str):
+        return _client(
+            service,
+            aws_access_key_id=self.credentials['AccessKeyId'],
+            aws_secret_access_key=self.credentials['SecretAccessKey'],
+            aws_session_token=self.credentials['SessionToken'],
+        )
+
+
+def get_assumed_role_session(user_role_arn: str, external_id: str) -> AssumedRoleSession:
+    """
+    Assumes the user's IAM role and returns a session holding its temporary credentials.
+    """
+    sts_client = _client('sts')
     
     assumed_role_object = sts_client.assume_role(
         RoleArn=user_role_arn,
@@ -15,70 +61,71 @@ def get_assumed_role_session(user_role_arn: str, external_id: str):
         ExternalId=external_id
     )
     
-    credentials = assumed_role_object['Credentials']
-    
-    return boto3.Session(
-        aws_access_key_id=credentials['AccessKeyId'],
-        aws_secret_access_key=credentials['SecretAccessKey'],
-        aws_session_token=credentials['SessionToken'],
-    )
+    return AssumedRoleSession(assumed_role_object['Credentials'])
 
-def fetch_live_xray_data(aws_session, service_name: str, stage: str, function_ids: List[str]) -> Dict[str, Any]:
-    """
-    Fetches live performance data using CloudWatch Logs Insights.
-    This version includes extensive logging and more robust error handling.
+
+LOGS_INSIGHTS_QUERY = """
+    filter @type = "REPORT"
+    | stats avg(@duration) as avgDurationMS, 
+            avg(@maxMemoryUsed) / 1024 / 1024 as avgMemoryMB,
+            count(*) as invocations
+    by @log as logGroupName 
     """
-    logs_client = aws_session.client('logs')
+
+# Hours of Lambda REPORT lines the metrics are averaged over, ending now
+LOGS_LOOKBACK_HOURS = 24
+
+# Poll for the query to complete for at most this long
+LOGS_QUERY_MAX_WAIT = 60
+
+
+def _logs_poll_interval() -> float:
+    return getattr(settings, 'OPTIFUSE_LOGS_POLL_INTERVAL', 1.0)
+
+
+def _start_logs_query(logs_client, service_name: str, stage: str, function_ids: List[str]):
+    """Starts the Logs Insights query and returns its ID, or None if there is nothing to query."""
     end_time = datetime.now(timezone.utc)
-    start_time = end_time - timedelta(hours=24)
+    start_time = end_time - timedelta(hours=LOGS_LOOKBACK_HOURS)
     
     # Construct the full log group names
     log_group_names = [f"/aws/lambda/{service_name}-{stage}-{name}" for name in function_ids]
 
     if not log_group_names:
         print("LOG: No function names provided, cannot query CloudWatch.")
-        return {}
+        return None
 
     print(f"LOG: Attempting to query {len(log_group_names)} log groups: {log_group_names}")
 
-    query = """
-    filter @type = "REPORT"
-    | stats avg(@duration) as avgDurationMS, 
-            avg(@maxMemoryUsed) / 1024 / 1024 as avgMemoryMB,
-            count(*) as invocations
-    by @log as logGroupName 
-    """
-
     try:
         start_query_response = logs_client.start_query(
             logGroupNames=log_group_names,
             startTime=int(start_time.timestamp()),
             endTime=int(end_time.timestamp()),
-            queryString=query,
+            queryString=LOGS_INSIGHTS_QUERY,
             limit=10000
         )
         query_id = start_query_response['queryId']
         print(f"LOG: CloudWatch query started with ID: {query_id}")
+        return query_id
     except logs_client.exceptions.ResourceNotFoundException as e:
         print(f"ERROR: One or more log groups not found. Aborting. Details: {e}")
-        return {} # Gracefully exit if no logs exist
+        return None # Gracefully exit if no logs exist
     except Exception as e:
         print(f"ERROR: Failed to start CloudWatch query. Details: {e}")
         raise # Re-raise the exception to be caught by the view
 
-    # Poll for the query to complete
-    response = None
-    max_wait_seconds = 60
-    wait_time = 0
-    while wait_time < max_wait_seconds:
-        print(f"LOG: Checking query status... (Attempt {wait_time + 1})")
-        response = logs_client.get_query_results(queryId=query_id)
-        if response['status'] in ['Complete', 'Failed', 'Cancelled']:
-            print(f"LOG: Query finished with status: {response['status']}")
-            break
-        time.sleep(1)
-        wait_time += 1
-    
+
+def _query_finished(response, attempt: int) -> bool:
+    print(f"LOG: Checking query status... (Attempt {attempt})")
+    if response['status'] in ['Complete', 'Failed', 'Cancelled']:
+        print(f"LOG: Query finished with status: {response['status']}")
+        return True
+    return False
+
+
+def _process_query_results(response, function_ids: List[str]) -> Dict[str, Any]:
+    """Maps the final Logs Insights response onto {function_id: {avg_runtime_ms, avg_memory_mb}}."""
     # --- ADDED DEFENSIVE CHECKS ---
     if not response:
         print("ERROR: Query response was None after waiting.")
@@ -126,4 +173,74 @@ def fetch_live_xray_data(aws_session, service_name: str, stage: str, function_id
     print(processed_spec)
     print("---------------------------------------------")
             
-    return processed_spec
\ No newline at end of file
+    return processed_spec
+
+
+def fetch_live_xray_data(aws_session, service_name: str, stage: str, function_ids: List[str]) -> Dict[str, Any]:
+    """
+    Fetches live performance data using CloudWatch Logs Insights.
+    This version includes extensive logging and more robust error handling.
+    """
+    logs_client = aws_session.client('logs')
+    query_id = _start_logs_query(logs_client, service_name, stage, function_ids)
+    if query_id is None:
+        return {}
+
+    # Poll for the query to complete
+    response = None
+    poll_interval = _logs_poll_interval()
+    wait_time = 0
+    while wait_time < LOGS_QUERY_MAX_WAIT:
+        response = logs_client.get_query_results(queryId=query_id)
+        if _query_finished(response, int(wait_time / poll_interval) + 1):
+            break
+        time.sleep(poll_interval)
+        wait_time += poll_interval
+
+    return _process_query_results(response, function_ids)
+
+
+_io_executor = None
+
+
+def _run_blocking(func, *args, **kwargs):
+    """
+    Runs a blocking boto3 call on the AWS I/O threads. These calls mostly wait
+    on the network, so the pool is sized for concurrency rather than for
+    CPUs (the default executor gets min(32, cpus + 4) threads).
+    """
+    global _io_executor
+    with _client_lock:
+        if _io_executor is None:
+            _io_executor = ThreadPoolExecutor(max_workers=getattr(settings, 'OPTIFUSE_AWS_IO_THREADS', 64),
+                                              thread_name_prefix='optifuse-aws')
+    return asyncio.get_running_loop().run_in_executor(_io_executor, functools.partial(func, *args, **kwargs))
+
+
+async def get_assumed_role_session_async(user_role_arn: str, external_id: str) -> AssumedRoleSession:
+    """get_assumed_role_session on an I/O thread, so the event loop keeps serving during the STS round trip."""
+    return await _run_blocking(get_assumed_role_session, user_role_arn, external_id)
+
+
+async def fetch_live_xray_data_async(aws_session, service_name: str, stage: str, function_ids: List[str]) -> Dict[str, Any]:
+    """
+    Async variant of fetch_live_xray_data. Each boto3 call runs on an I/O
+    thread, and the waits between polls are asyncio sleeps, so a pending query
+    does not hold a thread.
+    """
+    logs_client = await _run_blocking(aws_session.client, 'logs')
+    query_id = await _run_blocking(_start_logs_query, logs_client, service_name, stage, function_ids)
+    if query_id is None:
+        return {}
+
+    response = None
+    poll_interval = _logs_poll_interval()
+    wait_time = 0
+    while wait_time < LOGS_QUERY_MAX_WAIT:
+        response = await _run_blocking(logs_client.get_query_results, queryId=query_id)
+        if _query_finished(response, int(wait_time / poll_interval) + 1):
+            break
+        await asyncio.sleep(poll_interval)
+        wait_time += poll_interval
+
+    return _process_query_results(response, function_ids)
@@ -0,0 +1,240 @@
+import asyncio
+import base64
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from ..utils.lazy import lazy_import
+
+# Only the async view uses httpx; it loads on first use
+httpx = lazy_import('httpx')
+
+
+def github_api_url() -> str:
+    """Base URL of the GitHub REST API; overridden by the load-test settings."""
+    return getattr(settings, 'OPTIFUSE_GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+
+
+# One AsyncClient per event loop: building one (SSL context included) costs tens of ms.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _async_client() -> 'httpx.AsyncClient':
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = httpx.AsyncClient(timeout=30)
+    return client
+
+
+def _contents_request(github_token: str, owner: str, repo: str, file_path: str) -> tuple[str, dict]:
+    api_url = f"{github_api_url()}/repos/{owner}/{repo}/contents/{file_path}"
+    headers = {
+        'Authorization': f'token {github_token}',
+        'Accept': 'application/vnd.github.v3+json',
+    }
+    return api_url, headers
+
+
+def _decode_contents(file_data: dict) -> str:
+    base64_content = file_data.get('content')
+    if not base64_content:
+        raise ValueError("File content from GitHub is empty.")
+
+    try:
+        cleaned_content = base64_content.strip()
+        padding = len(cleaned_content) % 4
+        if padding > 0:
+            cleaned_content += "=" * (4 - padding)
+        return base64.b64decode(cleaned_content).decode('utf-8')
+    except Exception as e:
+        raise ValueError(f"Failed to decode file content: {e}")
+
+
+def fetch_github_file(github_token: str, owner: str, repo: str, file_path: str) -> str:
+    """
+    Fetches the content of a specific file from a GitHub repository.
+    Raises an exception if the file cannot be fetched or decoded.
+    """
+    api_url, headers = _contents_request(github_token, owner, repo, file_path)
+    
+    res = requests.get(api_url, headers=headers)
+    res.raise_for_status() # Raises HTTPError for 4xx/5xx responses
+    
+    return _decode_contents(res.json())
+
+
+async def fetch_github_file_async(github_token: str, owner: str, repo: str, file_path: str,
+                                  client: Optional['httpx.AsyncClient'] = None) -> str:
+    """
+    Async variant of fetch_github_file. Uses `client` if given, otherwise a
+    client shared by everything running on the current event loop.
+    Raises httpx.HTTPStatusError for 4xx/5xx responses.
+    """
+    api_url, headers = _contents_request(github_token, owner, repo, file_path)
+    res = await (client or _async_client()).get(api_url, headers=headers)
+    res.raise_for_status()
+
+    return _decode_contents(res.json())
+
+
+# Blob downloads in flight at once per RepositoryFiles.read_many call
+MAX_PARALLEL_BLOBS = 8
+BLOB_CACHE_ALIAS = 'blobs'
+
+
+def _blob_cache_key(sha: str) -> str:
+    return f"github-blob:{sha}"
+
+
+def _blob_cache_ttl() -> int:
+    return getattr(settings, 'OPTIFUSE_BLOB_CACHE_TTL', 24 * 60 * 60)
+
+
+def _tree_paths(tree: dict) -> dict[str, str]:
+    """{path: blob SHA} for every file of a recursive Git tree listing."""
+    return {entry['path']: entry['sha'] for entry in tree.get('tree', []) if entry.get('type') == 'blob'}
+
+
+def _decode_blob(blob: dict) -> str:
+    try:
+        if blob.get('encoding') == 'base64':
+            return base64.b64decode(blob.get('content') or '').decode('utf-8')
+        return blob.get('content') or ''
+    except Exception as e:
+        raise ValueError(f"Failed to decode file content: {e}")
+
+
+class _GitTreeFiles:
+    """State shared by RepositoryFiles and AsyncRepositoryFiles."""
+
+    def __init__(self, github_token: str, owner: str, repo: str, ref: str = 'HEAD'):
+        self.github_token = github_token
+        self.owner = owner
+        self.repo = repo
+        self.ref = ref
+        self.headers = {'Authorization': f'token {github_token}', 'Accept': 'application/vnd.github.v3+json'}
+        self._paths = None
+        self._truncated = False
+
+    def _repo_url(self) -> str:
+        return f"{github_api_url()}/repos/{self.owner}/{self.repo}"
+
+    def _set_tree(self, tree: dict):
+        self._paths = _tree_paths(tree)
+        self._truncated = bool(tree.get('truncated'))
+
+
+class RepositoryFiles(_GitTreeFiles):
+    """
+    Reads files of a repository at one ref through the Git trees and blobs API.
+    One request lists every path with its blob SHA; blobs are then fetched
+    concurrently (at most MAX_PARALLEL_BLOBS at a time) and cached by SHA, so a
+    file that has not changed is never downloaded again, whichever repository
+    or request asks for it. `read_many` fits ApplicationBuilder's file_loader.
+    """
+
+    def __init__(self, github_token: str, owner: str, repo: str, ref: str = 'HEAD'):
+        super().__init__(github_token, owner, repo, ref)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+
+    def paths(self) -> dict[str, str]:
+        if self._paths is None:
+            res = self.session.get(f"{self._repo_url()}/git/trees/{self.ref}", params={'recursive': 1})
+            res.raise_for_status()
+            self._set_tree(res.json())
+        return self._paths
+
+    def _fetch_blob(self, sha: str) -> str:
+        res = self.session.get(f"{self._repo_url()}/git/blobs/{sha}")
+        res.raise_for_status()
+        return _decode_blob(res.json())
+
+    def read(self, path: str) -> str:
+        """Content of one file; raises FileNotFoundError if the ref has no such file."""
+        contents = self.read_many([path])
+        if path not in contents:
+            raise FileNotFoundError(path)
+        return contents[path]
+
+    def read_many(self, paths) -> dict[str, str]:
+        """{path: content} for the requested paths that exist."""
+        shas = self.paths()
+        wanted = {path: shas[path] for path in paths if path in shas}
+        cache = caches[BLOB_CACHE_ALIAS]
+        cached = cache.get_many([_blob_cache_key(sha) for sha in set(wanted.values())])
+        contents = {sha: cached[_blob_cache_key(sha)] for sha in set(wanted.values()) if _blob_cache_key(sha) in cached}
+
+        missing = sorted(set(wanted.values()) - contents.keys())
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_BLOBS, len(missing))) as pool:
+                fetched = dict(zip(missing, pool.map(self._fetch_blob, missing)))
+            cache.set_many({_blob_cache_key(sha): text for sha, text in fetched.items()}, _blob_cache_ttl())
+            contents.update(fetched)
+
+        found = {path: contents[sha] for path, sha in wanted.items()}
+        if self._truncated:
+            # Very large trees are listed partially; look up the rest individually.
+            for path in set(paths) - found.keys():
+                try:
+                    found[path] = fetch_github_file(self.github_token, self.owner, self.repo, path)
+                except requests.exceptions.HTTPError as e:
+                    if e.response is None or e.response.status_code != 404:
+                        raise
+        return found
+
+
+class AsyncRepositoryFiles(_GitTreeFiles):
+    """RepositoryFiles for async callers: httpx requests, blob downloads bounded by a semaphore."""
+
+    def __init__(self, github_token: str, owner: str, repo: str, ref: str = 'HEAD',
+                 client: Optional['httpx.AsyncClient'] = None):
+        super().__init__(github_token, owner, repo, ref)
+        self.client = client
+
+    async def _get(self, url: str, **params) -> dict:
+        res = await (self.client or _async_client()).get(url, headers=self.headers, params=params or None)
+        res.raise_for_status()
+        return res.json()
+
+    async def paths(self) -> dict[str, str]:
+        if self._paths is None:
+            self._set_tree(await self._get(f"{self._repo_url()}/git/trees/{self.ref}", recursive=1))
+        return self._paths
+
+    async def read(self, path: str) -> str:
+        contents = await self.read_many([path])
+        if path not in contents:
+            raise FileNotFoundError(path)
+        return contents[path]
+
+    async def read_many(self, paths) -> dict[str, str]:
+        shas = await self.paths()
+        wanted = {path: shas[path] for path in paths if path in shas}
+        cache = caches[BLOB_CACHE_ALIAS]
+        cached = await cache.aget_many([_blob_cache_key(sha) for sha in set(wanted.values())])
+        contents = {sha: cached[_blob_cache_key(sha)] for sha in set(wanted.values()) if _blob_cache_key(sha) in cached}
+
+        missing = sorted(set(wanted.values()) - contents.keys())
+        if missing:
+            semaphore = asyncio.Semaphore(MAX_PARALLEL_BLOBS)
+
+            async def fetch(sha):
+                async with semaphore:
+                    return _decode_blob(await self._get(f"{self._repo_url()}/git/blobs/{sha}"))
+            fetched = dict(zip(missing, await asyncio.gather(*(fetch(sha) for sha in missing))))
+            await cache.aset_many({_blob_cache_key(sha): text for sha, text in fetched.items()}, _blob_cache_ttl())
+            contents.update(fetched)
+
+        found = {path: contents[sha] for path, sha in wanted.items()}
+        if self._truncated:
+            for path in set(paths) - found.keys():
+                try:
+                    found[path] = await fetch_github_file_async(self.github_token, self.owner, self.repo, path, self.client)
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code != 404:
+                        raise
+        return found
@@ -0,0 +1,225 @@
+# Offline counterpart of fetch_live_xray_data: Lambda REPORT lines from exported CloudWatch logs
+import gzip
+import os
+import re
+from collections.abc import Mapping
+from typing import Any, Iterable, Iterator, Optional
+
+from ..utils.sketch import QuantileSketch
+
+# Files are read in chunks of this size, so memory does not grow with the file.
+CHUNK_SIZE = 1 << 20
+
+# Upper bound on one REPORT record or log group token; see scan_reports.
+MAX_RECORD_BYTES = 4096
+
+# Fields are tab-separated in text exports and "\t"-escaped inside JSON exports.
+_SEP = rb'(?:\s|\\t)+'
+TOKEN_RE = re.compile(
+    rb'/aws/lambda/(?P<group>[\w.-]+)'
+    rb'|REPORT RequestId:\s*[\w-]+' + _SEP
+    + rb'Duration:\s*(?P<duration>[\d.]+)\s*ms' + _SEP
+    + rb'Billed Duration:\s*(?P<billed>[\d.]+)\s*ms' + _SEP
+    + rb'Memory Size:\s*(?P<size>\d+)\s*MB' + _SEP
+    + rb'Max Memory Used:\s*(?P<used>\d+)\s*MB'
+    + rb'(?:' + _SEP + rb'Init Duration:\s*(?P<init>[\d.]+)\s*ms)?'
+    # Lambda's JSON log format: a platform.report record with a metrics object
+    + rb'|"metrics"\s*:\s*\{(?P<metrics>[^{}]*"durationMs"[^{}]*)\}'
+)
+_JSON_METRIC_RE = re.compile(rb'"(\w+)"\s*:\s*([\d.]+)')
+
+REPORT_METRICS = ('duration', 'billed_duration', 'max_memory_used', 'init_duration')
+
+
+def read_chunks(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Raw bytes of a log file, gunzipped on the fly for .gz files."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def scan_reports(chunks: Iterable[bytes], log_group: Optional[str] = None) -> Iterator[tuple]:
+    """
+    Yields (log group, duration, billed duration, memory size, max memory used,
+    init duration or None) per REPORT record in a stream of chunks. Each record
+    is attributed to the last /aws/lambda/<name> seen before it (as in
+    subscription and filter-log-events exports), or to `log_group` before any.
+
+    Only matches that start at least MAX_RECORD_BYTES before the end of the
+    buffer are taken; the rest is carried into the next chunk, so records that
+    straddle a chunk boundary are neither lost nor cut short.
+    """
+    carry = b''
+    iterator = iter(chunks)
+    chunk = next(iterator, None)
+    while chunk is not None:
+        following = next(iterator, None)
+        buffer = carry + chunk
+        limit = len(buffer) if following is None else len(buffer) - MAX_RECORD_BYTES
+        end = 0
+        for match in TOKEN_RE.finditer(buffer):
+            if match.start() >= limit:
+                break
+            end = match.end()
+            if match.group('group') is not None:
+                log_group = match.group('group').decode('ascii')
+            elif match.group('duration') is not None:
+                init = match.group('init')
+                yield (log_group, float(match.group('duration')), float(match.group('billed')),
+                       int(match.group('size')), int(match.group('used')), float(init) if init else None)
+            else:
+                metrics = {key.decode('ascii'): float(value) for key, value in _JSON_METRIC_RE.findall(match.group('metrics'))}
+                if 'durationMs' in metrics and 'maxMemoryUsedMB' in metrics:
+                    yield (log_group, metrics['durationMs'], metrics.get('billedDurationMs', metrics['durationMs']),
+                           int(metrics.get('memorySizeMB', 0)), int(metrics['maxMemoryUsedMB']), metrics.get('initDurationMs'))
+        carry = buffer[max(end, limit):]
+        chunk = following
+
+
+class FunctionReportStats(Mapping):
+    """
+    One function's REPORT lines folded into quantile sketches. Reads like an
+    entry of fetch_live_xray_data's result ('avg_runtime_ms', 'avg_memory_mb',
+    plus percentiles and counts), so ApplicationBuilder.enrich_with_live_data
+    takes a {function_id: FunctionReportStats} dict as it is.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.sketches = {metric: QuantileSketch(relative_accuracy) for metric in REPORT_METRICS}
+        self.memory_size: Optional[int] = None
+
+    def add(self, duration: float, billed: float, memory_size: int, used: int, init: Optional[float]):
+        self.sketches['duration'].add(duration)
+        self.sketches['billed_duration'].add(billed)
+        self.sketches['max_memory_used'].add(used)
+        if init is not None:
+            self.sketches['init_duration'].add(init)
+        if memory_size:
+            self.memory_size = memory_size
+
+    def merge(self, other: 'FunctionReportStats'):
+        for metric, sketch in other.sketches.items():
+            self.sketches[metric].merge(sketch)
+        self.memory_size = other.memory_size or self.memory_size
+
+    def summary(self) -> dict[str, Any]:
+        duration, memory = self.sketches['duration'], self.sketches['max_memory_used']
+        init = self.sketches['init_duration']
+        return {
+            'avg_runtime_ms': round(duration.mean),
+            'avg_memory_mb': round(memory.mean),
+            'p50_runtime_ms': duration.quantile(0.5),
+            'p95_runtime_ms': duration.quantile(0.95),
+            'p99_runtime_ms': duration.quantile(0.99),
+            'avg_billed_ms': self.sketches['billed_duration'].mean,
+            'max_memory_mb': memory.max,
+            'memory_size_mb': self.memory_size,
+            'invocations': duration.count,
+            'cold_starts': init.count,
+            'avg_init_ms': init.mean,
+        }
+
+    def __getitem__(self, key: str):
+        return self.summary()[key]
+
+    def __iter__(self):
+        return iter(self.summary())
+
+    def __len__(self) -> int:
+        return len(self.summary())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {'memory_size_mb': self.memory_size,
+                'sketches': {metric: sketch.to_dict() for metric, sketch in self.sketches.items()}}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'FunctionReportStats':
+        stats = cls()
+        stats.sketches = {metric: QuantileSketch.from_dict(sketch) for metric, sketch in data['sketches'].items()}
+        stats.memory_size = data.get('memory_size_mb')
+        return stats
+
+
+def function_for_log_group(log_group: Optional[str], function_ids: Optional[list[str]] = None,
+                           service_name: Optional[str] = None, stage: Optional[str] = None) -> Optional[str]:
+    """
+    Function ID of a Lambda log group name ('<service>-<stage>-<function>').
+    With `function_ids`, the longest ID the name ends with ('-<id>'), as the
+    live query matches them; otherwise the name minus the service/stage prefix.
+    """
+    if not log_group:
+        return None
+    prefix = f"{service_name}-{stage}-" if service_name and stage else None
+    if function_ids is not None:
+        candidates = [fid for fid in function_ids
+                      if (log_group == prefix + fid if prefix else log_group == fid or log_group.endswith(f"-{fid}"))]
+        return max(candidates, key=len, default=None)
+    if prefix:
+        return log_group[len(prefix):] if log_group.startswith(prefix) else None
+    return log_group
+
+
+def log_files(paths: Iterable[str]) -> list[str]:
+    """The given files plus every file under the given directories, in a stable order."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names)
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+# Exports are often stored under a prefix named after the log group
+_PATH_GROUP_RE = re.compile(r'aws/lambda/([\w.-]+)')
+
+
+def ingest_file(path: str, function_ids: Optional[list[str]] = None, service_name: Optional[str] = None,
+                stage: Optional[str] = None, log_group: Optional[str] = None,
+                relative_accuracy: float = 0.01) -> tuple[dict[str, FunctionReportStats], int]:
+    """
+    Folds one exported log file into per-function stats. Returns them with the
+    number of REPORT records that could not be attributed to a function.
+    """
+    if log_group is None:
+        match = _PATH_GROUP_RE.search(path.replace(os.sep, '/'))
+        log_group = match.group(1) if match else None
+    stats, unattributed, resolved = {}, 0, {}
+    for group, duration, billed, size, used, init in scan_reports(read_chunks(path), log_group):
+        if group not in resolved:
+            resolved[group] = function_for_log_group(group, function_ids, service_name, stage)
+        fid = resolved[group]
+        if fid is None:
+            unattributed += 1
+            continue
+        if fid not in stats:
+            stats[fid] = FunctionReportStats(relative_accuracy)
+        stats[fid].add(duration, billed, size, used, init)
+    return stats, unattributed
+
+
+def merge_stats(into: dict[str, FunctionReportStats], other: dict[str, FunctionReportStats]):
+    for fid, stats in other.items():
+        if fid in into:
+            into[fid].merge(stats)
+        else:
+            into[fid] = stats
+
+
+def ingest_report_logs(paths: Iterable[str], function_ids: Optional[list[str]] = None,
+                       service_name: Optional[str] = None, stage: Optional[str] = None,
+                       log_group: Optional[str] = None, relative_accuracy: float = 0.01) -> dict[str, FunctionReportStats]:
+    """
+    Streams every file under `paths` (plain or gzipped text/JSON exports) and
+    returns {function_id: FunctionReportStats}, ready for enrich_with_live_data.
+    """
+    merged, unattributed = {}, 0
+    for path in log_files(paths):
+        stats, skipped = ingest_file(path, function_ids, service_name, stage, log_group, relative_accuracy)
+        merge_stats(merged, stats)
+        unattributed += skipped
+    if unattributed:
+        print(f"WARNING: {unattributed} REPORT records could not be attributed to a function.")
+    return merged
@@ -2,5 +2,6 @@
 
 from .structures import LambdaFunction, CompositeFunction
 from .builder import Application
+from .index import ApplicationIndex
 
-__all__ = ["Application","LambdaFunction", "CompositeFunction"]
\ No newline at end of file
+__all__ = ["Application","LambdaFunction", "CompositeFunction", "ApplicationIndex"]
\ No newline at end of file
@@ -1,6 +1,7 @@
 import yaml
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional
 from .structures import Application, LambdaFunction
+from .references import resolve_file_references
 
 class ApplicationBuilder:
     """
@@ -9,22 +10,45 @@ class ApplicationBuilder:
     """
     
     @staticmethod
-    def create_from_yaml_content(repo_name: str, yaml_content: str) -> Application:
-        """
-        Parses a real serverless.yml content string to build a base Application object.
-        It uses standard Serverless Framework keys and expects a custom block for topology.
-        """
+    def load_spec(yaml_content: str) -> Dict[str, Any]:
+        """Parses serverless.yml content into a dictionary, raising ValueError if it is not one."""
         try:
             spec = yaml.safe_load(yaml_content)
             if not isinstance(spec, dict):
                 raise ValueError("YAML content does not represent a valid object (dictionary).")
         except yaml.YAMLError as e:
             raise ValueError(f"Invalid YAML content: {e}")
+        return spec
 
+    @staticmethod
+    def create_from_yaml_content(repo_name: str, yaml_content: str,
+                                 file_loader: Optional[Callable[[set], Dict[str, str]]] = None) -> Application:
+        """
+        Parses a real serverless.yml content string to build a base Application object.
+        It uses standard Serverless Framework keys and expects a custom block for topology.
+        With a `file_loader` (paths -> {path: text}), ${file(...)} references are
+        resolved first; see references.resolve_file_references.
+        """
+        spec = ApplicationBuilder.load_spec(yaml_content)
+        if file_loader is not None:
+            spec = resolve_file_references(spec, file_loader)
+        return ApplicationBuilder.create_from_spec(repo_name, spec)
+
+    @staticmethod
+    def create_from_spec(repo_name: str, spec: Dict[str, Any]) -> Application:
+        """Builds the base Application object from a parsed (and reference-resolved) serverless.yml."""
         # Extract major sections from the YAML spec, providing empty dicts as defaults
         functions_spec = spec.get('functions', {})
         provider_spec = spec.get('provider', {})
         custom_spec = spec.get('custom', {})
+
+        if isinstance(functions_spec, list):
+            # `functions` may be a list of mappings, typically one ${file(...)} per entry
+            merged = {}
+            for entry in functions_spec:
+                if isinstance(entry, dict):
+                    merged.update(entry)
+            functions_spec = merged
         
         if not functions_spec:
             raise ValueError("No 'functions' block found in the serverless.yml file.")
@@ -77,6 +101,50 @@ class ApplicationBuilder:
             network_hop_delay=constraints.get('networkHopMS', 20) # A more realistic default
         )
 
+    @staticmethod
+    def inputs_of(app: Application) -> Dict[str, Any]:
+        """
+        Snapshots everything the algorithms read from an Application. Per-function
+        values are arrays aligned with app.functions; `parent` holds the index of
+        the parent function (-1 for the root) and `edge_bytes` the bytes received
+        from it.
+        """
+        position = {f.id: i for i, f in enumerate(app.functions)}
+        return {
+            'max_memory': app.max_memory,
+            'max_latency': app.max_latency,
+            'network_hop_delay': app.network_hop_delay,
+            'critical_path_ids': list(app.critical_path_ids),
+            'memory': [f.memory for f in app.functions],
+            'baseline_runtime': [f.baseline_runtime for f in app.functions],
+            'load_factor': [f.load_factor for f in app.functions],
+            'parent': [position[f.parent.id] if f.parent else -1 for f in app.functions],
+            'edge_bytes': [f.parent.data_out_edges.get(f.id, 0) if f.parent else 0 for f in app.functions],
+        }
+
+    @staticmethod
+    def create_from_inputs(name: str, function_ids: List[str], inputs: Dict[str, Any]) -> Application:
+        """
+        Rebuilds an Application from a snapshot of its inputs (see
+        inputs_of): per-function arrays aligned with `function_ids`, with
+        `parent` as an index (-1 for the root).
+        """
+        functions = [
+            LambdaFunction(id=fid, name=fid, memory=memory, baseline_runtime=baseline, load_factor=load)
+            for fid, memory, baseline, load in zip(function_ids, inputs['memory'], inputs['baseline_runtime'], inputs['load_factor'])
+        ]
+        for child, (parent_idx, edge_bytes) in enumerate(zip(inputs['parent'], inputs['edge_bytes'])):
+            if parent_idx >= 0:
+                functions[parent_idx].add_child(functions[child], edge_bytes)
+        return Application(
+            name=name,
+            functions=functions,
+            critical_path_ids=list(inputs['critical_path_ids']),
+            max_memory=inputs['max_memory'],
+            max_latency=inputs['max_latency'],
+            network_hop_delay=inputs['network_hop_delay'],
+        )
+
     @staticmethod
     def enrich_with_live_data(app: Application, live_metrics: Dict[str, Any]) -> Application:
         """
@@ -84,8 +152,8 @@ class ApplicationBuilder:
         It matches functions by their ID (e.g., 'orderPlaced') and updates their
         runtime and memory properties with the measured averages.
         """
-        # Create a map of function IDs to LambdaFunction objects for efficient lookup
-        func_id_map = {func.id: func for func in app.functions}
+        # Reuse the application's cached ID -> LambdaFunction index for lookups
+        func_id_map = app.functions_map
 
         for func_id_from_aws, metrics in live_metrics.items():
             # Find the corresponding function in our application model
@@ -0,0 +1,80 @@
+# Precomputed structure of an Application, shared by the algorithms and calculate_metrics
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .structures import Application, LambdaFunction
+
+
+class ApplicationIndex:
+    """
+    The structure every algorithm needs, computed once per Application (see
+    Application.index). Functions are numbered in BFS order from all
+    parentless functions at once (the root first), so parents come before
+    children; per-function lists are aligned with `order`:
+
+    - parent: the parent's position, -1 for roots
+    - edge_cost: transfer cost of the edge from the parent, 0.0 for roots
+    - subtree_memory: memory of the function and all its descendants
+    - enter / exit: Euler-tour interval; see in_subtree
+
+    `critical` holds the critical-path functions, `critical_positions` their
+    positions in `order` and `chain_position` each one's index on the path;
+    `critical_edges` are the path's (parent ID, child ID) pairs.
+    """
+    __slots__ = ('epoch', 'critical_path_ids', 'order', 'position', 'parent', 'edge_cost', 'subtree_memory',
+                 'enter', 'exit', 'critical', 'critical_positions', 'chain_position', 'critical_edges',
+                 'critical_runtime')
+
+    def __init__(self, app: 'Application', epoch: int):
+        self.epoch = epoch
+        self.critical_path_ids = app.critical_path_ids
+
+        roots = [app.root_function] + [f for f in app.functions if f.parent is None and f is not app.root_function]
+        order, head = list(roots), 0
+        while head < len(order):
+            order.extend(order[head].children); head += 1
+        position = {f.id: i for i, f in enumerate(order)}
+        parent = [position[f.parent.id] if f.parent is not None else -1 for f in order]
+        edge_cost = [f.parent.get_data_transfer_cost(f.id) if f.parent is not None else 0.0 for f in order]
+
+        subtree_memory = [f.memory for f in order]
+        for v in range(len(order) - 1, len(roots) - 1, -1):
+            subtree_memory[parent[v]] += subtree_memory[v]
+
+        enter, exit_, clock = [0] * len(order), [0] * len(order), 0
+        for root in roots:
+            stack = [(position[root.id], False)]
+            while stack:
+                v, done = stack.pop()
+                if done:
+                    exit_[v] = clock
+                    continue
+                enter[v] = clock
+                clock += 1
+                stack.append((v, True))
+                stack.extend((position[c.id], False) for c in reversed(order[v].children))
+
+        critical = [order[position[fid]] for fid in app.critical_path_ids if fid in position]
+        self.order = order
+        self.position = position
+        self.parent = parent
+        self.edge_cost = edge_cost
+        self.subtree_memory = subtree_memory
+        self.enter = enter
+        self.exit = exit_
+        self.critical = critical
+        self.critical_positions = [position[f.id] for f in critical]
+        self.chain_position = {f.id: i for i, f in enumerate(critical)}
+        self.critical_edges = frozenset((u.id, v.id) for u, v in zip(critical, critical[1:]))
+        self.critical_runtime = sum(f.runtime for f in critical)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def transfer_cost(self, child: 'LambdaFunction') -> float:
+        """Transfer cost of the edge into `child` from its parent."""
+        return self.edge_cost[self.position[child.id]]
+
+    def in_subtree(self, ancestor: int, node: int) -> bool:
+        """Whether position `node` is in the subtree of position `ancestor` (itself included)."""
+        return self.enter[ancestor] <= self.enter[node] < self.exit[ancestor]
@@ -0,0 +1,142 @@
+import posixpath
+import re
+from typing import Any, Callable, Iterable, Iterator, Optional
+import yaml
+
+# ${file(./path.yml)} or ${file(./path.yml):some.key}, optionally with a quoted path
+FILE_REFERENCE_RE = re.compile(r"\$\{file\(\s*['\"]?([^)'\"]+?)['\"]?\s*\)(?::\s*([\w.\-]+))?\s*\}")
+
+# Only data files can be inlined; ${file(./handler.js):fn} would need a JS runtime.
+DATA_FILE_EXTENSIONS = ('.yml', '.yaml', '.json')
+
+# Referenced files may reference further files, up to this many levels deep.
+MAX_REFERENCE_DEPTH = 10
+
+_MISSING = object()
+
+
+def reference_path(raw: str) -> Optional[str]:
+    """
+    Repository path of a ${file(...)} argument, relative to the service
+    directory like the Serverless Framework resolves it, or None when it cannot
+    be fetched (nested variables, non-data files, paths outside the repository).
+    """
+    if '${' in raw or not raw.lower().endswith(DATA_FILE_EXTENSIONS):
+        return None
+    path = posixpath.normpath(raw)
+    if path.startswith(('../', '/')) or path == '..':
+        return None
+    return path
+
+
+def _strings(node: Any) -> Iterator[str]:
+    if isinstance(node, str):
+        yield node
+    elif isinstance(node, dict):
+        for value in node.values():
+            yield from _strings(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _strings(value)
+
+
+def file_references(node: Any) -> set[str]:
+    """Paths of every fetchable ${file(...)} reference in a parsed YAML node."""
+    paths = set()
+    for text in _strings(node):
+        for match in FILE_REFERENCE_RE.finditer(text):
+            path = reference_path(match.group(1))
+            if path:
+                paths.add(path)
+    return paths
+
+
+class FileReferenceResolver:
+    """
+    Resolves ${file(...)} references of a parsed serverless.yml in rounds, so
+    every file needed at one nesting level can be fetched together:
+
+        resolver = FileReferenceResolver(spec)
+        while pending := resolver.pending():
+            resolver.add(pending, fetch_all(pending))
+        spec = resolver.resolve()
+
+    References that cannot be resolved (missing files, non-data files,
+    nested variables) are left as they are.
+    """
+
+    def __init__(self, spec: dict):
+        self.spec = spec
+        self.files: dict[str, Any] = {}
+        self.missing: set[str] = set()
+        self.rounds = 0
+
+    def pending(self) -> set[str]:
+        """Paths referenced by the spec or a loaded file that have not been requested yet."""
+        if self.rounds >= MAX_REFERENCE_DEPTH:
+            return set()
+        paths = file_references(self.spec)
+        for content in self.files.values():
+            paths |= file_references(content)
+        return paths - self.files.keys() - self.missing
+
+    def add(self, requested: Iterable[str], texts: dict[str, str]):
+        """Records the texts fetched for `requested`; paths absent from `texts` count as missing."""
+        self.rounds += 1
+        for path in requested:
+            if path not in texts:
+                print(f"WARNING: Referenced file {path} not found; leaving the reference unresolved.")
+                self.missing.add(path)
+                continue
+            try:
+                self.files[path] = yaml.safe_load(texts[path])
+            except yaml.YAMLError as e:
+                raise ValueError(f"Invalid YAML in referenced file {path}: {e}")
+
+    def _lookup(self, match: re.Match, chain: tuple) -> Any:
+        path = reference_path(match.group(1))
+        if path is None or path not in self.files or path in chain:
+            # Unknown, missing, or a file that (indirectly) references itself
+            return _MISSING
+        value = self.files[path]
+        for key in (match.group(2) or '').split('.'):
+            if not key:
+                continue
+            if not isinstance(value, dict) or key not in value:
+                return _MISSING
+            value = value[key]
+        return self._substitute(value, chain + (path,))
+
+    def _substitute(self, node: Any, chain: tuple) -> Any:
+        if isinstance(node, dict):
+            return {key: self._substitute(value, chain) for key, value in node.items()}
+        if isinstance(node, list):
+            return [self._substitute(value, chain) for value in node]
+        if not isinstance(node, str) or '${file(' not in node:
+            return node
+
+        whole = FILE_REFERENCE_RE.fullmatch(node.strip())
+        if whole:
+            # The value is the referenced content itself (possibly a mapping or list).
+            value = self._lookup(whole, chain)
+            return node if value is _MISSING else value
+
+        def interpolate(match):
+            value = self._lookup(match, chain)
+            return match.group(0) if value is _MISSING or isinstance(value, (dict, list)) else str(value)
+        return FILE_REFERENCE_RE.sub(interpolate, node)
+
+    def resolve(self) -> dict:
+        return self._substitute(self.spec, ())
+
+
+def resolve_file_references(spec: dict, load_files: Callable[[set[str]], dict[str, str]]) -> dict:
+    """
+    Replaces the ${file(...)} references in `spec` with the referenced content.
+    `load_files` receives the set of paths needed in one round and returns
+    {path: text} for the ones that exist.
+    """
+    resolver = FileReferenceResolver(spec)
+    while pending := resolver.pending():
+        resolver.add(pending, load_files(pending))
+    return resolver.resolve()
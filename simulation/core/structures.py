@@ -1,23 +1,86 @@
 # Will contain LambdaFunction, CompositeFunction, Application classes
+import itertools
 from dataclasses import dataclass, field
+from functools import cached_property
 from typing import Optional
 
-@dataclass
+from .index import ApplicationIndex
+
+# Every change to a function's memory or runtime inputs takes a fresh value from
+# this counter for its MetricsEpoch. Cached aggregates remember the value they
+# were computed at and recompute when it moves, so a staleness check is O(1)
+# instead of O(members).
+_epoch_counter = itertools.count(1)
+
+
+class MetricsEpoch:
+    """
+    The version of the memory and runtime inputs of a set of functions: one
+    per standalone function, shared by all functions of an Application, so a
+    change only invalidates what was computed from that application.
+    """
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def bump(self):
+        self.value = next(_epoch_counter)
+
+
 class LambdaFunction:
     """Represents a serverless function with its properties, now including load."""
-    id: str
-    name: str
-    memory: int
-    baseline_runtime: int
-    load_factor: float = 1.0
-    data_out_edges: dict[str, int] = field(default_factory=dict)
-    parent: Optional['LambdaFunction'] = None
-    children: list['LambdaFunction'] = field(default_factory=list)
+    __slots__ = ('id', 'name', '_memory', '_baseline_runtime', '_load_factor', '_runtime',
+                 'data_out_edges', 'parent', 'children', 'epoch')
+
+    def __init__(self, id: str, name: str, memory: int, baseline_runtime: int,
+                 load_factor: float = 1.0, data_out_edges: Optional[dict[str, int]] = None,
+                 parent: Optional['LambdaFunction'] = None,
+                 children: Optional[list['LambdaFunction']] = None):
+        self.id = id
+        self.name = name
+        self._memory = memory
+        self._baseline_runtime = baseline_runtime
+        self._load_factor = load_factor
+        self._runtime = int(baseline_runtime * load_factor)
+        self.data_out_edges = data_out_edges if data_out_edges is not None else {}
+        self.parent = parent
+        self.children = children if children is not None else []
+        self.epoch = MetricsEpoch()
+
+    @property
+    def memory(self) -> int:
+        return self._memory
+
+    @memory.setter
+    def memory(self, value: int):
+        self._memory = value
+        self.epoch.bump()
+
+    @property
+    def baseline_runtime(self) -> int:
+        return self._baseline_runtime
+
+    @baseline_runtime.setter
+    def baseline_runtime(self, value: int):
+        self._baseline_runtime = value
+        self._runtime = int(value * self._load_factor)
+        self.epoch.bump()
+
+    @property
+    def load_factor(self) -> float:
+        return self._load_factor
+
+    @load_factor.setter
+    def load_factor(self, value: float):
+        self._load_factor = value
+        self._runtime = int(self._baseline_runtime * value)
+        self.epoch.bump()
 
     @property
     def runtime(self) -> int:
         """The actual runtime, adjusted for the current load factor."""
-        return int(self.baseline_runtime * self.load_factor)
+        return self._runtime
 
     def add_child(self, child: 'LambdaFunction', data_bytes: int = 0):
         self.children.append(child)
@@ -31,7 +94,7 @@ class LambdaFunction:
 
     def get_execution_cost(self) -> float:
         """Execution cost is now based on the load-adjusted runtime."""
-        gb_seconds = (self.memory / 1024) * (self.runtime / 1000)
+        gb_seconds = (self._memory / 1024) * (self._runtime / 1000)
         return 0.00001667 * gb_seconds
 
     def __hash__(self):
@@ -43,13 +106,32 @@ class LambdaFunction:
     def __repr__(self):
         return f"LambdaFunction(id='{self.id}')"
 
-@dataclass
+
 class CompositeFunction:
     """
     Represents a fused group of functions, treated as a single deployable unit.
     The internal sequence of member functions is preserved.
+    Memory and runtime totals are computed once and refreshed only after a
+    member's memory, baseline_runtime or load_factor has been changed.
     """
-    member_functions: list[LambdaFunction]
+    __slots__ = ('member_functions', '_memory', '_runtime', '_epochs', '_seen')
+
+    def __init__(self, member_functions: list[LambdaFunction]):
+        self.member_functions = member_functions
+        # Members of one application share an epoch, so this is almost always a single one
+        self._epochs = tuple({id(f.epoch): f.epoch for f in member_functions}.values())
+        self._refresh()
+
+    def _refresh(self):
+        self._memory = sum(f.memory for f in self.member_functions)
+        self._runtime = sum(f.runtime for f in self.member_functions)
+        self._seen = tuple(epoch.value for epoch in self._epochs)
+
+    def _stale(self) -> bool:
+        epochs, seen = self._epochs, self._seen
+        if len(epochs) == 1:
+            return epochs[0].value != seen[0]
+        return any(epoch.value != value for epoch, value in zip(epochs, seen))
 
     @property
     def id(self) -> str:
@@ -58,21 +140,36 @@ class CompositeFunction:
     @property
     def memory(self) -> int:
         """Total memory is the sum of memories of all member functions."""
-        return sum(f.memory for f in self.member_functions)
+        if self._stale():
+            self._refresh()
+        return self._memory
 
     @property
     def runtime(self) -> int:
         """Total runtime is the sum of runtimes of all members, executed sequentially."""
-        return sum(f.runtime for f in self.member_functions)
+        if self._stale():
+            self._refresh()
+        return self._runtime
 
     def get_execution_cost(self) -> float:
         """
         Calculates the cost for a SINGLE invocation of this composite function,
         billed for its total runtime and total memory.
         """
-        gb_seconds = (self.memory / 1024) * (self.runtime / 1000)
+        if self._stale():
+            self._refresh()
+        gb_seconds = (self._memory / 1024) * (self._runtime / 1000)
         return 0.00001667 * gb_seconds
 
+    def __eq__(self, other):
+        return isinstance(other, CompositeFunction) and self.member_functions == other.member_functions
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"CompositeFunction(member_functions={self.member_functions!r})"
+
+
 @dataclass
 class Application:
     """Encapsulates a serverless application's structure and constraints."""
@@ -82,16 +179,51 @@ class Application:
     max_memory: int
     max_latency: int
     network_hop_delay: int = 10
+    metrics_epoch: MetricsEpoch = field(init=False, repr=False, compare=False)
 
-    @property
+    def __post_init__(self):
+        self._adopt_functions()
+
+    def _adopt_functions(self):
+        """
+        Puts all functions on one MetricsEpoch, kept if they already share one
+        (e.g. another Application over the same functions), so the index only
+        follows changes to this application's functions.
+        """
+        epochs = {id(f.epoch): f.epoch for f in self.functions}
+        self.metrics_epoch = next(iter(epochs.values())) if len(epochs) == 1 else MetricsEpoch()
+        for f in self.functions:
+            f.epoch = self.metrics_epoch
+
+    @cached_property
     def functions_map(self) -> dict[str, LambdaFunction]:
         return {f.id: f for f in self.functions}
 
-    @property
+    @cached_property
     def root_function(self) -> LambdaFunction:
         return next(f for f in self.functions if f.parent is None)
 
+    @property
+    def index(self) -> ApplicationIndex:
+        """
+        The shared ApplicationIndex. Rebuilt on access after a function's
+        memory or runtime inputs changed or critical_path_ids was replaced;
+        edge changes need invalidate_indexes.
+        """
+        index = self.__dict__.get('_index')
+        epoch = self.metrics_epoch.value
+        if index is None or index.epoch != epoch or index.critical_path_ids is not self.critical_path_ids:
+            index = self.__dict__['_index'] = ApplicationIndex(self, epoch)
+        return index
+
+    def invalidate_indexes(self):
+        """Drops the cached lookups; call after adding/removing functions or edges."""
+        self._adopt_functions()
+        self.__dict__.pop('functions_map', None)
+        self.__dict__.pop('root_function', None)
+        self.__dict__.pop('_index', None)
+
     @property
     def critical_path_functions(self) -> list[LambdaFunction]:
-        func_map = self.functions_map
-        return [func_map[fid] for fid in self.critical_path_ids if fid in func_map]
\ No newline at end of file
+        """The critical path as functions; shared with the index, so not to be modified."""
+        return self.index.critical
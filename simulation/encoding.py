@@ -0,0 +1,124 @@
+# Response encodings for simulation results
+import gzip
+import json
+import math
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Optional: only gzip is offered without it
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; the headers would eat the gain.
+MIN_COMPRESS_BYTES = 1024
+
+
+def _group_ids(group) -> list[str]:
+    return [getattr(func, 'id', func) for func in group]
+
+
+def group_labels(groups: list, position: dict[str, int]) -> list[int]:
+    """
+    Encodes a plan as an integer array aligned with a function-ID table: entry i
+    is the index of the group holding function i, or -1 if it is unassigned.
+    An empty plan encodes as an empty array.
+    """
+    if not groups:
+        return []
+    labels = [-1] * len(position)
+    for group_idx, group in enumerate(groups):
+        for fid in _group_ids(group):
+            labels[position[fid]] = group_idx
+    return labels
+
+
+def decode_group_labels(labels: list[int], function_ids: list[str]) -> list[list[str]]:
+    """Inverse of group_labels: returns the plan as nested lists of function IDs."""
+    groups = {}
+    for fid, label in zip(function_ids, labels):
+        if label >= 0:
+            groups.setdefault(label, []).append(fid)
+    return [groups[label] for label in sorted(groups)]
+
+
+def encode_results(results: list[dict]) -> list[dict]:
+    """Default format: each result's groups become nested lists of function IDs."""
+    for result in results:
+        if 'groups' in result and result.get('groups'):
+            result['groups'] = [_group_ids(group) for group in result['groups']]
+    return results
+
+
+def encode_results_compact(results: list[dict], function_ids: Optional[list[str]] = None) -> dict:
+    """
+    Compact format: one shared function-ID table plus, per result, an integer
+    array where entry i is the group index of function_ids[i] (-1 if unassigned).
+    Algorithms with no plan get an empty array.
+    """
+    if function_ids is None:
+        # Fall back to order of first appearance across all plans.
+        seen = {}
+        for result in results:
+            for group in result.get('groups') or []:
+                for fid in _group_ids(group):
+                    seen.setdefault(fid, None)
+        function_ids = list(seen)
+    position = {fid: i for i, fid in enumerate(function_ids)}
+
+    encoded = []
+    for result in results:
+        entry = {key: value for key, value in result.items() if key != 'groups'}
+        entry['groups'] = group_labels(result.get('groups') or [], position)
+        encoded.append(entry)
+
+    return {'functions': function_ids, 'results': encoded}
+
+
+def _finite_or_none(value: Any) -> Any:
+    """Mirrors orjson, which writes non-finite floats as null."""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {k: _finite_or_none(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite_or_none(v) for v in value]
+    return value
+
+
+def dumps(data: Any) -> bytes:
+    """Serializes to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(_finite_or_none(data), separators=(',', ':')).encode('utf-8')
+
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    accepted = set()
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        params = params.replace(' ', '')
+        if not name or params in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name)
+    return accepted
+
+
+def compress(body: bytes, accept_encoding: str) -> tuple[bytes, Optional[str]]:
+    """
+    Negotiates a Content-Encoding from the Accept-Encoding header.
+    Prefers brotli (when installed), then gzip; returns (body, None) otherwise.
+    """
+    if len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+    accepted = _accepted_encodings(accept_encoding or '')
+    if brotli is not None and 'br' in accepted:
+        return brotli.compress(body, quality=5), 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return gzip.compress(body, compresslevel=6), 'gzip'
+    return body, None
@@ -0,0 +1,193 @@
+# Discrete-event simulation of a fusion plan serving a stream of requests
+import heapq
+import math
+import random
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from .algorithms.metrics import calculate_metrics
+from .core.structures import Application
+
+# $ per GB-second, as in LambdaFunction/CompositeFunction.get_execution_cost
+GB_SECOND_PRICE = 0.00001667
+
+# Event kinds; at equal times completions go first, so a freed slot is reused immediately.
+_DONE, _CALL = 0, 1
+
+
+@dataclass(frozen=True)
+class _Entry:
+    """
+    What one invocation of a group does when called at `function`: the members
+    reachable from it over fused edges run back to back in the container (DFS
+    order), taking `duration` ms, and `calls` holds (offset ms, entry index)
+    for every call made to another group, at the calling member's end offset.
+    `cost` is the container's execution cost plus the transfer cost of its calls.
+    """
+    function: str
+    duration: float
+    calls: tuple[tuple[float, int], ...]
+    functions: int
+    cost: float
+
+
+def _compile(app: Application, groups: list[list]) -> tuple[list[_Entry], list[int]]:
+    """Per-entry schedules of the plan and the indices of the roots' entries (one per parentless function)."""
+    func_map = app.functions_map
+    group_of, group_memory = {}, []
+    for idx, group in enumerate(groups):
+        members = [func_map[m] if isinstance(m, str) else m for m in group]
+        group_memory.append(sum(f.memory for f in members))
+        for f in members:
+            group_of[f.id] = idx
+    if len(group_of) != len(app.functions):
+        raise ValueError("The plan must place every function of the application in a group.")
+
+    # A group is entered at every root and wherever a call crosses from another group.
+    entry_ids = [f.id for f in app.functions if f.parent is None or group_of[f.parent.id] != group_of[f.id]]
+    index = {fid: i for i, fid in enumerate(entry_ids)}
+    entries = []
+    for fid in entry_ids:
+        group = group_of[fid]
+        elapsed, calls, count, transfer = 0.0, [], 0, 0.0
+        stack = [func_map[fid]]
+        while stack:
+            func = stack.pop()
+            elapsed += func.runtime
+            count += 1
+            fused = []
+            for child in func.children:
+                if group_of[child.id] == group:
+                    fused.append(child)
+                else:
+                    calls.append((elapsed, index[child.id]))
+                    transfer += func.get_data_transfer_cost(child.id)
+            stack.extend(reversed(fused))
+        cost = GB_SECOND_PRICE * (group_memory[group] / 1024) * (elapsed / 1000) + transfer
+        entries.append(_Entry(fid, elapsed, tuple(calls), count, cost))
+    return entries, [index[f.id] for f in app.functions if f.parent is None]
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def simulate_execution(app: Application, groups: list[list], arrival_rate: float, requests: int = 10000,
+                       concurrency: Optional[int] = 1000, runtime_jitter: float = 0.0,
+                       arrivals: str = 'poisson', seed: int = 0) -> dict[str, Any]:
+    """
+    Serves `requests` requests arriving at `arrival_rate` per second
+    ('poisson' or evenly spaced 'uniform' arrivals) with the plan `groups`
+    (LambdaFunctions or IDs) and reports end-to-end latency and throughput.
+
+    Unlike calculate_metrics, calls to other groups run in parallel (each
+    after network_hop_delay, as a container of its own) while fused members
+    run one after another in their container, and at most `concurrency`
+    containers run at once account-wide (None: unlimited); calls beyond that
+    wait in FIFO order, like throttled asynchronous invocations. Every
+    parentless function is an entry point, invoked on each arrival. With
+    `runtime_jitter` > 0, each container's runtime is scaled by a lognormal
+    factor with mean 1 and that coefficient of variation.
+
+    A request's latency runs from its arrival until its last container ends.
+    Latencies are in ms, throughput in completed requests per second; the
+    cost per request is at nominal runtimes and comparable to calculate_metrics.
+    """
+    if arrival_rate <= 0 or requests <= 0:
+        raise ValueError("arrival_rate and requests must be positive.")
+    if arrivals not in ('poisson', 'uniform'):
+        raise ValueError("arrivals must be 'poisson' or 'uniform'.")
+    if concurrency is not None and concurrency < 1:
+        raise ValueError("concurrency must be at least 1, or None for unlimited.")
+    entries, roots = _compile(app, groups)
+    durations = [e.duration for e in entries]
+    calls = [e.calls for e in entries]
+    hop = app.network_hop_delay
+    rng = random.Random(seed)
+    sigma = math.sqrt(math.log1p(runtime_jitter ** 2)) if runtime_jitter > 0 else 0.0
+    mean_gap = 1000.0 / arrival_rate
+    capacity = concurrency if concurrency is not None else math.inf
+
+    started_at, pending, finished_at = [0.0] * requests, [0] * requests, [0.0] * requests
+    heap, waiting = [], deque()
+    seq, running, peak, containers, throttled, total_wait = 0, 0, 0, 0, 0, 0.0
+    push, pop = heapq.heappush, heapq.heappop
+
+    def start(now: float, request: int, entry: int):
+        nonlocal seq, running, peak, containers
+        scale = rng.lognormvariate(-sigma * sigma / 2, sigma) if sigma else 1.0
+        running += 1
+        containers += 1
+        if running > peak:
+            peak = running
+        seq += 1
+        push(heap, (now + durations[entry] * scale, _DONE, seq, request, entry))
+        for offset, callee in calls[entry]:
+            pending[request] += 1
+            seq += 1
+            push(heap, (now + offset * scale + hop, _CALL, seq, request, callee))
+
+    def call(now: float, request: int, entry: int):
+        nonlocal throttled
+        if running < capacity:
+            start(now, request, entry)
+        else:
+            throttled += 1
+            waiting.append((now, request, entry))
+
+    next_request, next_arrival, now = 0, 0.0, 0.0
+    while next_request < requests or heap:
+        if next_request < requests and (not heap or next_arrival < heap[0][0]):
+            now, request = next_arrival, next_request
+            started_at[request] = now
+            pending[request] = len(roots)
+            next_request += 1
+            next_arrival += rng.expovariate(1.0 / mean_gap) if arrivals == 'poisson' else mean_gap
+            for entry in roots:
+                call(now, request, entry)
+            continue
+
+        now, kind, _, request, entry = pop(heap)
+        if kind == _CALL:
+            call(now, request, entry)
+            continue
+
+        running -= 1
+        pending[request] -= 1
+        if pending[request] == 0:
+            finished_at[request] = now
+        if waiting:
+            called_at, waiting_request, waiting_entry = waiting.popleft()
+            total_wait += now - called_at
+            start(now, waiting_request, waiting_entry)
+
+    latencies = sorted(end - begin for begin, end in zip(started_at, finished_at))
+    span = max(finished_at) - started_at[0]
+    invocations = [0] * len(entries)
+    # Every request makes the same calls; count them once from the roots.
+    stack = list(roots)
+    while stack:
+        entry = stack.pop()
+        invocations[entry] += 1
+        stack.extend(callee for _, callee in calls[entry])
+    return {
+        'requests': requests,
+        'containers': containers,
+        'function_invocations': requests * sum(n * entries[i].functions for i, n in enumerate(invocations)),
+        'simulated_seconds': span / 1000,
+        'throughput': requests / (span / 1000) if span > 0 else math.inf,
+        'latency': {
+            'mean': sum(latencies) / len(latencies),
+            'p50': _percentile(latencies, 0.50),
+            'p90': _percentile(latencies, 0.90),
+            'p99': _percentile(latencies, 0.99),
+            'max': latencies[-1],
+        },
+        'static_latency': calculate_metrics([[app.functions_map[m] if isinstance(m, str) else m for m in g]
+                                             for g in groups], app)['latency'],
+        'cost_per_request': sum(n * entries[i].cost for i, n in enumerate(invocations)),
+        'peak_concurrency': peak,
+        'throttled': throttled,
+        'mean_throttle_wait': total_wait / throttled if throttled else 0.0,
+    }
@@ -0,0 +1,223 @@
+# Persistence and comparison of simulation runs
+import hashlib
+import json
+import math
+import os
+from pathlib import Path
+from typing import Any, Optional
+from django.db import transaction
+
+from .core.builder import ApplicationBuilder
+from .core.structures import Application
+from .encoding import group_labels, decode_group_labels
+from .models import SimulationRun, AlgorithmResult
+
+
+def application_inputs(app: Application) -> dict[str, Any]:
+    """The inputs snapshot stored with a run; see ApplicationBuilder.inputs_of."""
+    return ApplicationBuilder.inputs_of(app)
+
+
+def application_from_run(run: SimulationRun) -> Application:
+    """Rebuilds the Application a stored run was solved for from its inputs snapshot."""
+    return ApplicationBuilder.create_from_inputs(run.repo_name, run.function_ids, run.inputs)
+
+
+def application_hash(function_ids: list[str], inputs: dict[str, Any]) -> str:
+    """Stable SHA-256 over the function table and inputs snapshot."""
+    canonical = json.dumps({'function_ids': function_ids, 'inputs': inputs}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def anonymized_snapshot(app: Application) -> dict[str, Any]:
+    """
+    The Application as {name, function_ids, inputs} with function IDs replaced
+    by f0..fN-1 and a name derived from the content hash. Topology, metrics and
+    constraints are kept; they are what the algorithms' runtime depends on.
+    ApplicationBuilder.create_from_inputs rebuilds it.
+    """
+    anonymous = {f.id: f"f{i}" for i, f in enumerate(app.functions)}
+    function_ids = list(anonymous.values())
+    inputs = application_inputs(app)
+    inputs['critical_path_ids'] = [anonymous[fid] for fid in inputs['critical_path_ids'] if fid in anonymous]
+    return {'name': f"replay-{application_hash(function_ids, inputs)[:16]}", 'function_ids': function_ids,
+            'inputs': inputs}
+
+
+def dump_application(app: Application, directory: str) -> Optional[str]:
+    """
+    Writes anonymized_snapshot(app) to `directory` as <name>.json, for offline
+    replay (simulation/benchmarks/bench_replay.py). Returns the path, or None
+    if it could not be written. Identical applications share a file.
+    """
+    snapshot = anonymized_snapshot(app)
+    path = os.path.join(directory, f"{snapshot['name']}.json")
+    try:
+        os.makedirs(directory, exist_ok=True)
+        Path(path).write_text(json.dumps(snapshot), encoding='utf-8')
+    except OSError as e:
+        print(f"WARNING: Could not dump application for replay: {e}")
+        return None
+    return path
+
+
+def _finite(value) -> Optional[float]:
+    if value is None:
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def record_run(user, repo_owner: str, repo_name: str, app: Application, results: list[dict]) -> SimulationRun:
+    """
+    Stores a run and all of its algorithm results: one INSERT for the run and
+    one bulk INSERT for the results. `results` may hold groups either as
+    LambdaFunction objects or as function IDs.
+    """
+    function_ids = [f.id for f in app.functions]
+    position = {fid: i for i, fid in enumerate(function_ids)}
+    inputs = application_inputs(app)
+
+    with transaction.atomic():
+        run = SimulationRun.objects.create(
+            user=user,
+            repo_owner=repo_owner,
+            repo_name=repo_name,
+            application_hash=application_hash(function_ids, inputs),
+            function_ids=function_ids,
+            inputs=inputs,
+        )
+        AlgorithmResult.objects.bulk_create([
+            AlgorithmResult(
+                run=run,
+                name=result.get('name', 'Unknown Algorithm'),
+                cost=_finite(result.get('cost')),
+                latency=_finite(result.get('latency')),
+                feasible=bool(result.get('feasible', False)),
+                runtime_ms=_finite(result.get('runtime')),
+                gap=_finite(result.get('gap')),
+                optimal=bool(result.get('optimal', False)),
+                group_labels=group_labels(result.get('groups') or [], position),
+                error=result.get('error') or '',
+                profile=result.get('profile'),
+            )
+            for result in results
+        ])
+    return run
+
+
+def reoptimization_inputs(run: SimulationRun, app: Application) -> Optional[dict[str, Any]]:
+    """
+    Builds the incremental_reoptimize arguments from a stored run: its cheapest
+    feasible plan plus the (memory, runtime) each function had back then.
+    Returns None when the run cannot seed an incremental pass, i.e. the
+    function table, topology or constraints changed, or it has no feasible plan.
+    """
+    current = application_inputs(app)
+    if run.function_ids != [f.id for f in app.functions]:
+        return None
+    for key in ('max_memory', 'max_latency', 'network_hop_delay', 'critical_path_ids', 'parent', 'edge_bytes'):
+        if run.inputs.get(key) != current[key]:
+            return None
+
+    feasible = [r for r in run.results.all() if r.feasible and r.cost is not None and r.group_labels]
+    if not feasible:
+        return None
+    best = min(feasible, key=lambda r: r.cost)
+
+    inputs = run.inputs
+    previous_metrics = {
+        fid: (memory, int(baseline * load))
+        for fid, memory, baseline, load in zip(run.function_ids, inputs['memory'], inputs['baseline_runtime'], inputs['load_factor'])
+    }
+    return {
+        'previous_plan': decode_group_labels(best.group_labels, run.function_ids),
+        'previous_metrics': previous_metrics,
+        'previous_cost': best.cost,
+        'previous_latency': best.latency,
+        'previous_optimal': best.optimal,
+    }
+
+
+def serialize_result(result: AlgorithmResult, include_groups: bool = False) -> dict[str, Any]:
+    data = {
+        'id': result.id,
+        'name': result.name,
+        'cost': result.cost,
+        'latency': result.latency,
+        'feasible': result.feasible,
+        'runtime': result.runtime_ms,
+        'gap': result.gap,
+        'optimal': result.optimal,
+        'error': result.error or None,
+    }
+    if result.profile:
+        data['profile'] = result.profile
+    if include_groups:
+        data['groups'] = result.group_labels
+    return data
+
+
+def serialize_run(run: SimulationRun, include_groups: bool = False) -> dict[str, Any]:
+    data = {
+        'id': run.id,
+        'owner': run.repo_owner,
+        'repoName': run.repo_name,
+        'applicationHash': run.application_hash,
+        'created': run.created.isoformat(),
+        'results': [serialize_result(r, include_groups) for r in run.results.all()],
+    }
+    if include_groups:
+        data['functions'] = run.function_ids
+    return data
+
+
+def diff_plans(before: AlgorithmResult, after: AlgorithmResult) -> dict[str, Any]:
+    """
+    Structural diff between two stored plans. Groups are compared as sets of
+    function IDs, so the diff is linear in the number of functions:
+    unchanged/removed/added groups, functions whose group changed, and which
+    parent->child edges became cut or merged (using the topology of `after`).
+    """
+    before_ids, after_ids = before.run.function_ids, after.run.function_ids
+    before_groups = decode_group_labels(before.group_labels, before_ids)
+    after_groups = decode_group_labels(after.group_labels, after_ids)
+    before_sets = {frozenset(g) for g in before_groups}
+    after_sets = {frozenset(g) for g in after_groups}
+
+    before_group_of = {fid: members for members in before_sets for fid in members}
+    after_group_of = {fid: members for members in after_sets for fid in members}
+    moved = sorted(fid for fid in after_group_of
+                   if fid in before_group_of and before_group_of[fid] != after_group_of[fid])
+
+    newly_cut, newly_merged = [], []
+    parents = after.run.inputs.get('parent', [])
+    for child_idx, parent_idx in enumerate(parents):
+        if parent_idx < 0:
+            continue
+        parent_id, child_id = after_ids[parent_idx], after_ids[child_idx]
+        if not all(fid in before_group_of and fid in after_group_of for fid in (parent_id, child_id)):
+            continue
+        was_cut = before_group_of[parent_id] is not before_group_of[child_id]
+        is_cut = after_group_of[parent_id] is not after_group_of[child_id]
+        if is_cut and not was_cut:
+            newly_cut.append([parent_id, child_id])
+        elif was_cut and not is_cut:
+            newly_merged.append([parent_id, child_id])
+
+    def _delta(a, b):
+        return None if a is None or b is None else b - a
+
+    return {
+        'from': serialize_result(before),
+        'to': serialize_result(after),
+        'sameApplication': before.run.application_hash == after.run.application_hash,
+        'costDelta': _delta(before.cost, after.cost),
+        'latencyDelta': _delta(before.latency, after.latency),
+        'unchangedGroups': sorted(sorted(g) for g in before_sets & after_sets),
+        'removedGroups': sorted(sorted(g) for g in before_sets - after_sets),
+        'addedGroups': sorted(sorted(g) for g in after_sets - before_sets),
+        'movedFunctions': moved,
+        'newlyCutEdges': newly_cut,
+        'newlyMergedEdges': newly_merged,
+    }
@@ -0,0 +1 @@
+"""Load testing kit: local GitHub/STS/CloudWatch Logs stand-ins and a request driver"""
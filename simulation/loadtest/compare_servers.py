@@ -0,0 +1,95 @@
+# Measures how many concurrent LiveSimulationView requests one worker process
+# sustains under WSGI (gunicorn, threaded) versus ASGI (uvicorn, async view).
+# Run with: python -m simulation.loadtest.compare_servers --concurrency 8,32,64
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from .driver import seed_users, run, percentile
+from .stubs import StubConfig, StubServer
+
+SERVERS = {
+    # name: (command builder, endpoint path)
+    'wsgi': (lambda bind, args: [sys.executable, '-m', 'gunicorn', 'backend.wsgi', '-k', 'gthread',
+                                 '-w', str(args.workers), '--threads', str(args.threads), '-b', bind],
+             '/api/simulate/live/'),
+    'asgi': (lambda bind, args: [sys.executable, '-m', 'uvicorn', 'backend.asgi:application',
+                                 '--workers', str(args.workers), '--host', bind.split(':')[0],
+                                 '--port', bind.split(':')[1], '--log-level', 'warning'],
+             '/api/simulate/live/async/'),
+}
+
+
+def _wait_for_port(host: str, port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on {host}:{port} did not start within {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent request capacity under WSGI versus ASGI.")
+    parser.add_argument('--servers', default='wsgi,asgi')
+    parser.add_argument('--concurrency', default='8,32,64', help="Comma-separated client concurrency levels")
+    parser.add_argument('--requests', type=int, default=128, help="Requests per concurrency level")
+    parser.add_argument('--workers', type=int, default=1, help="Server worker processes")
+    parser.add_argument('--threads', type=int, default=8, help="Threads per gunicorn worker")
+    parser.add_argument('--functions', type=int, default=12)
+    parser.add_argument('--io-latency', type=float, default=0.2, help="Seconds added to each GitHub/STS/Logs response")
+    parser.add_argument('--logs-pending-polls', type=int, default=3)
+    parser.add_argument('--tier', default='ENTERPRISE', choices=['FREE', 'PRO', 'ENTERPRISE'])
+    parser.add_argument('--algorithms', default='no_fusion,singleton,greedy_tree_partitioning',
+                        help="Suite run per request; keep it cheap so the I/O stages dominate ('' = tier default)")
+    parser.add_argument('--stub-port', type=int, default=8765)
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings_loadtest')
+    os.environ['LOADTEST_STUB_URL'] = stub_url
+    os.environ['LOADTEST_ALGORITHMS'] = args.algorithms
+
+    config = StubConfig(functions=args.functions, github_latency=args.io_latency, sts_latency=args.io_latency,
+                        logs_latency=args.io_latency, logs_pending_polls=args.logs_pending_polls)
+    stubs = StubServer(('127.0.0.1', args.stub_port), config)
+    threading.Thread(target=stubs.serve_forever, daemon=True).start()
+
+    subprocess.run([sys.executable, 'manage.py', 'migrate', '--verbosity', '0'], check=True)
+    tokens = seed_users(16, args.tier)
+    levels = [int(level) for level in args.concurrency.split(',')]
+    bind = f"127.0.0.1:{args.port}"
+
+    rows = []
+    for name in args.servers.split(','):
+        command, path = SERVERS[name]
+        server = subprocess.Popen(command(bind, args), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            _wait_for_port('127.0.0.1', args.port)
+            # A warm-up round loads the algorithms and fills the auth cache.
+            run(f"http://{bind}", tokens, len(tokens), len(tokens), 5, {}, path=path)
+            for concurrency in levels:
+                report = run(f"http://{bind}", tokens, args.requests, concurrency, 5, {}, path=path)
+                total = report['stages'].get('total', [])
+                rows.append((name, concurrency, report['throughput'], percentile(total, 50),
+                             percentile(total, 95), report['statuses']))
+                print(f"{name} c={concurrency}: {report['throughput']:.1f} req/s")
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"\n{'server':<6} {'conc':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9}  statuses")
+    for name, concurrency, throughput, p50, p95, statuses in rows:
+        print(f"{name:<6} {concurrency:>5} {throughput:>8.1f} {p50:>9.1f} {p95:>9.1f}  {statuses}")
+    stubs.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+# Replays concurrent authenticated LiveSimulationView requests and reports
+# throughput and per-stage latency percentiles (from the Server-Timing header).
+# Run with: DJANGO_SETTINGS_MODULE=backend.settings_loadtest python -m simulation.loadtest.driver
+import argparse
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def seed_users(count: int, tier: str) -> list[str]:
+    """Creates (or reuses) load-test users with profiles and returns their API tokens."""
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings_loadtest')
+    django.setup()
+    from django.contrib.auth.models import User
+    from rest_framework.authtoken.models import Token
+    from core.models import Profile
+
+    tokens = []
+    for i in range(count):
+        user, _ = User.objects.get_or_create(username=f"loadtest-{i}")
+        Profile.objects.update_or_create(user=user, defaults={
+            'github_access_token': 'loadtest-github-token',
+            'aws_role_arn': 'arn:aws:iam::000000000000:role/loadtest',
+            'subscription': tier,
+        })
+        token, _ = Token.objects.get_or_create(user=user)
+        tokens.append(token.key)
+    return tokens
+
+
+def parse_server_timing(header: str) -> dict[str, float]:
+    """'github;dur=12.3, solve;dur=40.0' -> {'github': 12.3, 'solve': 40.0} (ms)."""
+    stages = {}
+    for entry in header.split(','):
+        name, _, params = entry.strip().partition(';')
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip() == 'dur':
+                stages[name] = float(value)
+    return stages
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return float('nan')
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def run(url: str, tokens: list[str], total_requests: int, concurrency: int, repos: int, body_extra: dict,
+        path: str = '/api/simulate/live/') -> dict:
+    local = threading.local()
+    samples = defaultdict(list)
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def one_request(i: int):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        token = tokens[i % len(tokens)]
+        payload = {'owner': 'loadtest', 'repoName': f"repo-{i % repos}", **body_extra}
+        start = time.perf_counter()
+        try:
+            res = session.post(f"{url.rstrip('/')}{path}", json=payload,
+                               headers={'Authorization': f"Token {token}"}, timeout=300)
+            status_code = res.status_code
+            stages = parse_server_timing(res.headers.get('Server-Timing', ''))
+        except requests.RequestException:
+            status_code, stages = 'error', {}
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with lock:
+            statuses[status_code] += 1
+            samples['total'].append(elapsed_ms)
+            for stage, duration in stages.items():
+                samples[stage].append(duration)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_request, range(total_requests)))
+    wall = time.perf_counter() - started
+
+    return {
+        'wall_seconds': wall,
+        'throughput': total_requests / wall if wall else 0.0,
+        'statuses': dict(statuses),
+        'stages': {stage: sorted(values) for stage, values in samples.items()},
+    }
+
+
+def print_report(report: dict):
+    print(f"\nRequests/s: {report['throughput']:.2f} over {report['wall_seconds']:.1f}s  statuses: {report['statuses']}")
+    print(f"{'stage':<12} {'n':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for stage, values in report['stages'].items():
+        print(f"{stage:<12} {len(values):>6} {percentile(values, 50):>10.1f} "
+              f"{percentile(values, 95):>10.1f} {percentile(values, 99):>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load driver for LiveSimulationView.")
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--tier', default='PRO', choices=['FREE', 'PRO', 'ENTERPRISE'])
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--repos', type=int, default=5, help="Distinct repository names to spread requests over")
+    parser.add_argument('--response-format', default='default', choices=['default', 'compact'])
+    parser.add_argument('--path', default='/api/simulate/live/', help="Endpoint, e.g. /api/simulate/live/async/ under ASGI")
+    args = parser.parse_args()
+
+    tokens = seed_users(args.users, args.tier)
+    report = run(args.url, tokens, args.requests, args.concurrency, args.repos,
+                 {'responseFormat': args.response_format}, path=args.path)
+    print_report(report)
+
+
+if __name__ == '__main__':
+    main()
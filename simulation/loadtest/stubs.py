@@ -0,0 +1,256 @@
+# Local stand-ins for the GitHub contents API, STS and CloudWatch Logs.
+# Run with: python -m simulation.loadtest.stubs --port 8765 --functions 50
+import argparse
+import base64
+import hashlib
+import itertools
+import json
+import threading
+import time
+import yaml
+from urllib.parse import parse_qs, urlsplit
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ..benchmarks.generator import generate_application
+
+
+@dataclass
+class StubConfig:
+    functions: int = 50
+    seed: int = 0
+    service: str = 'loadtest'
+    stage: str = 'dev'
+    github_latency: float = 0.05  # Seconds added to every GitHub response
+    sts_latency: float = 0.03
+    logs_latency: float = 0.02
+    logs_pending_polls: int = 1  # GetQueryResults calls answered 'Running' before 'Complete'
+    repos: int = 250  # Repositories listed by /user/repos
+    function_files: int = 0  # Split `functions` into this many ${file(...)} references (0 = inline)
+
+
+def function_name(index: int) -> str:
+    # Fixed-width names so no function name is a suffix/prefix of another.
+    return f"fn{index:05d}"
+
+
+def serverless_yaml(config: StubConfig) -> str:
+    return serverless_files(config)['serverless.yml']
+
+
+def serverless_files(config: StubConfig) -> dict[str, str]:
+    """
+    A serverless.yml with an optifuse topology block for a synthetic application,
+    plus the function files it references when config.function_files is set.
+    """
+    app = generate_application(config.functions, seed=config.seed)
+    name = {f.id: function_name(i) for i, f in enumerate(app.functions)}
+    spec_functions = {name[f.id]: {'handler': f"handler.{name[f.id]}", 'memorySize': f.memory,
+                                   'timeout': max(1, f.baseline_runtime // 1000)} for f in app.functions}
+    spec = {
+        'service': config.service,
+        'provider': {'name': 'aws', 'stage': config.stage, 'memorySize': 256, 'timeout': 6},
+        'functions': spec_functions,
+        'custom': {'optifuse': {
+            'topology': {name[f.id]: {'children': {name[c.id]: f.data_out_edges[c.id] for c in f.children}}
+                         for f in app.functions if f.children},
+            'criticalPath': [name[fid] for fid in app.critical_path_ids],
+            'constraints': {'maxMemoryMB': app.max_memory, 'maxLatencyMS': app.max_latency,
+                            'networkHopMS': app.network_hop_delay},
+        }},
+    }
+    files = {}
+    if config.function_files:
+        names = list(spec['functions'])
+        chunk = -(-len(names) // config.function_files)
+        spec['functions'] = []
+        for i in range(0, len(names), chunk):
+            path = f"functions/part{i // chunk}.yml"
+            files[path] = yaml.safe_dump({n: spec_functions[n] for n in names[i:i + chunk]}, sort_keys=False)
+            spec['functions'].append(f"${{file(./{path})}}")
+    files['serverless.yml'] = yaml.safe_dump(spec, sort_keys=False)
+    return files
+
+
+def query_result_rows(config: StubConfig, function_names: list[str]) -> list[list[dict]]:
+    rows = []
+    for i, fname in enumerate(function_names):
+        log_group = f"/aws/lambda/{config.service}-{config.stage}-{fname}"
+        rows.append([
+            {'field': 'logGroupName', 'value': log_group},
+            {'field': 'logStreamName', 'value': log_group},
+            {'field': 'avgDurationMS', 'value': str(50 + (i * 37) % 400)},
+            {'field': 'avgMemoryMB', 'value': str(64 + (i * 53) % 448)},
+            {'field': 'invocations', 'value': '1000'},
+        ])
+    return rows
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server: 'StubServer'
+
+    def log_message(self, format, *args):
+        pass  # Keep the console quiet under load
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.rstrip('/') == '/user/repos':
+            return self._list_repos(parse_qs(url.query))
+        # GitHub contents API: /repos/<owner>/<repo>/contents/<path>
+        parts = url.path.strip('/').split('/')
+        if len(parts) >= 5 and parts[0] == 'repos' and parts[3] == 'contents':
+            time.sleep(self.server.config.github_latency)
+            path = '/'.join(parts[4:])
+            if path not in self.server.files:
+                return self._send(404, b'{"message": "Not Found"}', 'application/json')
+            payload = {
+                'name': parts[-1],
+                'path': path,
+                'encoding': 'base64',
+                'content': base64.b64encode(self.server.files[path].encode('utf-8')).decode('ascii'),
+            }
+            return self._send(200, json.dumps(payload).encode('utf-8'), 'application/json')
+        # Git data API: /repos/<owner>/<repo>/git/trees/<ref> and /repos/<owner>/<repo>/git/blobs/<sha>
+        if len(parts) == 6 and parts[0] == 'repos' and parts[3] == 'git':
+            time.sleep(self.server.config.github_latency)
+            if parts[4] == 'trees':
+                tree = [{'path': path, 'type': 'blob', 'sha': sha} for sha, path in self.server.blob_paths.items()]
+                return self._send(200, json.dumps({'sha': 'stub-tree', 'tree': tree, 'truncated': False}).encode('utf-8'),
+                                  'application/json')
+            if parts[4] == 'blobs' and parts[5] in self.server.blob_paths:
+                content = self.server.files[self.server.blob_paths[parts[5]]]
+                payload = {'sha': parts[5], 'encoding': 'base64',
+                           'content': base64.b64encode(content.encode('utf-8')).decode('ascii')}
+                return self._send(200, json.dumps(payload).encode('utf-8'), 'application/json')
+        self._send(404, b'{"message": "Not Found"}', 'application/json')
+
+    def _list_repos(self, query: dict):
+        time.sleep(self.server.config.github_latency)
+        per_page = int(query.get('per_page', ['30'])[0])
+        page = int(query.get('page', ['1'])[0])
+        total = self.server.config.repos
+        last_page = max(1, -(-total // per_page))
+        repos = [
+            {'id': i, 'name': f"repo-{i}", 'full_name': f"loadtest/repo-{i}", 'owner': {'login': 'loadtest'},
+             'default_branch': 'main', 'private': False, 'updated_at': '2024-01-01T00:00:00Z'}
+            for i in range((page - 1) * per_page, min(total, page * per_page))
+        ]
+        etag = f'"repos-{total}-{page}-{per_page}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        body = json.dumps(repos).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        base = f"http://{self.headers.get('Host')}/user/repos?sort=updated&per_page={per_page}"
+        links = []
+        if page < last_page:
+            links.append(f'<{base}&page={page + 1}>; rel="next"')
+        links.append(f'<{base}&page={last_page}>; rel="last"')
+        self.send_header('Link', ', '.join(links))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0) or 0))
+        target = self.headers.get('X-Amz-Target', '')
+        if target.startswith('Logs_'):
+            return self._logs(target.split('.')[-1], json.loads(body or b'{}'))
+        form = parse_qs(body.decode('utf-8'))
+        if form.get('Action') == ['AssumeRole']:
+            return self._assume_role()
+        self._send(400, b'{"message": "Unsupported stub request"}', 'application/json')
+
+    def _assume_role(self):
+        time.sleep(self.server.config.sts_latency)
+        xml = (
+            '<AssumeRoleResponse xmlns="https://sts.amazonaws.com/doc/2011-06-15/"><AssumeRoleResult>'
+            '<Credentials><AccessKeyId>ASIASTUB</AccessKeyId><SecretAccessKey>stub-secret</SecretAccessKey>'
+            '<SessionToken>stub-session</SessionToken><Expiration>2099-01-01T00:00:00Z</Expiration></Credentials>'
+            '<AssumedRoleUser><AssumedRoleId>AROASTUB:OptifuseAnalysisSession</AssumedRoleId>'
+            '<Arn>arn:aws:sts::000000000000:assumed-role/loadtest/OptifuseAnalysisSession</Arn></AssumedRoleUser>'
+            '</AssumeRoleResult><ResponseMetadata><RequestId>stub</RequestId></ResponseMetadata></AssumeRoleResponse>'
+        )
+        self._send(200, xml.encode('utf-8'), 'text/xml')
+
+    def _logs(self, operation: str, payload: dict):
+        time.sleep(self.server.config.logs_latency)
+        if operation == 'StartQuery':
+            query_id = f"stub-{next(self.server.query_ids)}"
+            with self.server.lock:
+                self.server.polls[query_id] = 0
+            data = {'queryId': query_id}
+        elif operation == 'GetQueryResults':
+            query_id = payload.get('queryId')
+            with self.server.lock:
+                self.server.polls[query_id] = self.server.polls.get(query_id, 0) + 1
+                polls = self.server.polls[query_id]
+            if polls <= self.server.config.logs_pending_polls:
+                data = {'status': 'Running', 'results': []}
+            else:
+                with self.server.lock:
+                    self.server.polls.pop(query_id, None)
+                data = {'status': 'Complete', 'results': self.server.query_rows,
+                        'statistics': {'recordsMatched': 1000.0, 'recordsScanned': 1000.0, 'bytesScanned': 1.0}}
+        else:
+            return self._send(400, json.dumps({'__type': 'InvalidOperationException'}).encode('utf-8'),
+                              'application/x-amz-json-1.1')
+        self._send(200, json.dumps(data).encode('utf-8'), 'application/x-amz-json-1.1')
+
+
+class StubServer(ThreadingHTTPServer):
+    """Serves GitHub (contents, /user/repos), STS and CloudWatch Logs stand-ins from a single port."""
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], config: StubConfig):
+        super().__init__(address, StubHandler)
+        self.config = config
+        self.files = serverless_files(config)
+        # Git blob SHAs are content hashes; mimic that so the blob cache behaves as against GitHub.
+        self.blob_paths = {hashlib.sha1(content.encode('utf-8')).hexdigest(): path for path, content in self.files.items()}
+        self.query_rows = query_result_rows(config, [function_name(i) for i in range(config.functions)])
+        self.query_ids = itertools.count(1)
+        self.polls = {}
+        self.lock = threading.Lock()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local GitHub/STS/CloudWatch Logs stand-ins for load tests.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--functions', type=int, default=StubConfig.functions)
+    parser.add_argument('--seed', type=int, default=StubConfig.seed)
+    parser.add_argument('--github-latency', type=float, default=StubConfig.github_latency)
+    parser.add_argument('--sts-latency', type=float, default=StubConfig.sts_latency)
+    parser.add_argument('--logs-latency', type=float, default=StubConfig.logs_latency)
+    parser.add_argument('--logs-pending-polls', type=int, default=StubConfig.logs_pending_polls)
+    parser.add_argument('--repos', type=int, default=StubConfig.repos)
+    parser.add_argument('--function-files', type=int, default=StubConfig.function_files,
+                        help="Move the functions into this many files referenced with ${file(...)}")
+    args = parser.parse_args()
+
+    config = StubConfig(functions=args.functions, seed=args.seed, github_latency=args.github_latency,
+                        sts_latency=args.sts_latency, logs_latency=args.logs_latency,
+                        logs_pending_polls=args.logs_pending_polls, repos=args.repos,
+                        function_files=args.function_files)
+    server = StubServer((args.host, args.port), config)
+    print(f"Stub GitHub/STS/Logs listening on http://{args.host}:{args.port} ({config.functions} functions)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
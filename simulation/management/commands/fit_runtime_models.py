@@ -0,0 +1,110 @@
+# Fits the planner's per-algorithm runtime models from stored runs and/or fresh benchmarks.
+# Run with: python manage.py fit_runtime_models --history --benchmark --output runtime_models.json
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from simulation.benchmarks.generator import generate_application
+from simulation.models import AlgorithmResult
+from simulation.planner import app_features, fit_runtime_model
+from simulation.runner import ALGORITHMS, RESULT_NAMES, TIME_LIMITED_ALGORITHMS
+
+DEFAULT_SIZES = '10,20,50,100,200,500,1000,2000,5000'
+
+# max_children of the generated trees, cycled through per seed: from chains to bushy trees
+SHAPES = (3, 1, 2, 6)
+
+
+def history_samples(limit: int) -> dict[str, list[tuple]]:
+    """(N, E, L, runtime ms) per algorithm from the latest `limit` stored, unprofiled algorithm results."""
+    by_result_name = {label: name for name, label in RESULT_NAMES.items()}
+    samples = {}
+    rows = (AlgorithmResult.objects.filter(runtime_ms__isnull=False, profile__isnull=True,
+                                           name__in=list(by_result_name))
+            .select_related('run').order_by('-id')[:limit])
+    for result in rows:
+        inputs = result.run.inputs
+        parents = inputs.get('parent', [])
+        features = (len(result.run.function_ids), sum(1 for p in parents if p >= 0),
+                    len(inputs.get('critical_path_ids', [])))
+        samples.setdefault(by_result_name[result.name], []).append((*features, result.runtime_ms))
+    return samples
+
+
+def benchmark_samples(algorithms: list[str], sizes: list[int], seeds: int, max_seconds: int, log) -> dict[str, list[tuple]]:
+    """
+    (N, E, L, runtime ms) per algorithm on the benchmark generator's trees,
+    growing the size until an algorithm takes more than `max_seconds` (which
+    is also the time limit of the time-limited ones).
+    """
+    samples = {name: [] for name in algorithms}
+    for name in algorithms:
+        kwargs = {'time_limit': max_seconds} if name in TIME_LIMITED_ALGORITHMS else {}
+        for n in sizes:
+            slowest = 0.0
+            for seed in range(seeds):
+                # Vary the branching too, so critical-path length is not just a function of N
+                app = generate_application(n, seed=seed, max_children=SHAPES[seed % len(SHAPES)])
+                start = time.perf_counter()
+                ALGORITHMS[name](app, **kwargs)
+                elapsed = time.perf_counter() - start
+                samples[name].append((*app_features(app), elapsed * 1000))
+                slowest = max(slowest, elapsed)
+            log(f"{name}: {n} functions, up to {slowest * 1000:.1f} ms")
+            if slowest > max_seconds:
+                break
+    return samples
+
+
+class Command(BaseCommand):
+    help = ("Fits a runtime model per algorithm (runtime as a power law of functions, edges and critical-path "
+            "length) for the deadline planner, from stored results and/or benchmark runs.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--history', action='store_true', help="Use the runtimes of stored simulation runs")
+        parser.add_argument('--history-limit', type=int, default=10000, help="Most recent stored results to use")
+        parser.add_argument('--benchmark', action='store_true', help="Time the algorithms on generated trees")
+        parser.add_argument('--sizes', default=DEFAULT_SIZES, help="Comma-separated tree sizes to benchmark")
+        parser.add_argument('--seeds', type=int, default=4, help="Trees per size, of different shapes")
+        parser.add_argument('--max-seconds', type=int, default=10,
+                            help="Stop growing an algorithm's trees once it takes longer than this")
+        parser.add_argument('--algorithms', default='',
+                            help=f"Comma-separated algorithms (default: all of {', '.join(ALGORITHMS)})")
+        parser.add_argument('--output', help="JSON file for settings.OPTIFUSE_RUNTIME_MODELS (default: stdout)")
+
+    def handle(self, *args, **options):
+        if not options['history'] and not options['benchmark']:
+            raise CommandError("Pass --history, --benchmark or both.")
+        algorithms = [a for a in options['algorithms'].split(',') if a] or list(ALGORITHMS)
+        unknown = [a for a in algorithms if a not in ALGORITHMS]
+        if unknown:
+            raise CommandError(f"Unknown algorithms: {', '.join(unknown)}.")
+        try:
+            sizes = [int(n) for n in options['sizes'].split(',') if n]
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers.")
+
+        samples = {name: [] for name in algorithms}
+        if options['history']:
+            for name, rows in history_samples(options['history_limit']).items():
+                if name in samples:
+                    samples[name].extend(rows)
+        if options['benchmark']:
+            for name, rows in benchmark_samples(algorithms, sizes, options['seeds'], options['max_seconds'],
+                                                self.stderr.write).items():
+                samples[name].extend(rows)
+
+        models = {}
+        for name, rows in samples.items():
+            model = fit_runtime_model(rows)
+            if model is None:
+                self.stderr.write(f"WARNING: No samples for {name}; it keeps its current model.")
+            else:
+                models[name] = model.to_dict()
+        body = json.dumps(models, indent=2)
+        if options['output']:
+            Path(options['output']).write_text(body, encoding='utf-8')
+        else:
+            self.stdout.write(body)
@@ -0,0 +1,67 @@
+# Folds exported CloudWatch logs into a metrics.json that simulate_batch reads next to a spec.
+# Run with: python manage.py ingest_report_logs exports/ --service my-service --stage prod --output metrics.json
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from simulation.connectors.report_logs import ingest_file, log_files, merge_stats
+from simulation.core.builder import ApplicationBuilder
+
+
+class Command(BaseCommand):
+    help = ("Streams exported Lambda logs (plain or gzipped, text or JSON format) and writes per-function "
+            "runtime and memory statistics from their REPORT records.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help="Log files or directories of them")
+        parser.add_argument('--output', help="metrics.json to write (default: stdout)")
+        parser.add_argument('--service', help="Service name of the '<service>-<stage>-<function>' log groups")
+        parser.add_argument('--stage', help="Stage of the '<service>-<stage>-<function>' log groups")
+        parser.add_argument('--spec', help="serverless.yml whose functions (and service name) to attribute records to")
+        parser.add_argument('--log-group', help="Log group for files that name none themselves")
+        parser.add_argument('--relative-accuracy', type=float, default=0.01, help="Relative error of the percentiles")
+        parser.add_argument('--sketches', help="Also write the mergeable sketches to this file")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Worker processes, one file each (0 runs in this process)")
+
+    def handle(self, *args, **options):
+        service_name, function_ids = options['service'], None
+        if options['spec']:
+            spec = ApplicationBuilder.load_spec(Path(options['spec']).read_text(encoding='utf-8'))
+            function_ids = list((spec.get('functions') or {}).keys())
+            service_name = service_name or spec.get('service')
+        files = log_files(options['paths'])
+        if not files:
+            raise CommandError("No log files found.")
+        args = (function_ids, service_name, options['stage'], options['log_group'], options['relative_accuracy'])
+
+        merged, unattributed = {}, 0
+        if options['workers'] <= 0:
+            results = (ingest_file(path, *args) for path in files)
+        else:
+            executor = ProcessPoolExecutor(max_workers=min(options['workers'], len(files)))
+            results = (future.result() for future in as_completed([executor.submit(ingest_file, path, *args)
+                                                                   for path in files]))
+        try:
+            for done, (stats, skipped) in enumerate(results, 1):
+                merge_stats(merged, stats)
+                unattributed += skipped
+                self.stderr.write(f"[{done}/{len(files)}] {sum(s.sketches['duration'].count for s in stats.values())} records")
+        finally:
+            if options['workers'] > 0:
+                executor.shutdown(cancel_futures=True)
+        if unattributed:
+            self.stderr.write(f"WARNING: {unattributed} REPORT records could not be attributed to a function.")
+
+        metrics = {fid: stats.summary() for fid, stats in sorted(merged.items())}
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(metrics, indent=2), encoding='utf-8')
+        else:
+            self.stdout.write(json.dumps(metrics, indent=2))
+        if options['sketches']:
+            Path(options['sketches']).write_text(
+                json.dumps({fid: stats.to_dict() for fid, stats in merged.items()}), encoding='utf-8')
+
@@ -0,0 +1,206 @@
+# Offline batch simulation of many serverless.yml files, without the HTTP API.
+# Run with: python manage.py simulate_batch specs/ --output results.jsonl
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand, CommandError
+
+from simulation.core.builder import ApplicationBuilder
+from simulation.core.references import resolve_file_references
+from simulation.encoding import dumps, encode_results
+from simulation.runner import ALGORITHMS, DEFAULT_ALGORITHMS, run_all_simulations
+
+SPEC_NAMES = ('serverless.yml', 'serverless.yaml')
+
+
+def _read(path: str) -> str:
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def _job(name: str, spec: Path, metrics: Optional[Path]) -> dict[str, Any]:
+    """
+    A unit of work. Its key hashes the spec and metrics contents, so a spec
+    edited since the last run is simulated again on resume.
+    """
+    digest = hashlib.sha256()
+    for path in (spec, metrics):
+        if path is not None and path.is_file():
+            digest.update(path.read_bytes())
+        digest.update(b'\0')
+    return {
+        'name': name,
+        'spec': str(spec),
+        'metrics': str(metrics) if metrics is not None and metrics.is_file() else None,
+        'key': f"{name}:{digest.hexdigest()[:16]}",
+    }
+
+
+def discover_jobs(source: Path, metrics_name: str) -> list[dict[str, Any]]:
+    """
+    Jobs for `source`: a directory searched recursively for serverless.yml
+    files (with an optional `metrics_name` file next to each), or a JSON Lines
+    manifest of {"spec", "metrics", "name"} entries with paths relative to it.
+    """
+    if source.is_dir():
+        jobs = []
+        for spec in sorted(p for p in source.rglob('*') if p.name in SPEC_NAMES and p.is_file()):
+            name = str(spec.parent.relative_to(source)) if spec.parent != source else source.name
+            jobs.append(_job(name, spec, spec.parent / metrics_name))
+        return jobs
+
+    jobs = []
+    with open(source, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                spec = source.parent / entry['spec']
+            except (ValueError, KeyError, TypeError):
+                raise CommandError(f"{source}:{line_no}: expected a JSON object with a 'spec' path.")
+            metrics = source.parent / entry['metrics'] if entry.get('metrics') else None
+            jobs.append(_job(entry.get('name') or str(entry['spec']), spec, metrics))
+    return jobs
+
+
+def simulate_job(job: dict[str, Any], algorithms: Optional[list[str]], time_limits: dict[str, int]) -> dict[str, Any]:
+    """
+    Builds one application from its spec (resolving ${file(...)} references
+    next to it) and optional metrics, and runs the suite. Runs in a worker
+    process; failures are reported in the record instead of raised.
+    """
+    record = {'name': job['name'], 'spec': job['spec'], 'key': job['key']}
+    try:
+        base_dir = Path(job['spec']).parent
+
+        def load_files(paths: set[str]) -> dict[str, str]:
+            return {path: (base_dir / path).read_text(encoding='utf-8') for path in paths if (base_dir / path).is_file()}
+
+        spec = resolve_file_references(ApplicationBuilder.load_spec(_read(job['spec'])), load_files)
+        app = ApplicationBuilder.create_from_spec(job['name'], spec)
+        if job['metrics']:
+            app = ApplicationBuilder.enrich_with_live_data(app, json.loads(_read(job['metrics'])))
+        results = run_all_simulations(app, algorithms=algorithms, time_limits=time_limits)
+        record['functions'] = [f.id for f in app.functions]
+        record['results'] = encode_results(results)
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+    return record
+
+
+class Checkpoint:
+    """
+    Jobs already written to the output file, one "key<TAB>offset" line each,
+    where offset is the output size after that job's record. On resume the
+    output is cut back to the last checkpointed offset, dropping any record
+    written after it, so every job appears exactly once.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.done: set[str] = set()
+        self.offset = 0
+        if path.exists():
+            for line in path.read_text(encoding='utf-8').splitlines():
+                key, _, offset = line.rpartition('\t')
+                if key and offset.isdigit():
+                    self.done.add(key)
+                    self.offset = int(offset)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def record(self, key: str, offset: int):
+        self._file.write(f"{key}\t{offset}\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.done.add(key)
+
+    def close(self):
+        self._file.close()
+
+
+class Command(BaseCommand):
+    help = ("Simulates every serverless.yml in a directory (or listed in a JSON Lines manifest) "
+            "on a process pool and writes one JSON Lines record per spec as it completes.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="Directory to search for serverless.yml files, or a .jsonl manifest")
+        parser.add_argument('--output', help="JSON Lines file to write (default: stdout)")
+        parser.add_argument('--checkpoint', help="Checkpoint file (default: <output>.checkpoint); requires --output")
+        parser.add_argument('--restart', action='store_true',
+                            help="Ignore an existing checkpoint and start over, overwriting --output")
+        parser.add_argument('--metrics-name', default='metrics.json',
+                            help="Metrics file looked up next to each spec in directory mode")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Worker processes (0 runs in this process)")
+        parser.add_argument('--algorithms', default='',
+                            help=f"Comma-separated suite (default: {', '.join(DEFAULT_ALGORITHMS)})")
+        parser.add_argument('--ilp-time-limit', type=int, default=60, help="Seconds given to mtx_ilp per spec")
+
+    def handle(self, *args, **options):
+        source = Path(options['source'])
+        if not source.exists():
+            raise CommandError(f"{source} does not exist.")
+        algorithms = [a for a in options['algorithms'].split(',') if a] or None
+        unknown = [a for a in algorithms or [] if a not in ALGORITHMS]
+        if unknown:
+            raise CommandError(f"Unknown algorithms: {', '.join(unknown)}.")
+        if options['checkpoint'] and not options['output']:
+            raise CommandError("--checkpoint requires --output.")
+        time_limits = {'mtx_ilp': options['ilp_time_limit'], 'mtx_ilp_portfolio': options['ilp_time_limit']}
+
+        jobs = discover_jobs(source, options['metrics_name'])
+        checkpoint, output = None, None
+        if options['output']:
+            output_path = Path(options['output'])
+            checkpoint_path = Path(options['checkpoint'] or f"{output_path}.checkpoint")
+            if options['restart']:
+                checkpoint_path.unlink(missing_ok=True)
+                output_path.unlink(missing_ok=True)
+            checkpoint = Checkpoint(checkpoint_path)
+            size = output_path.stat().st_size if output_path.exists() else 0
+            if (size and not checkpoint.done) or size < checkpoint.offset:
+                # Resuming would cut the file back to the checkpoint and lose records it does not know about.
+                checkpoint.close()
+                raise CommandError(f"{output_path} is not empty and {checkpoint_path} does not match it; "
+                                   f"pass --restart to overwrite it, or choose another --output.")
+            output = open(output_path, 'ab')
+            output.truncate(checkpoint.offset)
+            output.seek(checkpoint.offset)
+        pending = [job for job in jobs if checkpoint is None or job['key'] not in checkpoint.done]
+        self.stderr.write(f"{len(jobs)} specs, {len(jobs) - len(pending)} already done, {len(pending)} to simulate.")
+
+        def write(record: dict[str, Any], done: int):
+            line = dumps(record) + b'\n'
+            if output is None:
+                self.stdout.write(line.decode('utf-8'), ending='')
+                self.stdout.flush()
+            else:
+                output.write(line)
+                output.flush()
+                os.fsync(output.fileno())
+                checkpoint.record(record['key'], output.tell())
+            status = f"error: {record['error']}" if 'error' in record else f"{len(record['results'])} results"
+            self.stderr.write(f"[{done}/{len(pending)}] {record['name']}: {status}")
+
+        try:
+            if options['workers'] <= 0:
+                for done, job in enumerate(pending, 1):
+                    write(simulate_job(job, algorithms, time_limits), done)
+            else:
+                executor = ProcessPoolExecutor(max_workers=options['workers'])
+                try:
+                    futures = [executor.submit(simulate_job, job, algorithms, time_limits) for job in pending]
+                    for done, future in enumerate(as_completed(futures), 1):
+                        write(future.result(), done)
+                finally:
+                    # On interruption, drop the queued specs instead of finishing them.
+                    executor.shutdown(cancel_futures=True)
+        finally:
+            if output is not None:
+                output.close()
+                checkpoint.close()
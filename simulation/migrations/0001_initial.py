@@ -0,0 +1,54 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimulationRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('repo_owner', models.CharField(max_length=255)),
+                ('repo_name', models.CharField(max_length=255)),
+                ('application_hash', models.CharField(db_index=True, max_length=64)),
+                ('function_ids', models.JSONField(default=list)),
+                ('inputs', models.JSONField(default=dict)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='simulation_runs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AlgorithmResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('cost', models.FloatField(null=True)),
+                ('latency', models.FloatField(null=True)),
+                ('feasible', models.BooleanField(default=False)),
+                ('runtime_ms', models.FloatField(null=True)),
+                ('group_labels', models.JSONField(default=list)),
+                ('error', models.TextField(blank=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='simulation.simulationrun')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='simulationrun',
+            index=models.Index(fields=['user', 'repo_owner', 'repo_name', '-created'], name='simrun_user_repo_created'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 02:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='algorithmresult',
+            name='profile',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
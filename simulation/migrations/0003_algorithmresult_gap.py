@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 02:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0002_algorithmresult_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='algorithmresult',
+            name='gap',
+            field=models.FloatField(null=True),
+        ),
+    ]
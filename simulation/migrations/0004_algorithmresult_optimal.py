@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0003_algorithmresult_gap'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='algorithmresult',
+            name='optimal',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,3 +1,52 @@
 from django.db import models
+from django.contrib.auth.models import User
 
-# Create your models here.
+
+class SimulationRun(models.Model):
+    """
+    One execution of the algorithm suite against a repository's application.
+    `inputs` holds the constraints and per-function metrics the run saw, as
+    arrays aligned with `function_ids`; the per-algorithm plans are stored as
+    group-label arrays against the same table.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='simulation_runs')
+    repo_owner = models.CharField(max_length=255)
+    repo_name = models.CharField(max_length=255)
+    application_hash = models.CharField(max_length=64, db_index=True)
+    function_ids = models.JSONField(default=list)
+    inputs = models.JSONField(default=dict)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created', '-id']
+        indexes = [
+            models.Index(fields=['user', 'repo_owner', 'repo_name', '-created'], name='simrun_user_repo_created'),
+        ]
+
+    def __str__(self):
+        return f"{self.repo_owner}/{self.repo_name} @ {self.created:%Y-%m-%d %H:%M}"
+
+
+class AlgorithmResult(models.Model):
+    """The outcome of a single algorithm within a SimulationRun."""
+    run = models.ForeignKey(SimulationRun, on_delete=models.CASCADE, related_name='results')
+    name = models.CharField(max_length=100)
+    # Null when the algorithm produced no finite value (e.g. infeasible ILP).
+    cost = models.FloatField(null=True)
+    latency = models.FloatField(null=True)
+    feasible = models.BooleanField(default=False)
+    runtime_ms = models.FloatField(null=True)
+    # Share of the cost that may be above the optimum (see algorithms/bounds.py); null if infeasible.
+    gap = models.FloatField(null=True)
+    # Whether the solver proved the plan optimal; a time-limited ILP incumbent is only feasible.
+    optimal = models.BooleanField(default=False)
+    group_labels = models.JSONField(default=list)
+    error = models.TextField(blank=True)
+    # Top functions and allocations of a profiled run (see utils/profiling.py); null otherwise.
+    profile = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.name} ({'feasible' if self.feasible else 'infeasible'})"
@@ -0,0 +1,162 @@
+# Stages of the live simulation workflow shared by the sync and async views
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+import requests
+from django.conf import settings
+from rest_framework import status
+
+from .core.builder import ApplicationBuilder
+from .core.references import FileReferenceResolver, resolve_file_references
+from .core.structures import Application
+from .connectors.github import RepositoryFiles, AsyncRepositoryFiles
+from .models import SimulationRun
+from .history import reoptimization_inputs, dump_application
+from .algorithms.incremental import incremental_reoptimize
+from .runner import run_all_simulations
+from .scheduler import get_scheduler, SchedulerBusy
+from .utils.timing import StageTimer
+from .utils.lazy import loaded_module
+
+
+SERVERLESS_FILE = 'serverless.yml'
+
+
+def load_serverless_spec(files: RepositoryFiles) -> dict:
+    """serverless.yml parsed, with ${file(...)} references fetched together per nesting level and inlined."""
+    spec = ApplicationBuilder.load_spec(files.read(SERVERLESS_FILE))
+    return resolve_file_references(spec, files.read_many)
+
+
+async def load_serverless_spec_async(files: AsyncRepositoryFiles) -> dict:
+    spec = ApplicationBuilder.load_spec(await files.read(SERVERLESS_FILE))
+    resolver = FileReferenceResolver(spec)
+    while pending := resolver.pending():
+        resolver.add(pending, await files.read_many(pending))
+    return resolver.resolve()
+
+
+def service_and_stage(spec: dict) -> tuple[str, str]:
+    """Reads the service name and deployment stage that prefix the Lambda log groups."""
+    try:
+        service_name = spec.get('service', 'unknown-service')
+        stage = spec.get('provider', {}).get('stage', 'dev')
+    except AttributeError:
+        raise ValueError("Could not parse service name or stage from serverless.yml.")
+    return service_name, stage
+
+
+def previous_plan_inputs(user, repo_owner: str, repo_name: str, app: Application) -> Optional[dict[str, Any]]:
+    """incremental_reoptimize arguments from the latest stored run of this repository, if it is compatible."""
+    previous_run = SimulationRun.objects.filter(
+        user=user, repo_owner=repo_owner, repo_name=repo_name
+    ).prefetch_related('results').first()
+    previous = reoptimization_inputs(previous_run, app) if previous_run else None
+    if previous:
+        print(f"Re-optimizing plan from run {previous_run.id}...")
+    else:
+        print("No compatible stored plan; running the full suite.")
+    return previous
+
+
+def profiling_requested(user, data) -> bool:
+    """Whether to profile the suite: always with OPTIFUSE_PROFILE_ALGORITHMS, else when staff ask with `profile`."""
+    return settings.OPTIFUSE_PROFILE_ALGORITHMS or (bool(data.get('profile', False)) and user.is_staff)
+
+
+def solve(app: Application, tier: str, timer: StageTimer, previous: Optional[dict[str, Any]] = None,
+          profile: bool = False) -> list:
+    """
+    Runs the solver stage under the tier's admission control: an incremental
+    pass when `previous` holds a stored plan, the tier's algorithm suite
+    otherwise. Blocks while queued; raises SchedulerBusy when shed.
+    A `profile`d suite also dumps the anonymized application to
+    OPTIFUSE_PROFILE_DUMP_DIR, if set, and names the dump in each profile.
+    """
+    queued_at = time.perf_counter()
+    with get_scheduler().slot(tier) as policy:
+        timer.record('queue', time.perf_counter() - queued_at)
+        with timer.stage('solve'):
+            if previous:
+                return [incremental_reoptimize(app, **previous, time_limit=policy.ilp_time_limit)]
+
+            # Run the final simulation
+            print("Running simulations...")
+            results = run_all_simulations(
+                app,
+                algorithms=policy.algorithms,
+                time_limits={'mtx_ilp': policy.ilp_time_limit, 'mtx_ilp_portfolio': policy.ilp_time_limit},
+                deadline=policy.deadline,
+                exact_gap=settings.OPTIFUSE_EXACT_SKIP_GAP or None,
+                profile=profile,
+            )
+    if profile and settings.OPTIFUSE_PROFILE_DUMP_DIR:
+        path = dump_application(app, settings.OPTIFUSE_PROFILE_DUMP_DIR)
+        if path:
+            print(f"Profiled run; application dumped to {path}")
+            for result in results:
+                if result.get('profile'):
+                    result['profile']['replay'] = os.path.basename(path)
+    return results
+
+
+_solver_executor = None
+_solver_executor_lock = threading.Lock()
+
+
+def get_solver_executor() -> ThreadPoolExecutor:
+    """
+    Threads the async view hands `solve` to. Sized so every request the
+    scheduler can hold (running or queued) gets a thread, leaving shedding and
+    priorities to the scheduler instead of the executor's FIFO queue.
+    """
+    global _solver_executor
+    with _solver_executor_lock:
+        if _solver_executor is None:
+            scheduler = get_scheduler()
+            workers = scheduler.total_slots + sum(p.max_queue for p in scheduler.policies.values())
+            _solver_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='optifuse-solver')
+        return _solver_executor
+
+
+def error_payload(exc: Exception) -> tuple[dict, int, dict]:
+    """Maps a pipeline failure to (body, status code, extra headers)."""
+    if isinstance(exc, SchedulerBusy):
+        return ({'error': str(exc), 'retryAfter': exc.retry_after}, status.HTTP_429_TOO_MANY_REQUESTS,
+                {'Retry-After': str(exc.retry_after)})
+
+    if isinstance(exc, FileNotFoundError):
+        return {'error': f"{exc} not found in the specified repository."}, status.HTTP_404_NOT_FOUND, {}
+
+    # httpx and botocore are imported lazily; if they are not loaded, exc cannot be one of theirs.
+    httpx = loaded_module('httpx')
+    botocore_exceptions = loaded_module('botocore.exceptions')
+
+    if isinstance(exc, requests.exceptions.HTTPError) or (httpx and isinstance(exc, httpx.HTTPStatusError)):
+        status_code = exc.response.status_code if exc.response is not None else 500
+        if status_code == 404:
+            error_message = "serverless.yml not found in the specified repository."
+        else:
+            error_message = "Failed to fetch file from GitHub."
+        details = exc.response.text if exc.response is not None else str(exc)
+        return {'error': error_message, 'details': details}, status_code, {}
+
+    if isinstance(exc, ValueError):
+        # Catches errors from our builder/parser logic
+        return {'error': str(exc)}, status.HTTP_400_BAD_REQUEST, {}
+
+    if botocore_exceptions and isinstance(exc, botocore_exceptions.ClientError):
+        # Catches specific AWS/boto3 errors
+        error_response = exc.response
+        error_code = error_response.get('Error', {}).get('Code', 'Unknown')
+        error_message = error_response.get('Error', {}).get('Message', 'No details from AWS.')
+        return ({'error': 'An error occurred while communicating with AWS.',
+                 'details': f"{error_code}: {error_message}"}, status.HTTP_500_INTERNAL_SERVER_ERROR, {})
+
+    # A final catch-all for any other unexpected errors
+    print(f"UNEXPECTED ERROR: {exc}") # Log the full error for debugging
+    return ({'error': 'An unexpected internal server error occurred.', 'details': str(exc)},
+            status.HTTP_500_INTERNAL_SERVER_ERROR, {})
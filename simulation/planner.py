@@ -0,0 +1,164 @@
+# Deadline-driven choice of which algorithms of the suite to run
+import json
+import math
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+from django.conf import settings
+
+from .core.structures import Application
+
+# Predictions are multiplied by this before being charged against the deadline.
+SAFETY_FACTOR = 1.5
+
+# Ridge penalty of the least-squares fit; N and E are nearly collinear in trees.
+RIDGE = 1e-3
+
+
+def app_features(app: Application) -> tuple[int, int, int]:
+    """(functions, call edges, critical-path length), the inputs of a RuntimeModel."""
+    return len(app.functions), sum(len(f.children) for f in app.functions), len(app.critical_path_ids)
+
+
+def _terms(n: int, e: int, l: int) -> list[float]:
+    return [1.0, math.log(max(n, 1)), math.log(e + 1), math.log(max(l, 1))]
+
+
+@dataclass(frozen=True)
+class RuntimeModel:
+    """
+    Predicted runtime of one algorithm as a power law of the application's
+    size: log(ms) = intercept + n * log(N) + e * log(E + 1) + l * log(L), with
+    N functions, E call edges and a critical path of L functions.
+    """
+    intercept: float
+    n: float
+    e: float
+    l: float
+    samples: int = 0
+
+    def predict(self, n: int, e: int, l: int) -> float:
+        """Predicted runtime in milliseconds."""
+        coefficients = (self.intercept, self.n, self.e, self.l)
+        return math.exp(sum(c * t for c, t in zip(coefficients, _terms(n, e, l))))
+
+    def to_dict(self) -> dict:
+        return {'intercept': self.intercept, 'n': self.n, 'e': self.e, 'l': self.l, 'samples': self.samples}
+
+
+def fit_runtime_model(samples: Iterable[tuple[int, int, int, float]]) -> Optional[RuntimeModel]:
+    """
+    Least-squares fit of a RuntimeModel to (N, E, L, runtime ms) samples, by
+    solving the (ridge-regularised) normal equations. None without samples.
+    """
+    rows = [(_terms(n, e, l), math.log(max(ms, 1e-3))) for n, e, l, ms in samples]
+    if not rows:
+        return None
+    size = 4
+    # Augmented matrix [X^T X + ridge I | X^T y], solved by Gaussian elimination with partial pivoting
+    matrix = [[sum(x[i] * x[j] for x, _ in rows) + (RIDGE if i == j else 0.0) for j in range(size)]
+              + [sum(x[i] * y for x, y in rows)] for i in range(size)]
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda r: abs(matrix[r][col]))
+        matrix[col], matrix[pivot] = matrix[pivot], matrix[col]
+        for r in range(size):
+            if r != col:
+                factor = matrix[r][col] / matrix[col][col]
+                matrix[r] = [a - factor * b for a, b in zip(matrix[r], matrix[col])]
+    intercept, n, e, l = (matrix[i][size] / matrix[i][i] for i in range(size))
+    return RuntimeModel(intercept, n, e, l, samples=len(rows))
+
+
+# Fitted with `manage.py fit_runtime_models --benchmark --max-seconds 5` on the benchmark generator's trees
+DEFAULT_RUNTIME_MODELS = {
+    'no_fusion': RuntimeModel(-5.03, 0.47, 0.47, 0.01, samples=36),
+    'singleton': RuntimeModel(-5.58, 0.45, 0.45, 0.02, samples=36),
+    'min_w_cut_heuristic': RuntimeModel(-7.20, 0.91, 0.91, 0.03, samples=36),
+    'greedy_tree_partitioning': RuntimeModel(-5.79, 0.88, 0.88, -0.60, samples=36),
+    'costless_csp': RuntimeModel(-3.12, 0.25, 0.25, 0.59, samples=36),
+    'mtx_ilp': RuntimeModel(0.45, 0.54, 0.54, -0.23, samples=36),
+    'pareto_frontier': RuntimeModel(-4.17, 0.48, 0.48, 0.79, samples=32),
+    'multilevel_partitioning': RuntimeModel(-2.93, 0.42, 0.42, 0.44, samples=36),
+}
+
+_runtime_models = None
+
+
+def runtime_models() -> dict[str, RuntimeModel]:
+    """
+    DEFAULT_RUNTIME_MODELS, overridden per algorithm by the JSON file named in
+    settings.OPTIFUSE_RUNTIME_MODELS (as written by fit_runtime_models), if any.
+    """
+    global _runtime_models
+    if _runtime_models is None:
+        models = dict(DEFAULT_RUNTIME_MODELS)
+        path = getattr(settings, 'OPTIFUSE_RUNTIME_MODELS', '')
+        if path:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    models.update({name: RuntimeModel(**model) for name, model in json.load(f).items()})
+            except (OSError, ValueError, TypeError) as e:
+                print(f"WARNING: Could not load runtime models from {path}: {e}")
+        _runtime_models = models
+    return _runtime_models
+
+
+@dataclass
+class AlgorithmPlan:
+    """
+    Which algorithms to run within a deadline, in order, with the time limits
+    handed to the time-limited ones; `predicted` holds each candidate's
+    predicted runtime (ms) and `skipped` the reason each left-out one was.
+    """
+    algorithms: list[str] = field(default_factory=list)
+    time_limits: dict[str, int] = field(default_factory=dict)
+    predicted: dict[str, float] = field(default_factory=dict)
+    skipped: dict[str, str] = field(default_factory=dict)
+
+
+def plan_algorithms(app: Application, deadline: float, algorithms: list[str], time_limited: set[str],
+                    time_limits: Optional[dict[str, int]] = None,
+                    models: Optional[dict[str, RuntimeModel]] = None) -> AlgorithmPlan:
+    """
+    Picks the algorithms to run within `deadline` seconds. The others go
+    first, cheapest predicted runtime first, each charged SAFETY_FACTOR times
+    its prediction while the budget lasts. The `time_limited` ones then share
+    what is left (capped at their `time_limits`), each charged its whole
+    limit, and are skipped if their share is less than SAFETY_FACTOR times
+    their predicted solve time. Algorithms without a model are always run and
+    charged nothing beyond their time limit.
+    """
+    models = runtime_models() if models is None else models
+    time_limits = time_limits or {}
+    features = app_features(app)
+    plan = AlgorithmPlan()
+    for name in algorithms:
+        if name in models:
+            plan.predicted[name] = models[name].predict(*features)
+
+    remaining = deadline * 1000
+    unlimited = sorted((name for name in algorithms if name not in time_limited),
+                       key=lambda name: plan.predicted.get(name, 0.0))
+    for name in unlimited:
+        charge = plan.predicted.get(name, 0.0) * SAFETY_FACTOR
+        if charge <= remaining:
+            plan.algorithms.append(name)
+            remaining -= charge
+        else:
+            plan.skipped[name] = (f"Predicted to take {plan.predicted[name]:.0f} ms; "
+                                  f"{max(remaining, 0):.0f} ms of the {deadline:g} s deadline were left.")
+
+    limited = sorted((name for name in algorithms if name in time_limited), key=lambda name: plan.predicted.get(name, 0.0))
+    for i, name in enumerate(limited):
+        share = remaining / (len(limited) - i)
+        limit = min(int(share // 1000), time_limits.get(name, math.inf))
+        needed = plan.predicted.get(name, 0.0) * SAFETY_FACTOR
+        if limit >= 1 and needed <= limit * 1000:
+            plan.algorithms.append(name)
+            plan.time_limits[name] = limit
+            remaining -= limit * 1000
+        elif limit < 1:
+            plan.skipped[name] = f"Less than the minimum 1 s time limit was left of the {deadline:g} s deadline."
+        else:
+            plan.skipped[name] = (f"Predicted to need {plan.predicted[name]:.0f} ms to solve; "
+                                  f"only {limit * 1000} ms could be given to it.")
+    return plan
@@ -1,51 +1,204 @@
 # simulation/runner.py
 
-from .core.structures import Application
-from .algorithms import heuristics, optimal
+import time
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from .core.builder import ApplicationBuilder
+from .core.structures import Application, LambdaFunction
+from .algorithms import heuristics, optimal, pareto, multilevel
+from .algorithms.bounds import lower_bound, optimality_gap
+from .planner import plan_algorithms
+from .utils.profiling import get_profile_executor, profiled_call, reset_profile_executor
 # We need to install pulp for the optimal algorithm
 # Run: pip install pulp
 # Then: pip freeze > requirements.txt
 
-def run_all_simulations(app: Application) -> list:
+# All the algorithm functions we can run, keyed by their function name
+ALGORITHMS = {
+    'no_fusion': heuristics.no_fusion,
+    'singleton': heuristics.singleton,
+    'min_w_cut_heuristic': heuristics.min_w_cut_heuristic,
+    'greedy_tree_partitioning': heuristics.greedy_tree_partitioning,
+    'costless_csp': heuristics.costless_csp,
+    'mtx_ilp': optimal.mtx_ilp,
+    'mtx_ilp_portfolio': optimal.mtx_ilp_portfolio,
+    'pareto_frontier': pareto.pareto_frontier,
+    'multilevel_partitioning': multilevel.multilevel_partitioning,
+}
+
+# The name each algorithm reports in its results (and AlgorithmResult.name)
+RESULT_NAMES = {
+    'no_fusion': 'NoFusion',
+    'singleton': 'Singleton',
+    'min_w_cut_heuristic': 'MinWCut Heuristic',
+    'greedy_tree_partitioning': 'Greedy TP (GrTP)',
+    'costless_csp': 'Costless (CSP)',
+    'mtx_ilp': 'MtxILP (Optimal)',
+    'mtx_ilp_portfolio': 'MtxILP (Portfolio)',
+    'pareto_frontier': 'Pareto Frontier',
+    'multilevel_partitioning': 'Multilevel',
+}
+
+# Algorithms only run when asked for (a tier's `algorithms`, or simulate_batch's
+# --algorithms): mtx_ilp_portfolio solves the same problem as mtx_ilp with one
+# process per configuration, and pareto_frontier and multilevel_partitioning
+# would add their solves to every live run
+OPT_IN_ALGORITHMS = {'mtx_ilp_portfolio', 'pareto_frontier', 'multilevel_partitioning'}
+
+# The suite run when none is given
+DEFAULT_ALGORITHMS = [name for name in ALGORITHMS if name not in OPT_IN_ALGORITHMS]
+
+# Algorithms that accept a `time_limit` (seconds) keyword
+TIME_LIMITED_ALGORITHMS = {'mtx_ilp', 'mtx_ilp_portfolio'}
+
+# Algorithms run to learn how far the others are from optimal, which exact_gap can skip
+EXACT_ALGORITHMS = {'mtx_ilp', 'mtx_ilp_portfolio'}
+
+# Algorithms that accept a `warm_start` plan (groups of LambdaFunctions) keyword
+WARM_STARTABLE_ALGORITHMS = {'mtx_ilp', 'mtx_ilp_portfolio'}
+
+
+def run_all_simulations(app: Application, algorithms: Optional[list[str]] = None,
+                        time_limits: Optional[dict[str, int]] = None,
+                        warm_start: Optional[list[list[LambdaFunction]]] = None,
+                        deadline: Optional[float] = None, profile: bool = False,
+                        exact_gap: Optional[float] = None) -> list:
     """
     Runs a suite of fusion algorithms on a given application and returns the results.
     This function orchestrates the execution of all defined algorithms.
+    `algorithms` restricts the suite to the given names (default: DEFAULT_ALGORITHMS),
+    `time_limits` caps the solve time of the time-limited ones and `warm_start`
+    is handed to the ones that can start from a known feasible plan.
+    With a `deadline` (seconds), planner.plan_algorithms picks the algorithms
+    that are predicted to fit and splits the budget; the others, and any left
+    when the deadline passes, are reported as skipped results with the reason.
+    With `profile`, each algorithm runs under utils.profiling.profiled_call in
+    a profiling worker process (see _profiled_run) and its result carries the
+    profile (its runtime then includes the overhead).
+    Every result gets a 'gap': the share of its cost that may be above the
+    optimum, against bounds.lower_bound (raised to the cost of an exact
+    pareto_frontier result); None if infeasible or if the bound could not be
+    computed (see _lower_bound). With `exact_gap`, the
+    EXACT_ALGORITHMS are skipped once a feasible result's gap is within it.
     """
     # A list of all the algorithm functions we want to run
-    algorithms_to_run = [
-        heuristics.no_fusion,
-        heuristics.singleton,
-        heuristics.min_w_cut_heuristic,
-        heuristics.greedy_tree_partitioning,
-        heuristics.costless_csp,
-        optimal.mtx_ilp,
-    ]
+    algorithms_to_run = algorithms if algorithms is not None else list(DEFAULT_ALGORITHMS)
+    time_limits = time_limits or {}
 
     results = []
-    for alg_func in algorithms_to_run:
+    bound = _lower_bound(app)
+    plan = None
+    if deadline is not None:
+        plan = plan_algorithms(app, deadline, algorithms_to_run, TIME_LIMITED_ALGORITHMS, time_limits)
+        algorithms_to_run, time_limits = plan.algorithms, {**time_limits, **plan.time_limits}
+        for alg_name, reason in plan.skipped.items():
+            results.append(_skipped_result(alg_name, reason))
+    start_time = time.monotonic()
+
+    for alg_name in algorithms_to_run:
+        if plan is not None and time.monotonic() - start_time >= deadline:
+            results.append(_skipped_result(alg_name, f"The {deadline:g} s deadline had passed."))
+            continue
+        if exact_gap is not None and bound is not None and alg_name in EXACT_ALGORITHMS:
+            near_optimal = _best_within(results, bound, exact_gap)
+            if near_optimal is not None:
+                results.append(_skipped_result(alg_name, (
+                    f"{near_optimal['name']} is provably within {optimality_gap(near_optimal['cost'], bound):.2%} "
+                    f"of the optimal cost.")))
+                continue
+        alg_func = ALGORITHMS[alg_name]
         try:
-            # We get the function's name for clear labeling in the results
-            func_name = getattr(alg_func, '__name__', 'Unknown Algorithm')
-            
+            kwargs = {}
+            if alg_name in TIME_LIMITED_ALGORITHMS and alg_name in time_limits:
+                kwargs['time_limit'] = time_limits[alg_name]
+            if alg_name in WARM_STARTABLE_ALGORITHMS and warm_start:
+                kwargs['warm_start'] = warm_start
+
             # Execute the algorithm function, passing the Application object
-            result = alg_func(app)
-            
+            if profile:
+                result, run_profile = _profiled_run(alg_name, app, kwargs)
+                result['profile'] = run_profile
+            else:
+                result = alg_func(app, **kwargs)
+
             # Ensure the result has a name, even if the function didn't provide one
             if 'name' not in result:
-                result['name'] = func_name.replace('_', ' ').title()
-                
+                result['name'] = _result_name(alg_name)
+
             results.append(result)
+            if result.get('exact') and result.get('feasible'):
+                bound = result['cost'] if bound is None else max(bound, result['cost'])
         except Exception as e:
             # If any algorithm crashes, we catch the error and report it
             # without stopping the entire simulation.
-            func_name = getattr(alg_func, '__name__', 'Unknown Algorithm')
             results.append({
-                'name': func_name.replace('_', ' ').title(),
+                'name': _result_name(alg_name),
                 'feasible': False,
                 'error': f"Algorithm failed with exception: {e}"
             })
-            
+
     # Sort the results for a clean presentation: feasible solutions first, then by cost
+    for result in results:
+        result['gap'] = optimality_gap(result.get('cost'), bound) if result.get('feasible') and bound is not None else None
     results.sort(key=lambda x: (not x.get('feasible', False), x.get('cost', float('inf'))))
-    
-    return results
\ No newline at end of file
+
+    return results
+
+
+def _lower_bound(app: Application) -> Optional[float]:
+    """bounds.lower_bound, or None if it fails; the gaps are extra, so they must not cost the suite its results."""
+    try:
+        return lower_bound(app)
+    except Exception as e:
+        print(f"WARNING: Could not compute the lower bound for {app.name}: {e}")
+        return None
+
+
+def _best_within(results: list, bound: float, gap: float) -> Optional[dict]:
+    """The cheapest feasible result so far if its optimality gap is at most `gap`."""
+    feasible = [r for r in results if r.get('feasible')]
+    if not feasible:
+        return None
+    best = min(feasible, key=lambda r: r['cost'])
+    best_gap = optimality_gap(best['cost'], bound)
+    return best if best_gap is not None and best_gap <= gap else None
+
+
+def _profiled_algorithm(alg_name: str, app_name: str, function_ids: list[str], inputs: dict,
+                        kwargs: dict) -> tuple[dict, dict]:
+    """Worker side of _profiled_run: rebuilds the application and profiles one algorithm, groups as IDs."""
+    app = ApplicationBuilder.create_from_inputs(app_name, function_ids, inputs)
+    if kwargs.get('warm_start'):
+        kwargs = {**kwargs, 'warm_start': [[app.functions_map[fid] for fid in group] for group in kwargs['warm_start']]}
+    result, run_profile = profiled_call(ALGORITHMS[alg_name], app, **kwargs)
+    result['groups'] = [[m if isinstance(m, str) else m.id for m in group] for group in result.get('groups') or []]
+    return result, run_profile
+
+
+def _profiled_run(alg_name: str, app: Application, kwargs: dict) -> tuple[dict, dict]:
+    """
+    profiled_call of one algorithm in a profiling worker process, so that
+    tracemalloc neither slows down nor counts the server's other threads.
+    The application and warm start travel as snapshots (function IDs).
+    """
+    if kwargs.get('warm_start'):
+        kwargs = {**kwargs, 'warm_start': [[f.id for f in group] for group in kwargs['warm_start']]}
+    future = get_profile_executor().submit(_profiled_algorithm, alg_name, app.name, [f.id for f in app.functions],
+                                           ApplicationBuilder.inputs_of(app), kwargs)
+    try:
+        result, run_profile = future.result()
+    except BrokenProcessPool:
+        reset_profile_executor()
+        raise
+    result['groups'] = [[app.functions_map[fid] for fid in group] for group in result['groups']]
+    return result, run_profile
+
+
+def _result_name(alg_name: str) -> str:
+    """The name results of `alg_name` are reported (and stored) under, whether it succeeded, crashed or was skipped."""
+    return RESULT_NAMES.get(alg_name, alg_name.replace('_', ' ').title())
+
+
+def _skipped_result(alg_name: str, reason: str) -> dict:
+    return {'name': _result_name(alg_name), 'feasible': False,
+            'skipped': True, 'error': f"Skipped: {reason}"}
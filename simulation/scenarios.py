@@ -0,0 +1,183 @@
+# What-if evaluation of fusion plans under several load profiles
+import math
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from .core.structures import Application, LambdaFunction
+from .runner import run_all_simulations
+from .utils.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# $ per GB-second, as in LambdaFunction/CompositeFunction.get_execution_cost
+GB_SECOND_PRICE = 0.00001667
+
+OBJECTIVES = ('expected', 'worst')
+
+
+@dataclass
+class Scenario:
+    """
+    A load profile: the load_factor each function runs at. Functions missing
+    from `load_factors` use `default`, or keep their current load_factor when
+    `default` is None.
+    """
+    name: str
+    load_factors: dict[str, float] = field(default_factory=dict)
+    default: Optional[float] = None
+
+
+def runtime_matrix(app: Application, scenarios: list[Scenario]) -> 'np.ndarray':
+    """(scenarios x functions) runtimes, truncated like LambdaFunction.runtime."""
+    position = {f.id: i for i, f in enumerate(app.functions)}
+    current = np.array([f.load_factor for f in app.functions], dtype=float)
+    loads = np.empty((len(scenarios), len(app.functions)))
+    for row, scenario in enumerate(scenarios):
+        loads[row] = current if scenario.default is None else scenario.default
+        for fid, factor in scenario.load_factors.items():
+            if fid in position:
+                loads[row, position[fid]] = factor
+    baseline = np.array([f.baseline_runtime for f in app.functions], dtype=float)
+    return np.trunc(baseline * loads)
+
+
+def _plan_columns(app: Application, groups: list[list]) -> Optional[tuple['np.ndarray', float, int, bool]]:
+    """
+    For one plan: the memory of each function's group (aligned with
+    app.functions), its transfer cost, critical-path hops and memory
+    feasibility. None if the plan does not cover every function.
+    """
+    func_map = app.functions_map
+    group_of, group_memory = {}, []
+    for idx, group in enumerate(groups):
+        members = [func_map[m] if isinstance(m, str) else m for m in group]
+        group_memory.append(sum(f.memory for f in members))
+        for f in members:
+            group_of[f.id] = idx
+    if len(group_of) != len(app.functions):
+        return None
+
+    memory_of_group = np.array([group_memory[group_of[f.id]] for f in app.functions], dtype=float)
+    transfer_cost = sum(func.get_data_transfer_cost(child.id)
+                        for func in app.functions for child in func.children
+                        if group_of[func.id] != group_of[child.id])
+    critical = app.critical_path_ids
+    hops = sum(1 for u, v in zip(critical, critical[1:])
+               if u in group_of and v in group_of and group_of[u] != group_of[v])
+    return memory_of_group, transfer_cost, hops, max(group_memory, default=0) <= app.max_memory
+
+
+def evaluate_plans(app: Application, results: list[dict], scenarios: list[Scenario]) -> dict[str, Any]:
+    """
+    Evaluates every plan in `results` (as returned by run_all_simulations;
+    groups of LambdaFunctions or IDs) under every scenario in one pass.
+
+    Load factors only scale runtimes, so memory feasibility, transfer cost and
+    network hops are per plan, and the per-scenario parts reduce to matrix
+    products: execution cost = price * R @ W, where R holds the scenario
+    runtimes and W[f, p] the memory of f's group in plan p; the critical-path
+    runtime is R @ c for the critical-path indicator c.
+
+    Returns 'cost', 'latency' (float) and 'feasible' (bool) arrays of shape
+    (plans x scenarios), in the order of `results` and `scenarios`. Plans that
+    do not cover every function get NaN and are infeasible.
+    """
+    runtimes = runtime_matrix(app, scenarios)
+    n_plans, n_functions = len(results), len(app.functions)
+    weights = np.zeros((n_functions, n_plans))
+    transfer = np.full(n_plans, np.nan)
+    hops = np.full(n_plans, np.nan)
+    mem_feasible = np.zeros(n_plans, dtype=bool)
+    for p, result in enumerate(results):
+        columns = _plan_columns(app, result.get('groups') or [])
+        if columns is not None:
+            weights[:, p], transfer[p], hops[p], mem_feasible[p] = columns
+
+    position = {f.id: i for i, f in enumerate(app.functions)}
+    critical = np.zeros(n_functions)
+    for fid in app.critical_path_ids:
+        if fid in position:
+            critical[position[fid]] = 1.0
+
+    # (plans x scenarios)
+    cost = (GB_SECOND_PRICE / (1024 * 1000)) * (runtimes @ weights).T + transfer[:, None]
+    latency = (runtimes @ critical)[None, :] + (hops * app.network_hop_delay)[:, None]
+    feasible = mem_feasible[:, None] & (latency <= app.max_latency)
+    return {
+        'scenarios': [s.name for s in scenarios],
+        'plans': [r.get('name', 'Unknown Algorithm') for r in results],
+        'cost': cost,
+        'latency': latency,
+        'feasible': feasible,
+    }
+
+
+def _surrogate_application(app: Application, scenarios: list[Scenario]) -> Application:
+    """
+    A copy of `app` whose runtimes are the scenario means and whose latency
+    budget is reduced by how much the slowest scenario's critical path exceeds
+    the mean one, rounded down to whole ms like every other budget. Any plan
+    feasible for the copy is feasible in every scenario, and its cost is the
+    expected cost across scenarios.
+    """
+    runtimes = runtime_matrix(app, scenarios)
+    mean = runtimes.mean(axis=0)
+    position = {f.id: i for i, f in enumerate(app.functions)}
+    critical = [position[fid] for fid in app.critical_path_ids if fid in position]
+    worst_excess = (runtimes[:, critical].sum(axis=1) - mean[critical].sum()).max() if critical else 0.0
+
+    # Rounded up, so truncation cannot make the copy's critical path look shorter.
+    copies = {f.id: LambdaFunction(id=f.id, name=f.name, memory=f.memory, baseline_runtime=int(np.ceil(mean[i])))
+              for i, f in enumerate(app.functions)}
+    for f in app.functions:
+        for child in f.children:
+            copies[f.id].add_child(copies[child.id], f.data_out_edges.get(child.id, 0))
+    return Application(
+        name=app.name,
+        functions=list(copies.values()),
+        critical_path_ids=list(app.critical_path_ids),
+        max_memory=app.max_memory,
+        max_latency=math.floor(app.max_latency - math.ceil(worst_excess)),
+        network_hop_delay=app.network_hop_delay,
+    )
+
+
+def find_robust_plan(app: Application, scenarios: list[Scenario], results: Optional[list[dict]] = None,
+                     objective: str = 'expected', algorithms: Optional[list[str]] = None,
+                     time_limits: Optional[dict[str, int]] = None) -> dict[str, Any]:
+    """
+    Picks the plan that is feasible in every scenario with the lowest expected
+    (mean) or worst-case cost. Candidates are the given `results` plus the
+    suite's plans for a surrogate application (see _surrogate_application), so
+    a robust plan is found even when no single-scenario plan is feasible
+    everywhere. Returns the evaluation of all candidates and 'robust', the
+    index of the chosen candidate (None if none is feasible everywhere).
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {', '.join(OBJECTIVES)}.")
+    candidates = list(results or [])
+
+    func_map = app.functions_map
+    for result in run_all_simulations(_surrogate_application(app, scenarios), algorithms=algorithms,
+                                      time_limits=time_limits):
+        if result.get('groups'):
+            # Map the surrogate's functions back onto the application's own.
+            groups = [[func_map[f.id] for f in group] for group in result['groups']]
+            candidates.append({**result, 'name': f"{result['name']} (robust)", 'groups': groups})
+
+    evaluation = evaluate_plans(app, candidates, scenarios)
+    everywhere = evaluation['feasible'].all(axis=1)
+    score = evaluation['cost'].mean(axis=1) if objective == 'expected' else evaluation['cost'].max(axis=1)
+    robust = int(np.argmin(np.where(everywhere, score, np.inf))) if everywhere.any() else None
+    return {**evaluation, 'candidates': candidates, 'robust': robust, 'objective': objective}
+
+
+def evaluation_rows(evaluation: dict[str, Any]) -> list[dict[str, Any]]:
+    """Per-plan JSON rows of an evaluation, with NaN (uncovered plans) as None."""
+    def clean(row):
+        return [float(x) if np.isfinite(x) else None for x in row]
+    return [
+        {'name': name, 'cost': clean(cost), 'latency': clean(latency), 'feasible': feasible.tolist()}
+        for name, cost, latency, feasible in zip(evaluation['plans'], evaluation['cost'],
+                                                 evaluation['latency'], evaluation['feasible'])
+    ]
@@ -0,0 +1,166 @@
+# Admission control in front of the solver runner
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Optional
+from django.conf import settings
+
+from .runner import DEFAULT_ALGORITHMS
+
+
+@dataclass(frozen=True)
+class TierPolicy:
+    """Scheduling and algorithm budget for one subscription tier."""
+    priority: int  # Lower runs first
+    max_concurrent: int  # Solves of this tier running at the same time
+    max_queue: int  # Waiting requests before new ones are shed
+    max_wait: float  # Seconds a request may wait for a slot
+    ilp_time_limit: int  # Seconds given to mtx_ilp (and mtx_ilp_portfolio)
+    deadline: Optional[float] = None  # Seconds for the whole suite; see planner.plan_algorithms
+    algorithms: list[str] = field(default_factory=lambda: list(DEFAULT_ALGORITHMS))
+    retry_after: int = 10  # Seconds suggested to shed clients
+    max_sweep_points: int = 200  # Grid points of one constraint sweep; see sweep.sweep_grid
+
+
+HEURISTICS = ['no_fusion', 'singleton', 'min_w_cut_heuristic', 'greedy_tree_partitioning', 'costless_csp']
+
+DEFAULT_TIER_POLICIES = {
+    'FREE': TierPolicy(priority=2, max_concurrent=1, max_queue=4, max_wait=30, ilp_time_limit=5, deadline=10,
+                       algorithms=HEURISTICS + ['mtx_ilp'], retry_after=30, max_sweep_points=10),
+    'PRO': TierPolicy(priority=1, max_concurrent=4, max_queue=16, max_wait=60, ilp_time_limit=30, deadline=45,
+                      max_sweep_points=50),
+    'ENTERPRISE': TierPolicy(priority=0, max_concurrent=8, max_queue=32, max_wait=90, ilp_time_limit=60, deadline=90),
+}
+
+
+class SchedulerBusy(Exception):
+    """Raised when a request is shed because its tier's queue is full or it waited too long."""
+    def __init__(self, tier: str, retry_after: int):
+        super().__init__(f"Solver capacity for tier {tier} is exhausted; retry in {retry_after}s.")
+        self.tier = tier
+        self.retry_after = retry_after
+
+
+class SolverScheduler:
+    """
+    Per-process admission control for solver runs.
+
+    `total_slots` solves run at once across all tiers, and each tier is further
+    capped by its policy's max_concurrent. Waiting requests form a single
+    priority queue ordered by (tier priority, arrival); whenever a slot frees,
+    the first waiter whose tier is under its cap is admitted, so a burst of FREE
+    requests can never hold more than FREE's share of the slots. Requests are
+    shed with SchedulerBusy when their tier's queue is full or max_wait expires.
+    """
+
+    def __init__(self, total_slots: int, policies: dict[str, TierPolicy]):
+        self.total_slots = total_slots
+        self.policies = policies
+        self._cond = threading.Condition()
+        self._running = 0
+        self._running_by_tier = {tier: 0 for tier in policies}
+        self._queued_by_tier = {tier: 0 for tier in policies}
+        self._waiting = []
+        self._seq = itertools.count()
+
+    def policy_for(self, tier: str) -> TierPolicy:
+        return self.policies.get(tier, self.policies['FREE'])
+
+    def _next_admissible(self) -> Optional[tuple]:
+        if self._running >= self.total_slots:
+            return None
+        for ticket in sorted(self._waiting):
+            tier = ticket[2]
+            if self._running_by_tier[tier] < self.policy_for(tier).max_concurrent:
+                return ticket
+        return None
+
+    def _leave_queue(self, ticket: tuple):
+        self._waiting.remove(ticket)
+        self._queued_by_tier[ticket[2]] -= 1
+
+    @contextmanager
+    def slot(self, tier: str):
+        """Blocks until a solver slot is granted for `tier`, yielding its TierPolicy."""
+        tier = tier if tier in self.policies else 'FREE'
+        policy = self.policy_for(tier)
+        with self._cond:
+            if self._queued_by_tier[tier] >= policy.max_queue:
+                raise SchedulerBusy(tier, policy.retry_after)
+            ticket = (policy.priority, next(self._seq), tier)
+            self._waiting.append(ticket)
+            self._queued_by_tier[tier] += 1
+
+            deadline = time.monotonic() + policy.max_wait
+            while self._next_admissible() != ticket:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._leave_queue(ticket)
+                    self._cond.notify_all()
+                    raise SchedulerBusy(tier, policy.retry_after)
+                self._cond.wait(remaining)
+
+            self._leave_queue(ticket)
+            self._running += 1
+            self._running_by_tier[tier] += 1
+            # Another waiter may be admissible now that this one left the queue.
+            self._cond.notify_all()
+        try:
+            yield policy
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._running_by_tier[tier] -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def extra_slots(self, tier: str, wanted: int):
+        """
+        Up to `wanted` more slots for a request that already holds one (e.g. a
+        sweep spreading its points over worker processes). Only slots that are
+        free now are taken, within the tier's max_concurrent, and none while
+        other requests are waiting; yields how many were granted.
+        """
+        tier = tier if tier in self.policies else 'FREE'
+        with self._cond:
+            granted = 0
+            if not self._waiting:
+                granted = max(0, min(wanted, self.total_slots - self._running,
+                                     self.policy_for(tier).max_concurrent - self._running_by_tier[tier]))
+            self._running += granted
+            self._running_by_tier[tier] += granted
+        try:
+            yield granted
+        finally:
+            if granted:
+                with self._cond:
+                    self._running -= granted
+                    self._running_by_tier[tier] -= granted
+                    self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'running': self._running,
+                'running_by_tier': dict(self._running_by_tier),
+                'queued_by_tier': dict(self._queued_by_tier),
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> SolverScheduler:
+    """The process-wide scheduler, built from settings on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            policies = dict(DEFAULT_TIER_POLICIES)
+            for tier, overrides in getattr(settings, 'OPTIFUSE_TIER_POLICIES', {}).items():
+                base = policies.get(tier, DEFAULT_TIER_POLICIES['FREE'])
+                policies[tier] = TierPolicy(**{**base.__dict__, **overrides})
+            _scheduler = SolverScheduler(getattr(settings, 'OPTIFUSE_SOLVER_SLOTS', 4), policies)
+        return _scheduler
@@ -0,0 +1,220 @@
+# Constraint sweeps: one stored application solved over a grid of constraints
+import itertools
+import math
+import multiprocessing
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Optional
+from django.conf import settings
+
+from .core.builder import ApplicationBuilder
+from .core.structures import Application
+from .algorithms.metrics import calculate_metrics
+from .encoding import encode_results
+from .runner import run_all_simulations
+
+# Request keys (as in custom.optifuse.constraints) -> Application attributes
+CONSTRAINTS = {
+    'maxLatencyMS': 'max_latency',
+    'maxMemoryMB': 'max_memory',
+    'networkHopMS': 'network_hop_delay',
+}
+
+MAX_SWEEP_POINTS = 200
+
+
+def constraint_values(spec: Any, current: int, key: str) -> list[int]:
+    """
+    Values of one constraint in a sweep. `spec` is a number, a list of numbers,
+    or {start, stop, step} (stop included); None keeps the `current` value.
+    """
+    if spec is None:
+        return [current]
+    if isinstance(spec, dict):
+        try:
+            start, stop, step = int(spec['start']), int(spec['stop']), int(spec.get('step', 1))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"{key} range needs integer start and stop (and optionally step).")
+        if step <= 0 or stop < start:
+            raise ValueError(f"{key} range needs start <= stop and a positive step.")
+        if (stop - start) // step + 1 > MAX_SWEEP_POINTS:
+            raise ValueError(f"A sweep is limited to {MAX_SWEEP_POINTS} grid points.")
+        values = list(range(start, stop + 1, step))
+    else:
+        values = spec if isinstance(spec, list) else [spec]
+        if not values or any(isinstance(v, bool) or not isinstance(v, (int, float)) for v in values):
+            raise ValueError(f"{key} must be a number, a list of numbers or a {{start, stop, step}} range.")
+        values = [int(v) for v in values]
+    lowest = 0 if key == 'networkHopMS' else 1
+    if min(values) < lowest:
+        raise ValueError(f"{key} values must be at least {lowest}.")
+    return sorted(set(values))
+
+
+def sweep_grid(payload: dict, app: Application, max_points: int = MAX_SWEEP_POINTS) -> dict[str, list[int]]:
+    """
+    Constraint values per request key; constraints missing from `payload` keep
+    the application's. At most `max_points` grid points (the tier's
+    TierPolicy.max_sweep_points).
+    """
+    max_points = min(max_points, MAX_SWEEP_POINTS)
+    grid = {key: constraint_values(payload.get(key), getattr(app, attr), key) for key, attr in CONSTRAINTS.items()}
+    if math.prod(len(values) for values in grid.values()) > max_points:
+        raise ValueError(f"A sweep is limited to {max_points} grid points.")
+    return grid
+
+
+def _plan_profile(app: Application, groups: list[list[str]]) -> Optional[tuple[float, int, int]]:
+    """
+    (cost, largest group memory, critical hops) of a plan, or None if it does
+    not cover every function. None of it depends on the constraints, so only
+    a plan's feasibility varies across the grid.
+    """
+    index, functions = app.index, app.functions_map
+    group_of = [-1] * len(index)
+    for idx, group in enumerate(groups):
+        for fid in group:
+            group_of[index.position[fid]] = idx
+    if -1 in group_of:
+        return None
+    cost = calculate_metrics([[functions[fid] for fid in group] for group in groups], app)['cost']
+    largest = max(sum(functions[fid].memory for fid in group) for group in groups)
+    path = index.critical_positions
+    hops = sum(1 for u, v in zip(path, path[1:]) if group_of[u] != group_of[v])
+    return cost, largest, hops
+
+
+def _solve_line(name: str, function_ids: list[str], inputs: dict, max_memory: int, network_hop_delay: int,
+                latencies: list[int], algorithms: Optional[list[str]], time_limits: Optional[dict],
+                deadline: Optional[float] = None) -> list[list[dict]]:
+    """
+    Solves the grid points that share memory and hop delay, from the tightest
+    latency budget to the loosest. A plan feasible under a tighter budget is
+    feasible under every looser one, so each point's cheapest feasible plan
+    warm-starts the next. Each point is solved within `deadline` seconds (see
+    run_all_simulations). Runs in a worker process; returns the encoded
+    results per latency.
+    """
+    app = ApplicationBuilder.create_from_inputs(name, function_ids, inputs)
+    app.max_memory, app.network_hop_delay = max_memory, network_hop_delay
+    line, incumbent = [], None
+    for latency in latencies:
+        app.max_latency = latency
+        results = run_all_simulations(app, algorithms=algorithms, time_limits=time_limits, warm_start=incumbent,
+                                      deadline=deadline)
+        feasible = [r for r in results if r.get('feasible') and r.get('groups')]
+        if feasible:
+            incumbent = min(feasible, key=lambda r: r['cost'])['groups']
+        line.append(encode_results(results))
+    return line
+
+
+_sweep_executor = None
+_sweep_executor_lock = threading.Lock()
+
+
+def get_sweep_executor() -> Optional[ProcessPoolExecutor]:
+    """
+    Worker processes the grid lines are spread over (OPTIFUSE_SWEEP_WORKERS,
+    default OPTIFUSE_SOLVER_SLOTS; 0 solves in the calling thread). Spawned
+    rather than forked, so they do not inherit the server's threads and locks.
+    """
+    global _sweep_executor
+    workers = getattr(settings, 'OPTIFUSE_SWEEP_WORKERS', None)
+    if workers is None:
+        workers = getattr(settings, 'OPTIFUSE_SOLVER_SLOTS', 4)
+    if workers <= 0:
+        return None
+    with _sweep_executor_lock:
+        if _sweep_executor is None:
+            _sweep_executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return _sweep_executor
+
+
+def _reset_sweep_executor():
+    global _sweep_executor
+    with _sweep_executor_lock:
+        _sweep_executor = None
+
+
+def _finite(value):
+    return value if not isinstance(value, float) or math.isfinite(value) else None
+
+
+def _map_bounded(executor: ProcessPoolExecutor, fn, args: list[tuple], parallel: int) -> list:
+    """executor.map with at most `parallel` calls submitted at a time, in the order of `args`."""
+    results, pending, queued = [None] * len(args), {}, iter(enumerate(args))
+    for idx, a in itertools.islice(queued, parallel):
+        pending[executor.submit(fn, *a)] = idx
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            results[pending.pop(future)] = future.result()
+        for idx, a in itertools.islice(queued, len(done)):
+            pending[executor.submit(fn, *a)] = idx
+    return results
+
+
+def run_sweep(name: str, function_ids: list[str], inputs: dict, grid: dict[str, list[int]],
+              algorithms: Optional[list[str]] = None, time_limits: Optional[dict[str, int]] = None,
+              deadline: Optional[float] = None, parallel: int = 1) -> dict[str, Any]:
+    """
+    Runs the algorithm suite on every point of `grid` (see sweep_grid) for the
+    application snapshot `inputs` (history.application_inputs), each point
+    within `deadline` seconds. At most `parallel` grid lines are solved at
+    once; callers hold that many solver slots (SolverScheduler.extra_slots).
+
+    Plans are deduplicated into 'plans' (lists of function-ID groups) and
+    results refer to them by index. Because a plan's cost does not depend on
+    the constraints, every point also gets 'best': the cheapest plan found
+    anywhere in the sweep that is feasible at that point.
+    """
+    lines = [(memory, hop, grid['maxLatencyMS']) for memory in grid['maxMemoryMB'] for hop in grid['networkHopMS']]
+    args = [(name, function_ids, inputs, memory, hop, latencies, algorithms, time_limits, deadline)
+            for memory, hop, latencies in lines]
+    executor = get_sweep_executor()
+    if executor is None:
+        solved = [_solve_line(*a) for a in args]
+    else:
+        try:
+            solved = _map_bounded(executor, _solve_line, args, max(1, parallel))
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool next time.
+            _reset_sweep_executor()
+            raise
+
+    app = ApplicationBuilder.create_from_inputs(name, function_ids, inputs)
+    plans, plan_index, profiles = [], {}, []
+
+    def intern(groups: list[list[str]]) -> int:
+        key = tuple(sorted(tuple(sorted(group)) for group in groups))
+        if key not in plan_index:
+            plan_index[key] = len(plans)
+            plans.append(groups)
+            profiles.append(_plan_profile(app, groups))
+        return plan_index[key]
+
+    points = []
+    for (memory, hop, latencies), line in zip(lines, solved):
+        for latency, results in zip(latencies, line):
+            entries = []
+            for result in results:
+                entry = {k: _finite(v) for k, v in result.items() if k != 'groups'}
+                entry['plan'] = intern(result['groups']) if result.get('groups') else None
+                entries.append(entry)
+            points.append({'maxLatencyMS': latency, 'maxMemoryMB': memory, 'networkHopMS': hop, 'results': entries})
+
+    for point in points:
+        best = None
+        for idx, profile in enumerate(profiles):
+            if profile is None:
+                continue
+            cost, largest, hops = profile
+            latency = app.index.critical_runtime + hops * point['networkHopMS']
+            if largest <= point['maxMemoryMB'] and latency <= point['maxLatencyMS'] \
+                    and (best is None or cost < best['cost']):
+                best = {'plan': idx, 'cost': cost, 'latency': latency}
+        point['best'] = best
+
+    return {'grid': grid, 'points': points, 'plans': plans}
@@ -1,3 +1,1169 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import itertools
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Profile
+
+from .algorithms.bounds import lower_bound, optimality_gap
+from .algorithms.incremental import incremental_reoptimize
+from .algorithms.metrics import calculate_metrics
+from .algorithms.multilevel import multilevel_partitioning
+from .algorithms.optimal import _settles, mtx_ilp
+from .algorithms.pareto import pareto_frontier
+from .benchmarks.generator import generate_application
+from .coalesce import COALESCE_CACHE_ALIAS, _flights, _settings, single_flight
+from .connectors.report_logs import ingest_report_logs, scan_reports
+from .core.builder import ApplicationBuilder
+from .core.references import MAX_REFERENCE_DEPTH, resolve_file_references
+from .core.structures import Application, CompositeFunction, LambdaFunction
+from .encoding import (
+    MIN_COMPRESS_BYTES, decode_group_labels, dumps, encode_results, encode_results_compact, group_labels,
+)
+from .execution import simulate_execution
+from .history import application_hash, application_inputs, diff_plans, record_run, reoptimization_inputs
+from .connectors.aws import fetch_live_xray_data, fetch_live_xray_data_async, get_assumed_role_session
+from .loadtest.driver import parse_server_timing
+from .loadtest.stubs import StubConfig, StubServer, function_name
+from .planner import SAFETY_FACTOR, RuntimeModel, app_features, fit_runtime_model, plan_algorithms
+from .runner import DEFAULT_ALGORITHMS, TIME_LIMITED_ALGORITHMS, run_all_simulations
+from .scenarios import Scenario, _surrogate_application, evaluate_plans, find_robust_plan, runtime_matrix
+from .scheduler import DEFAULT_TIER_POLICIES, SchedulerBusy, SolverScheduler, TierPolicy
+from .sweep import _map_bounded, run_sweep, sweep_grid
+from .utils.lazy import HEAVY_MODULES
+from .utils.sketch import QuantileSketch
+from .utils.skyline import Skyline
+from .utils.timing import StageTimer
+
+# Sum of per-module self times reported by -X importtime for `manage.py check`
+IMPORT_TIME_BUDGET_US = 2_500_000
+
+
+class ImportTimeTests(SimpleTestCase):
+    def _import_times(self) -> dict[str, int]:
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', 'manage.py', 'check'],
+            cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True, timeout=120,
+        )
+        self.assertEqual(completed.returncode, 0, completed.stderr[-2000:])
+        times = {}
+        for line in completed.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, _, name = line[len('import time:'):].split('|')
+            times[name.strip()] = int(self_us)
+        return times
+
+    def test_check_does_not_load_heavy_stacks(self):
+        times = self._import_times()
+        self.assertIn('simulation.views', times)
+        loaded = [name for name in HEAVY_MODULES + ('matplotlib', 'networkx', 'botocore') if name in times]
+        self.assertEqual(loaded, [])
+        self.assertLess(sum(times.values()), IMPORT_TIME_BUDGET_US)
+
+
+class MetricsEpochTests(SimpleTestCase):
+    def test_changes_only_invalidate_their_own_application(self):
+        app, other = generate_application(20, seed=1), generate_application(20, seed=2)
+        index, group = app.index, CompositeFunction(app.functions[:3])
+        self.assertEqual(group.memory, sum(f.memory for f in app.functions[:3]))
+
+        other.functions[0].memory += 128
+        self.assertIs(app.index, index)
+
+        app.functions[1].memory += 128
+        self.assertIsNot(app.index, index)
+        self.assertEqual(app.index.subtree_memory[0], sum(f.memory for f in app.functions))
+        self.assertEqual(group.memory, sum(f.memory for f in app.functions[:3]))
+
+    def test_groups_across_applications_follow_both(self):
+        app, other = generate_application(5, seed=1), generate_application(5, seed=2)
+        group = CompositeFunction([app.functions[0], other.functions[0]])
+        runtime, changed = group.runtime, other.functions[0]
+        before = changed.runtime
+        changed.load_factor = 2.0
+        self.assertEqual(group.runtime, runtime - before + changed.runtime)
+
+
+class MtxIlpTests(SimpleTestCase):
+    def test_reports_proven_optimality(self):
+        app = generate_application(12, seed=3)
+        result = mtx_ilp(app, time_limit=30)
+        self.assertTrue(result['feasible'])
+        self.assertIs(result['optimal'], True)
+
+    def test_only_proven_results_settle_a_race(self):
+        stopped_on_time = {'feasible': True, 'cost': 1.0, 'optimal': False}
+        self.assertFalse(_settles(stopped_on_time))
+        self.assertTrue(_settles({**stopped_on_time, 'optimal': True}))
+        self.assertTrue(_settles({'feasible': False, 'optimal': False, 'error': 'Infeasible'}))
+        self.assertFalse(_settles({'feasible': False, 'error': 'Configuration failed with exception: boom'}))
+
+
+class IncrementalReoptimizationTests(TestCase):
+    def setUp(self):
+        self.app = generate_application(12, seed=3)
+        self.user = User.objects.create(username='octocat')
+
+    def _previous(self, optimal: bool) -> dict:
+        result = mtx_ilp(self.app, time_limit=30)
+        run = record_run(self.user, 'octo', 'app', self.app, [{**result, 'optimal': optimal}])
+        return reoptimization_inputs(run, self.app)
+
+    def test_unchanged_plan_is_reused(self):
+        reused = incremental_reoptimize(self.app, **self._previous(optimal=True))
+        self.assertTrue(reused['reused'])
+        self.assertEqual(reused['changed_functions'], [])
+        self.assertTrue(reused['optimal'])
+
+    def test_grown_optimal_plan_is_reused(self):
+        previous = self._previous(optimal=True)
+        self.app.functions[-1].baseline_runtime += 1000
+        reused = incremental_reoptimize(self.app, **previous)
+        self.assertTrue(reused['reused'])
+        self.assertEqual(reused['changed_functions'], [self.app.functions[-1].id])
+
+    def test_grown_time_limited_plan_is_resolved(self):
+        previous = self._previous(optimal=False)
+        self.assertFalse(previous['previous_optimal'])
+        self.app.functions[-1].baseline_runtime += 1000
+        resolved = incremental_reoptimize(self.app, **previous)
+        self.assertFalse(resolved['reused'])
+        self.assertTrue(resolved['feasible'])
+        self.assertGreater(resolved['resolved_functions'], 0)
+
+    def test_changed_topology_needs_a_full_run(self):
+        result = mtx_ilp(self.app, time_limit=30)
+        run = record_run(self.user, 'octo', 'app', self.app, [result])
+        self.app.max_memory *= 2
+        self.assertIsNone(reoptimization_inputs(run, self.app))
+
+
+def forest_application() -> Application:
+    """f0 -> f1, f3 -> f4, f5 and f2 on its own, 512 MB each: only pairs fit in max_memory."""
+    functions = [LambdaFunction(id=f"f{i}", name=f"f{i}", memory=512, baseline_runtime=100) for i in range(6)]
+    functions[0].add_child(functions[1], 1 << 30)
+    functions[3].add_child(functions[4], 1 << 30)
+    functions[3].add_child(functions[5], 1 << 20)
+    return Application(name='forest', functions=functions, critical_path_ids=['f3', 'f4'],
+                       max_memory=1024, max_latency=1000)
+
+
+def random_forest(seed: int, n_functions: int = 9) -> Application:
+    """generate_application with some edges off the critical path removed."""
+    app = generate_application(n_functions, seed=seed, latency_slack=1.2)
+    critical = set(app.critical_path_ids)
+    for func in app.functions[1:]:
+        if func.id not in critical and int(func.id[1:]) % 3 == seed % 3:
+            func.parent.children.remove(func)
+            del func.parent.data_out_edges[func.id]
+            func.parent = None
+    app.invalidate_indexes()
+    return app
+
+
+def brute_force_cost(app: Application) -> float:
+    """Cheapest feasible plan of connected groups, trying every set of cut edges."""
+    edges = [f for f in app.functions if f.parent is not None]
+    best = float('inf')
+    for cuts in itertools.product((False, True), repeat=len(edges)):
+        cut = {f.id for f, is_cut in zip(edges, cuts) if is_cut}
+        groups = {}
+        for func in app.functions:
+            top = func
+            while top.parent is not None and top.id not in cut:
+                top = top.parent
+            groups.setdefault(top.id, []).append(func)
+        metrics = calculate_metrics(list(groups.values()), app)
+        if metrics['feasible']:
+            best = min(best, metrics['cost'])
+    return best
+
+
+class ExactSolverTests(SimpleTestCase):
+    def _check_cheapest(self, app: Application):
+        optimum = brute_force_cost(app)
+        result = pareto_frontier(app)
+        self.assertTrue(result['feasible'])
+        self.assertTrue(result['exact'])
+        self.assertEqual(sorted(f.id for group in result['groups'] for f in group), sorted(f.id for f in app.functions))
+        self.assertAlmostEqual(result['cost'], optimum, delta=optimum * 1e-9)
+        self.assertLessEqual(lower_bound(app), optimum * (1 + 1e-9))
+
+    def test_forest(self):
+        app = forest_application()
+        self._check_cheapest(app)
+        groups = sorted(sorted(f.id for f in group) for group in pareto_frontier(app)['groups'])
+        self.assertEqual(groups, [['f0', 'f1'], ['f2'], ['f3', 'f4'], ['f5']])
+
+    def test_random_trees_and_forests(self):
+        for seed in range(6):
+            with self.subTest(seed=seed):
+                self._check_cheapest(generate_application(9, seed=seed, latency_slack=1.2))
+                self._check_cheapest(random_forest(seed))
+
+
+class LowerBoundTests(SimpleTestCase):
+    def test_float_latency_budget(self):
+        for seed in range(6):
+            with self.subTest(seed=seed):
+                app = generate_application(9, seed=seed, latency_slack=1.1)
+                app.max_latency = app.index.critical_runtime + 1.5 * app.network_hop_delay
+                self.assertLessEqual(lower_bound(app), brute_force_cost(app) * (1 + 1e-9))
+
+                results = run_all_simulations(app, algorithms=['no_fusion', 'pareto_frontier'])
+                self.assertFalse(any('error' in r for r in results if r['name'] == 'Pareto Frontier'))
+                for result in results:
+                    if result['feasible']:
+                        self.assertIsNotNone(result['gap'])
+                        self.assertLessEqual(result['gap'], optimality_gap(result['cost'], lower_bound(app)))
+
+    def test_suite_survives_a_failing_bound(self):
+        app = generate_application(9, seed=1)
+        with mock.patch('simulation.runner.lower_bound', side_effect=TypeError('broken bound')):
+            results = run_all_simulations(app, algorithms=['no_fusion', 'costless_csp'])
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all('error' not in r and r['gap'] is None for r in results))
+
+
+class MultilevelTests(SimpleTestCase):
+    def _check_plan(self, app: Application, result: dict):
+        self.assertNotIn('error', result)
+        self.assertTrue(result['feasible'])
+        self.assertEqual(sorted(f.id for group in result['groups'] for f in group), sorted(f.id for f in app.functions))
+
+    def test_small_forests_are_solved_exactly(self):
+        for app in [forest_application()] + [random_forest(seed) for seed in range(6)]:
+            with self.subTest(app=app.name):
+                result = multilevel_partitioning(app)
+                self._check_plan(app, result)
+                optimum = brute_force_cost(app)
+                self.assertAlmostEqual(result['cost'], optimum, delta=optimum * 1e-9)
+
+    def test_not_in_the_default_suites(self):
+        self.assertEqual(DEFAULT_ALGORITHMS, ['no_fusion', 'singleton', 'min_w_cut_heuristic',
+                                              'greedy_tree_partitioning', 'costless_csp', 'mtx_ilp'])
+        for tier, policy in DEFAULT_TIER_POLICIES.items():
+            with self.subTest(tier=tier):
+                self.assertNotIn('multilevel_partitioning', policy.algorithms)
+                self.assertNotIn('pareto_frontier', policy.algorithms)
+
+    def test_coarsened_forest(self):
+        app = random_forest(seed=4, n_functions=3000)
+        self.assertGreater(sum(f.parent is None for f in app.functions), 100)
+        result = multilevel_partitioning(app, coarse_size=50)
+        self._check_plan(app, result)
+        self.assertGreater(len(result['levels']), 1)
+
+
+class SweepTests(SimpleTestCase):
+    def test_points_are_capped_per_tier(self):
+        app = generate_application(8, seed=1)
+        payload = {'maxLatencyMS': list(range(1000, 1011))}
+        with self.assertRaises(ValueError):
+            sweep_grid(payload, app, DEFAULT_TIER_POLICIES['FREE'].max_sweep_points)
+        self.assertEqual(len(sweep_grid(payload, app, DEFAULT_TIER_POLICIES['PRO'].max_sweep_points)['maxLatencyMS']), 11)
+
+    @override_settings(OPTIFUSE_SWEEP_WORKERS=0)
+    def test_best_plan_per_point(self):
+        app = generate_application(8, seed=1)
+        grid = sweep_grid({'maxLatencyMS': [app.max_latency, app.max_latency * 10], 'maxMemoryMB': [512, 1024]}, app)
+        sweep = run_sweep(app.name, [f.id for f in app.functions], ApplicationBuilder.inputs_of(app), grid,
+                          algorithms=['no_fusion', 'greedy_tree_partitioning'], deadline=10)
+        self.assertEqual(len(sweep['points']), 4)
+        for point in sweep['points']:
+            feasible = [r['cost'] for r in point['results'] if r['feasible']]
+            self.assertIsNotNone(point['best'])
+            self.assertLessEqual(point['best']['cost'], min(feasible) * (1 + 1e-9))
+
+    def test_bounded_map_keeps_order(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            self.assertEqual(_map_bounded(executor, pow, [(2, i) for i in range(7)], 2), [2 ** i for i in range(7)])
+
+    def test_extra_slots_count_against_the_tier(self):
+        scheduler = SolverScheduler(4, DEFAULT_TIER_POLICIES)
+        with scheduler.slot('PRO'), scheduler.extra_slots('PRO', 10) as extra:
+            self.assertEqual(extra, 3)
+            self.assertEqual(scheduler.stats()['running'], 4)
+        self.assertEqual(scheduler.stats()['running'], 0)
+        with scheduler.slot('FREE'), scheduler.extra_slots('FREE', 10) as extra:
+            self.assertEqual(extra, 0)
+
+
+SPEC = """
+functions:
+  upload: {memorySize: 256, timeout: 1}
+  resize: {memorySize: 256, timeout: 2}
+custom:
+  optifuse:
+    topology:
+      upload: {children: {resize: 1048576}}
+    criticalPath: [upload, resize]
+"""
+
+
+class SimulateBatchTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        self.output = self.dir / 'results.jsonl'
+        self._add_spec('a')
+
+    def _add_spec(self, name: str):
+        (self.dir / 'specs' / name).mkdir(parents=True)
+        (self.dir / 'specs' / name / 'serverless.yml').write_text(SPEC, encoding='utf-8')
+
+    def _run(self, *args):
+        call_command('simulate_batch', str(self.dir / 'specs'), '--output', str(self.output), '--workers', '0',
+                     '--algorithms', 'no_fusion,singleton', *args, stderr=io.StringIO())
+
+    def _names(self) -> list[str]:
+        return [json.loads(line)['name'] for line in self.output.read_text(encoding='utf-8').splitlines()]
+
+    def test_resume_only_simulates_new_specs(self):
+        self._run()
+        self._add_spec('b')
+        self._run()
+        self.assertEqual(sorted(self._names()), ['a', 'b'])
+
+    def test_refuses_to_overwrite_output_without_checkpoint(self):
+        self.output.write_text('{"name": "earlier"}\n', encoding='utf-8')
+        with self.assertRaises(CommandError):
+            self._run()
+        self.assertEqual(self._names(), ['earlier'])
+        self._run('--restart')
+        self.assertEqual(self._names(), ['a'])
+
+
+class ProfilingTests(SimpleTestCase):
+    def test_profiled_solves_run_outside_the_server_process(self):
+        app = generate_application(20, seed=1)
+        [result] = run_all_simulations(app, algorithms=['greedy_tree_partitioning'], profile=True)
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertIsInstance(result['groups'][0][0], LambdaFunction)
+        self.assertEqual(result['cost'], calculate_metrics(result['groups'], app)['cost'])
+        self.assertGreater(result['profile']['peakMemoryBytes'], 0)
+        self.assertTrue(result['profile']['functions'])
+
+
+class RunnerTests(SimpleTestCase):
+    def test_crashed_results_keep_their_name(self):
+        app = generate_application(9, seed=1)
+        names = {r['name'] for r in run_all_simulations(app, algorithms=['no_fusion', 'costless_csp'])}
+        with mock.patch.dict('simulation.runner.ALGORITHMS', {'no_fusion': mock.Mock(side_effect=RuntimeError('boom'))}):
+            results = run_all_simulations(app, algorithms=['no_fusion', 'costless_csp'])
+        self.assertEqual({r['name'] for r in results}, names)
+        crashed = next(r for r in results if r['name'] == 'NoFusion')
+        self.assertFalse(crashed['feasible'])
+        self.assertIn('boom', crashed['error'])
+
+
+class ExecutionTests(SimpleTestCase):
+    def test_every_parentless_function_is_invoked(self):
+        app = forest_application()
+        groups = [[f] for f in app.functions]
+        stats = simulate_execution(app, groups, arrival_rate=1, requests=10, concurrency=None)
+        self.assertEqual(stats['containers'], 10 * len(app.functions))
+        self.assertEqual(stats['function_invocations'], 10 * len(app.functions))
+        # f3 -> f4 on the critical path is the slowest chain: two runtimes and a hop.
+        self.assertEqual(stats['latency']['max'], 200 + app.network_hop_delay)
+
+    def test_concurrency_must_be_positive(self):
+        app = forest_application()
+        for concurrency in (0, -1):
+            with self.assertRaises(ValueError):
+                simulate_execution(app, [[f] for f in app.functions], arrival_rate=1, concurrency=concurrency)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        caches[COALESCE_CACHE_ALIAS].clear()
+        self.app = generate_application(6, seed=1)
+        self.calls = 0
+        self.release = threading.Event()
+
+    def _compute(self, error: Exception = None):
+        def compute():
+            self.calls += 1
+            self.release.wait(5)
+            if error is not None:
+                raise error
+            return self.app, [{'name': 'NoFusion', 'groups': [[f] for f in self.app.functions], 'cost': 1.0,
+                               'feasible': True}]
+        return compute
+
+    def _follow(self, key: str, outcome: dict, compute=None):
+        def follow():
+            try:
+                outcome['value'] = single_flight(key, compute or self._compute(), StageTimer())
+            except Exception as e:
+                outcome['error'] = e
+        thread = threading.Thread(target=follow)
+        thread.start()
+        return thread
+
+    def _lead(self, key: str, compute) -> tuple[dict, threading.Thread]:
+        leader = {}
+        thread = self._follow(key, leader, compute)
+        while key not in _flights:
+            threading.Event().wait(0.005)
+        return leader, thread
+
+    def test_followers_share_the_leaders_result(self):
+        leader, leader_thread = self._lead('k1', self._compute())
+        follower = {}
+        follower_thread = self._follow('k1', follower)
+        follower_thread.join(0.1)
+        self.release.set()
+        leader_thread.join()
+        follower_thread.join()
+        self.assertEqual(self.calls, 1)
+        self.assertFalse(leader['value'][2])
+        app, results, coalesced = follower['value']
+        self.assertTrue(coalesced)
+        self.assertEqual([f.id for f in app.functions], [f.id for f in self.app.functions])
+        self.assertEqual(results[0]['groups'], [[f.id] for f in self.app.functions])
+
+    def test_followers_get_the_leaders_error(self):
+        leader, leader_thread = self._lead('k2', self._compute(ValueError('no metrics')))
+        follower = {}
+        follower_thread = self._follow('k2', follower)
+        follower_thread.join(0.1)
+        self.release.set()
+        leader_thread.join()
+        follower_thread.join()
+        self.assertIsInstance(leader['error'], ValueError)
+        self.assertIsInstance(follower['error'], ValueError)
+        self.assertEqual(self.calls, 1)
+
+    @override_settings(OPTIFUSE_COALESCE_LOCK_TTL=0.05)
+    def test_followers_stop_waiting_after_the_lock_ttl(self):
+        leader, leader_thread = self._lead('k3', self._compute())
+        follower_app = generate_application(3, seed=2)
+        outcome = single_flight('k3', lambda: (follower_app, []), StageTimer())
+        self.assertEqual(outcome, (follower_app, [], False))
+        self.release.set()
+        leader_thread.join()
+
+    def test_results_are_only_kept_for_waiters_by_default(self):
+        with override_settings(OPTIFUSE_COALESCE_TTL=0, OPTIFUSE_COALESCE_POLL_INTERVAL=0.5):
+            self.assertEqual(_settings()[0], 1)
+        with override_settings(OPTIFUSE_COALESCE_TTL=30):
+            self.assertEqual(_settings()[0], 30)
+
+
+class FileReferenceTests(SimpleTestCase):
+    def _resolve(self, spec: dict, files: dict[str, str]) -> tuple[dict, list[set[str]]]:
+        rounds = []
+
+        def load_files(paths: set[str]) -> dict[str, str]:
+            rounds.append(set(paths))
+            return {path: files[path] for path in paths if path in files}
+        return resolve_file_references(spec, load_files), rounds
+
+    def test_nested_references_are_fetched_per_level(self):
+        spec = {'functions': '${file(./functions.yml)}',
+                'provider': {'memorySize': "${file(config/defaults.json):memory}",
+                             'stage': 'svc-${file(config/defaults.json):stage.name}'}}
+        files = {
+            'functions.yml': 'upload: ${file(./fn/upload.yml)}\nresize: {timeout: 2}',
+            'config/defaults.json': '{"memory": 256, "stage": {"name": "dev"}}',
+            'fn/upload.yml': 'timeout: 1',
+        }
+        resolved, rounds = self._resolve(spec, files)
+        self.assertEqual(resolved['functions'], {'upload': {'timeout': 1}, 'resize': {'timeout': 2}})
+        self.assertEqual(resolved['provider'], {'memorySize': 256, 'stage': 'svc-dev'})
+        self.assertEqual(rounds, [{'functions.yml', 'config/defaults.json'}, {'fn/upload.yml'}])
+
+    def test_unresolvable_references_are_left_as_they_are(self):
+        spec = {'missing': '${file(./missing.yml)}', 'code': '${file(./handler.js):fn}',
+                'outside': '${file(../secrets.yml)}', 'nested': '${file(./${opt:stage}.yml)}',
+                'key': '${file(./a.yml):absent}'}
+        resolved, rounds = self._resolve(spec, {'a.yml': 'present: 1'})
+        self.assertEqual(resolved, spec)
+        self.assertEqual(rounds, [{'missing.yml', 'a.yml'}])
+
+    def test_cycles_and_depth_are_bounded(self):
+        files = {'a.yml': 'next: ${file(./b.yml)}', 'b.yml': 'next: ${file(./a.yml)}'}
+        resolved, rounds = self._resolve({'start': '${file(./a.yml)}'}, files)
+        self.assertEqual(resolved['start']['next']['next'], '${file(./a.yml)}')
+        self.assertLessEqual(len(rounds), MAX_REFERENCE_DEPTH)
+
+        chain = {f'f{i}.yml': f'next: ${{file(./f{i + 1}.yml)}}' for i in range(MAX_REFERENCE_DEPTH + 5)}
+        _, rounds = self._resolve({'start': '${file(./f0.yml)}'}, chain)
+        self.assertEqual(len(rounds), MAX_REFERENCE_DEPTH)
+
+
+class SchedulerTests(SimpleTestCase):
+    def _wait_for(self, scheduler: SolverScheduler, tier: str, queued: int):
+        for _ in range(200):
+            if scheduler.stats()['queued_by_tier'][tier] == queued:
+                return
+            threading.Event().wait(0.01)
+        self.fail(f"{tier} never had {queued} waiting")
+
+    def test_slots_are_capped_per_tier_and_in_total(self):
+        policies = {tier: TierPolicy(priority=priority, max_concurrent=cap, max_queue=4, max_wait=0.1,
+                                     ilp_time_limit=1)
+                    for tier, priority, cap in [('FREE', 1, 1), ('PRO', 0, 2)]}
+        scheduler = SolverScheduler(2, policies)
+        self.assertIs(scheduler.policy_for('UNKNOWN'), policies['FREE'])
+        with scheduler.slot('UNKNOWN'):
+            self.assertEqual(scheduler.stats()['running_by_tier'], {'FREE': 1, 'PRO': 0})
+            # FREE runs one solve at a time, even with a slot free.
+            with self.assertRaises(SchedulerBusy):
+                with scheduler.slot('FREE'):
+                    pass
+            with scheduler.slot('PRO'):
+                self.assertEqual(scheduler.stats()['running'], 2)
+                # Both slots are taken, so even PRO, under its own cap, waits.
+                with self.assertRaises(SchedulerBusy):
+                    with scheduler.slot('PRO'):
+                        pass
+        self.assertEqual(scheduler.stats()['running'], 0)
+
+    def test_waiters_are_admitted_by_priority_within_tier_caps(self):
+        scheduler = SolverScheduler(1, DEFAULT_TIER_POLICIES)
+        admitted = []
+
+        def request(tier: str):
+            with scheduler.slot(tier):
+                admitted.append(tier)
+
+        with scheduler.slot('PRO'):
+            threads = []
+            for tier in ['FREE', 'PRO', 'ENTERPRISE']:
+                threads.append(threading.Thread(target=request, args=(tier,)))
+                threads[-1].start()
+                self._wait_for(scheduler, tier, 1)
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(admitted, ['ENTERPRISE', 'PRO', 'FREE'])
+
+    def test_requests_are_shed_when_queue_is_full_or_wait_expires(self):
+        policies = {'FREE': TierPolicy(priority=0, max_concurrent=1, max_queue=1, max_wait=0.2,
+                                       ilp_time_limit=1, retry_after=7)}
+        scheduler = SolverScheduler(1, policies)
+        with scheduler.slot('FREE'):
+            outcomes = []
+
+            def waiter():
+                try:
+                    with scheduler.slot('FREE'):
+                        outcomes.append('admitted')
+                except SchedulerBusy as e:
+                    outcomes.append(e.retry_after)
+
+            thread = threading.Thread(target=waiter)
+            thread.start()
+            self._wait_for(scheduler, 'FREE', 1)
+            with self.assertRaises(SchedulerBusy) as shed:
+                with scheduler.slot('PRO'):
+                    pass
+            self.assertEqual((shed.exception.tier, shed.exception.retry_after), ('FREE', 7))
+            thread.join(5)
+        self.assertEqual(outcomes, [7])
+        self.assertEqual(scheduler.stats()['queued_by_tier'], {'FREE': 0})
+
+
+def load_scenarios(app: Application, peak: float = 2.0, hot: float = 3.0) -> list[Scenario]:
+    """The current load, everything `peak` times as slow, and the critical path's first function `hot` times as slow."""
+    return [Scenario('base'), Scenario('peak', default=peak),
+            Scenario('hot', load_factors={app.critical_path_ids[0]: hot, 'unknown': 9.0}, default=1.0)]
+
+
+class ScenarioTests(TestCase):
+    ROBUST_ALGORITHMS = ['no_fusion', 'costless_csp', 'pareto_frontier']
+
+    def test_runtime_matrix(self):
+        app = generate_application(8, seed=1)
+        app.functions[1].load_factor = 1.5
+        runtimes = runtime_matrix(app, load_scenarios(app))
+        hot = app.functions_map[app.critical_path_ids[0]]
+        self.assertEqual(runtimes.shape, (3, 8))
+        self.assertEqual(list(runtimes[0]), [f.runtime for f in app.functions])
+        self.assertEqual(list(runtimes[1]), [int(f.baseline_runtime * 2.0) for f in app.functions])
+        self.assertEqual(list(runtimes[2]), [int(f.baseline_runtime * (3.0 if f is hot else 1.0))
+                                             for f in app.functions])
+
+    def test_matrix_matches_metrics_per_scenario(self):
+        app = generate_application(10, seed=2, latency_slack=1.1)
+        scenarios = load_scenarios(app)
+        results = run_all_simulations(app, algorithms=['no_fusion', 'singleton', 'pareto_frontier'])
+        evaluation = evaluate_plans(app, results + [{'name': 'partial', 'groups': [[app.functions[0]]]}], scenarios)
+        self.assertEqual(evaluation['feasible'].shape, (4, 3))
+        self.assertFalse(evaluation['feasible'][-1].any())
+        # Some plan is feasible somewhere and infeasible elsewhere, so the matrix is not trivially uniform.
+        self.assertTrue(evaluation['feasible'][:-1].any() and not evaluation['feasible'][:-1].all())
+        for col, runtimes in enumerate(runtime_matrix(app, scenarios)):
+            for f, runtime in zip(app.functions, runtimes):
+                f.baseline_runtime, f.load_factor = int(runtime), 1.0
+            for row, result in enumerate(results):
+                with self.subTest(plan=result['name'], scenario=scenarios[col].name):
+                    metrics = calculate_metrics(result['groups'], app)
+                    self.assertAlmostEqual(evaluation['cost'][row, col], metrics['cost'], delta=metrics['cost'] * 1e-9)
+                    self.assertEqual(evaluation['latency'][row, col], metrics['latency'])
+                    self.assertEqual(evaluation['feasible'][row, col], metrics['feasible'])
+
+    def test_robust_plan_is_feasible_everywhere(self):
+        for seed, budget in [(2, None), (4, None), (5, None), (2, 0.5)]:
+            with self.subTest(seed=seed, budget=budget):
+                app = generate_application(10, seed=seed, latency_slack=1.1)
+                if budget is not None:
+                    app.max_latency += budget
+                scenarios = load_scenarios(app, peak=1.05, hot=1.3)
+                self.assertIsInstance(_surrogate_application(app, scenarios).max_latency, int)
+                evaluation = find_robust_plan(app, scenarios, algorithms=self.ROBUST_ALGORITHMS)
+                self.assertIsNotNone(evaluation['robust'])
+                self.assertTrue(evaluation['feasible'][evaluation['robust']].all())
+                worst = find_robust_plan(app, scenarios, objective='worst', algorithms=self.ROBUST_ALGORITHMS)
+                self.assertTrue(worst['feasible'][worst['robust']].all())
+        with self.assertRaises(ValueError):
+            find_robust_plan(app, scenarios, objective='median', algorithms=self.ROBUST_ALGORITHMS)
+
+
+class ScenarioEvaluationViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='octocat')
+        self.app = generate_application(10, seed=2, latency_slack=1.1)
+        results = run_all_simulations(self.app, algorithms=['no_fusion', 'costless_csp'])
+        self.run = record_run(self.user, 'octo', 'app', self.app, results)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _post(self, **body):
+        payload = {'runId': self.run.id, 'scenarios': [{'name': 'base'}, {'name': 'peak', 'default': 1.05}], **body}
+        return self.client.post('/api/simulate/scenarios/', payload, format='json')
+
+    def test_evaluation_and_robust_search(self):
+        response = self._post()
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['scenarios'], ['base', 'peak'])
+        self.assertEqual([plan['id'] for plan in body['plans']], [r.id for r in self.run.results.all()])
+        self.assertIsNone(body['robust'])
+
+        policy = TierPolicy(priority=0, max_concurrent=1, max_queue=1, max_wait=5, ilp_time_limit=1,
+                            algorithms=['no_fusion', 'pareto_frontier'])
+        with mock.patch('simulation.views.get_scheduler', return_value=SolverScheduler(1, {'FREE': policy})):
+            response = self._post(searchRobust=True, objective='worst')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        robust = body['plans'][body['robust']]
+        self.assertTrue(all(robust['feasible']))
+        self.assertEqual(len(body['plans']), 4)
+
+    def test_status_codes(self):
+        other = record_run(User.objects.create(username='hubot'), 'octo', 'app', self.app, [])
+        self.assertEqual(self._post(runId=other.id).status_code, 404)
+        self.assertEqual(self._post(runId='latest').status_code, 400)
+        self.assertEqual(self._post(objective='median').status_code, 400)
+        self.assertEqual(self._post(scenarios=[{'default': -1}]).status_code, 400)
+        self.assertEqual(self._post(scenarios=[]).status_code, 400)
+
+        busy = SolverScheduler(1, {'FREE': TierPolicy(priority=0, max_concurrent=1, max_queue=0, max_wait=0,
+                                                      ilp_time_limit=1, retry_after=7)})
+        with mock.patch('simulation.views.get_scheduler', return_value=busy):
+            response = self._post(searchRobust=True)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '7')
+
+
+def report_line(duration: float, used: int, init: float = None, sep: str = '\t') -> str:
+    line = (f"REPORT RequestId: 3f1c2e2a-0b5e-4c1b-9f57-9f0a1b2c3d4e{sep}Duration: {duration} ms{sep}"
+            f"Billed Duration: {int(duration) + 1} ms{sep}Memory Size: 512 MB{sep}Max Memory Used: {used} MB")
+    return line + (f"{sep}Init Duration: {init} ms" if init is not None else '')
+
+
+class ReportLogTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def test_records_straddling_chunk_boundaries(self):
+        text = '\n'.join(['/aws/lambda/svc-dev-resize'] + [report_line(100 + i + 0.25, 60 + i, 300.5 if i == 0 else None)
+                                                           for i in range(200)]).encode('utf-8')
+        whole = list(scan_reports([text]))
+        self.assertEqual(len(whole), 200)
+        self.assertEqual(whole[0], ('svc-dev-resize', 100.25, 101.0, 512, 60, 300.5))
+        self.assertEqual(whole[-1], ('svc-dev-resize', 299.25, 300.0, 512, 259, None))
+        for size in (7, 100, 1000, 4096):
+            with self.subTest(chunk_size=size):
+                self.assertEqual(list(scan_reports([text[i:i + size] for i in range(0, len(text), size)])), whole)
+
+    def test_json_export(self):
+        platform = {'time': '2026-01-01T00:00:00Z', 'type': 'platform.report',
+                    'record': {'requestId': 'r', 'metrics': {'durationMs': 12.5, 'billedDurationMs': 13,
+                                                             'memorySizeMB': 256, 'maxMemoryUsedMB': 80}}}
+        # A subscription event (the text REPORT line with "\t"-escaped tabs), then a JSON log format record.
+        event = {'logGroup': '/aws/lambda/svc-dev-upload', 'logEvents': [{'message': report_line(40.5, 70, 250.0)}]}
+        with gzip.open(self.dir / 'export.json.gz', 'wt', encoding='utf-8') as f:
+            f.write(json.dumps(event) + '\n')
+            f.write(f"2026-01-01T00:00:00.000Z {json.dumps(platform)}\n")
+        (self.dir / 'other.log').write_text(report_line(5.0, 10), encoding='utf-8')
+
+        stats = ingest_report_logs([str(self.dir)], function_ids=['upload', 'resize'], service_name='svc', stage='dev')
+        self.assertEqual(list(stats), ['upload'])
+        summary = dict(stats['upload'])
+        self.assertEqual(summary['invocations'], 2)
+        self.assertEqual(summary['cold_starts'], 1)
+        self.assertEqual(summary['avg_init_ms'], 250.0)
+        self.assertEqual(summary['max_memory_mb'], 80)
+        self.assertEqual(summary['avg_runtime_ms'], round((40.5 + 12.5) / 2))
+        self.assertEqual(summary['memory_size_mb'], 256)
+
+
+class QuantileSketchTests(SimpleTestCase):
+    def _samples(self, seed: int, n: int = 20000) -> list[float]:
+        rng = random.Random(seed)
+        return [rng.lognormvariate(4, 1.5) for _ in range(n)]
+
+    def _assert_accurate(self, sketch: QuantileSketch, samples: list[float], quantiles=(0.01, 0.25, 0.5, 0.9, 0.99, 1.0)):
+        ordered = sorted(samples)
+        for q in quantiles:
+            actual = ordered[int(q * (len(ordered) - 1))]
+            self.assertLessEqual(abs(sketch.quantile(q) - actual), sketch.relative_accuracy * actual * (1 + 1e-9), q)
+
+    def test_quantiles_within_relative_accuracy(self):
+        samples = self._samples(1) + [0.0] * 10
+        for accuracy in (0.01, 0.05):
+            sketch = QuantileSketch(accuracy)
+            for value in samples:
+                sketch.add(value)
+            with self.subTest(accuracy=accuracy):
+                self._assert_accurate(sketch, samples, quantiles=(0.0, 0.01, 0.25, 0.5, 0.9, 0.99, 1.0))
+                self.assertEqual(sketch.count, len(samples))
+                self.assertAlmostEqual(sketch.mean, sum(samples) / len(samples))
+        self.assertIsNone(QuantileSketch().quantile(0.5))
+        with self.assertRaises(ValueError):
+            QuantileSketch(1.5)
+
+    def test_merge_equals_one_sketch(self):
+        parts = [self._samples(seed, 5000) for seed in range(3)]
+        merged, whole = QuantileSketch(), QuantileSketch()
+        for part in parts:
+            sketch = QuantileSketch()
+            for value in part:
+                sketch.add(value)
+                whole.add(value)
+            merged.merge(QuantileSketch.from_dict(json.loads(json.dumps(sketch.to_dict()))))
+        self.assertEqual(merged.buckets, whole.buckets)
+        self.assertEqual((merged.count, merged.min, merged.max), (whole.count, whole.min, whole.max))
+        self.assertEqual([merged.quantile(q) for q in (0.1, 0.5, 0.99)], [whole.quantile(q) for q in (0.1, 0.5, 0.99)])
+        with self.assertRaises(ValueError):
+            merged.merge(QuantileSketch(0.05))
+
+    def test_memory_is_bounded(self):
+        # Values spanning 16 orders of magnitude need far more than 64 buckets at 1% accuracy.
+        rng = random.Random(2)
+        samples = [10 ** rng.uniform(-6, 10) for _ in range(20000)]
+        sketch, other = QuantileSketch(max_buckets=64), QuantileSketch(max_buckets=64)
+        for value in samples[:10000]:
+            sketch.add(value)
+            self.assertLessEqual(len(sketch.buckets), 64)
+        for value in samples[10000:]:
+            other.add(value)
+        sketch.merge(other)
+        self.assertLessEqual(len(sketch.buckets), 64)
+        # Folding only costs accuracy at the low end.
+        self._assert_accurate(sketch, samples, quantiles=(0.99, 0.999, 1.0))
+        self.assertEqual((sketch.count, sketch.min, sketch.max), (len(samples), min(samples), max(samples)))
+
+
+def constant_model(ms: float) -> RuntimeModel:
+    return RuntimeModel(math.log(ms), 0.0, 0.0, 0.0)
+
+
+class PlannerTests(SimpleTestCase):
+    MODELS = {'no_fusion': constant_model(100), 'costless_csp': constant_model(200),
+              'mtx_ilp': constant_model(1000), 'mtx_ilp_portfolio': constant_model(1000)}
+
+    def setUp(self):
+        self.app = generate_application(12, seed=1)
+
+    def _plan(self, deadline: float, **kwargs):
+        return plan_algorithms(self.app, deadline, list(self.MODELS), TIME_LIMITED_ALGORITHMS, models=self.MODELS, **kwargs)
+
+    def test_budget_is_split_within_the_deadline(self):
+        plan = self._plan(10.45)
+        self.assertEqual(plan.algorithms, ['no_fusion', 'costless_csp', 'mtx_ilp', 'mtx_ilp_portfolio'])
+        self.assertEqual(plan.time_limits, {'mtx_ilp': 5, 'mtx_ilp_portfolio': 5})
+        self.assertEqual(plan.skipped, {})
+        charged = SAFETY_FACTOR * (100 + 200) + 1000 * sum(plan.time_limits.values())
+        self.assertAlmostEqual(charged, 10450)
+
+        capped = self._plan(10.45, time_limits={'mtx_ilp': 2})
+        self.assertEqual(capped.time_limits, {'mtx_ilp': 2, 'mtx_ilp_portfolio': 8})
+
+    def test_short_deadline_skips_with_reasons(self):
+        plan = self._plan(1.2)
+        self.assertEqual(plan.algorithms, ['no_fusion', 'costless_csp'])
+        self.assertEqual(set(plan.skipped), {'mtx_ilp', 'mtx_ilp_portfolio'})
+        self.assertIn('minimum 1 s time limit', plan.skipped['mtx_ilp'])
+
+        # A 1 s share is not enough for a predicted 2 s solve.
+        slow = dict(self.MODELS, mtx_ilp=constant_model(2000))
+        plan = plan_algorithms(self.app, 2, ['no_fusion', 'mtx_ilp'], TIME_LIMITED_ALGORITHMS, models=slow)
+        self.assertEqual(plan.algorithms, ['no_fusion'])
+        self.assertIn('Predicted to need 2000 ms', plan.skipped['mtx_ilp'])
+
+        plan = self._plan(0.2)
+        self.assertIn('no_fusion', plan.algorithms)
+        self.assertIn('Predicted to take 200 ms', plan.skipped['costless_csp'])
+
+    def test_skipped_algorithms_are_reported(self):
+        results = run_all_simulations(self.app, algorithms=['no_fusion', 'mtx_ilp'], deadline=0.5)
+        skipped = [r for r in results if r.get('skipped')]
+        self.assertEqual([r['name'] for r in skipped], ['MtxILP (Optimal)'])
+        self.assertTrue(skipped[0]['error'].startswith('Skipped: '))
+        self.assertTrue(any(r['name'] == 'NoFusion' and r['feasible'] for r in results))
+
+    def test_model_fitting(self):
+        truth = RuntimeModel(-4.0, 1.2, 0.3, 0.5)
+        rng = random.Random(3)
+        samples = []
+        for _ in range(60):
+            n = rng.randint(10, 5000)
+            e, l = rng.randint(n // 2, 3 * n), rng.randint(2, 40)
+            samples.append((n, e, l, truth.predict(n, e, l) * rng.uniform(0.97, 1.03)))
+        model = fit_runtime_model(samples)
+        self.assertEqual(model.samples, 60)
+        for n, e, l, _ in samples[:10]:
+            self.assertAlmostEqual(model.predict(n, e, l) / truth.predict(n, e, l), 1.0, delta=0.05)
+        self.assertIsNone(fit_runtime_model([]))
+        self.assertEqual(app_features(self.app), (12, 11, len(self.app.critical_path_ids)))
+
+
+class LiveStubTestCase(TestCase):
+    """
+    Runs the live views end to end against the load-test stand-ins for GitHub,
+    STS and CloudWatch Logs (simulation.loadtest.stubs), solving with a small
+    deterministic suite.
+    """
+    ALGORITHMS = ['no_fusion', 'singleton', 'costless_csp', 'pareto_frontier']
+    STUB_CONFIG = StubConfig(functions=30, github_latency=0, sts_latency=0, logs_latency=0)
+
+    def setUp(self):
+        server = StubServer(('127.0.0.1', 0), self.STUB_CONFIG)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        for patcher in [
+            override_settings(OPTIFUSE_GITHUB_API_URL=url, OPTIFUSE_AWS_ENDPOINT_URLS={'sts': url, 'logs': url},
+                              OPTIFUSE_LOGS_POLL_INTERVAL=0.01, OPTIFUSE_COALESCE_LIVE=False),
+            mock.patch.dict(os.environ, {'AWS_ACCESS_KEY_ID': 'test', 'AWS_SECRET_ACCESS_KEY': 'test',
+                                         'AWS_DEFAULT_REGION': 'us-east-1'}),
+            mock.patch('simulation.pipeline.get_scheduler', return_value=SolverScheduler(4, {'FREE': TierPolicy(
+                priority=0, max_concurrent=4, max_queue=4, max_wait=30, ilp_time_limit=5, algorithms=self.ALGORITHMS)})),
+        ]:
+            patcher.enable() if hasattr(patcher, 'enable') else patcher.start()
+            self.addCleanup(patcher.disable if hasattr(patcher, 'disable') else patcher.stop)
+        for alias in ('blobs', COALESCE_CACHE_ALIAS):
+            caches[alias].clear()
+
+        self.user = User.objects.create(username='octocat')
+        Profile.objects.create(user=self.user, github_access_token='token', aws_role_arn='arn:aws:iam::000000000000:role/test')
+        self.token = Token.objects.create(user=self.user)
+
+    def _post(self, path: str, accept_encoding: str = '', **body):
+        return self.client.post(path, {'owner': 'octo', 'repoName': 'app', **body}, content_type='application/json',
+                                HTTP_AUTHORIZATION=f'Token {self.token.key}', HTTP_ACCEPT_ENCODING=accept_encoding)
+
+
+class CompactEncodingTests(LiveStubTestCase):
+    def test_group_labels_round_trip(self):
+        app = generate_application(12, seed=1)
+        results = run_all_simulations(app, algorithms=self.ALGORITHMS + ['mtx_ilp'])
+        results.append({'name': 'Crashed', 'feasible': False, 'error': 'boom'})
+        function_ids = [f.id for f in app.functions]
+        compact = encode_results_compact([dict(r) for r in results], function_ids)
+        verbose = encode_results(results)
+        self.assertEqual(compact['functions'], function_ids)
+        for entry, result in zip(compact['results'], verbose):
+            self.assertEqual({k: v for k, v in entry.items() if k != 'groups'},
+                             {k: v for k, v in result.items() if k != 'groups'})
+            self.assertEqual(decode_group_labels(entry['groups'], function_ids),
+                             [sorted(group, key=function_ids.index) for group in result.get('groups') or []])
+        self.assertEqual(compact['results'][-1]['groups'], [])
+        # Unassigned functions are -1 and dropped again on decoding.
+        position = {fid: i for i, fid in enumerate(function_ids)}
+        labels = group_labels([[function_ids[2]], [function_ids[0], function_ids[1]]], position)
+        self.assertEqual(labels[:4], [1, 1, 0, -1])
+        self.assertEqual(decode_group_labels(labels, function_ids), [[function_ids[2]], function_ids[:2]])
+
+    def test_compression_is_negotiated(self):
+        plain = self._post('/api/simulate/live/', responseFormat='compact')
+        self.assertEqual(plain.status_code, 200)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        body = json.loads(plain.content)
+        self.assertGreaterEqual(len(plain.content), MIN_COMPRESS_BYTES)
+        self.assertEqual(len(body['functions']), self.STUB_CONFIG.functions)
+        self.assertEqual({len(r['groups']) for r in body['results']}, {self.STUB_CONFIG.functions})
+
+        for accept, encoding in [('gzip, deflate', 'gzip'), ('*', 'gzip'), ('gzip;q=0, identity', None)]:
+            with self.subTest(accept_encoding=accept):
+                response = self._post('/api/simulate/live/', accept, responseFormat='compact')
+                self.assertEqual(response.get('Content-Encoding'), encoding)
+                content = gzip.decompress(response.content) if encoding else response.content
+                self.assertEqual([(r['name'], r['groups']) for r in json.loads(content)['results']],
+                                 [(r['name'], r['groups']) for r in body['results']])
+
+        default = self._post('/api/simulate/live/', 'gzip').json()
+        self.assertEqual([sorted(map(sorted, decode_group_labels(r['groups'], body['functions']))) for r in body['results']],
+                         [sorted(map(sorted, r['groups'])) for r in default])
+        self.assertEqual(self._post('/api/simulate/live/', responseFormat='tiny').status_code, 400)
+
+    def test_non_finite_values_become_null(self):
+        results = [{'name': 'Infeasible', 'cost': float('inf'), 'latency': float('nan'), 'feasible': False,
+                    'groups': [], 'frontier': [{'cost': float('-inf')}]}]
+        expected = [{'name': 'Infeasible', 'cost': None, 'latency': None, 'feasible': False,
+                     'frontier': [{'cost': None}], 'groups': []}]
+        self.assertEqual(json.loads(dumps(encode_results_compact(results, ['f0'])))['results'], expected)
+        # The stdlib fallback writes the same JSON as orjson.
+        with mock.patch('simulation.encoding.orjson', None):
+            self.assertEqual(json.loads(dumps(encode_results_compact(results, ['f0'])))['results'], expected)
+
+
+def chain_application() -> Application:
+    """f0 -> f1, f0 -> f2 -> f3, 256 MB each."""
+    functions = [LambdaFunction(id=f"f{i}", name=f"f{i}", memory=256, baseline_runtime=100) for i in range(4)]
+    functions[0].add_child(functions[1], 1 << 20)
+    functions[0].add_child(functions[2], 1 << 20)
+    functions[2].add_child(functions[3], 1 << 20)
+    return Application(name='chain', functions=functions, critical_path_ids=['f0', 'f2', 'f3'],
+                       max_memory=1024, max_latency=1000)
+
+
+class HistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='octocat')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.app = chain_application()
+
+    def _plan(self, name: str, groups: list[list[str]]) -> dict:
+        return {'name': name, **calculate_metrics([[self.app.functions_map[fid] for fid in g] for g in groups], self.app),
+                'groups': groups}
+
+    def test_record_run(self):
+        results = [self._plan('Split', [['f0', 'f1'], ['f2', 'f3']]),
+                   {'name': 'Broken', 'cost': float('inf'), 'feasible': False, 'error': 'boom'}]
+        run = record_run(self.user, 'octo', 'app', self.app, results)
+        stored = list(run.results.all())
+        self.assertEqual([r.name for r in stored], ['Split', 'Broken'])
+        self.assertEqual(stored[0].group_labels, [0, 0, 1, 1])
+        self.assertAlmostEqual(stored[0].cost, results[0]['cost'])
+        self.assertEqual((stored[1].cost, stored[1].group_labels, stored[1].error), (None, [], 'boom'))
+        self.assertEqual(run.application_hash, application_hash(run.function_ids, application_inputs(self.app)))
+        self.app.functions[3].baseline_runtime = 200
+        self.assertNotEqual(run.application_hash, application_hash(run.function_ids, application_inputs(self.app)))
+
+    def test_diff_plans(self):
+        before = record_run(self.user, 'octo', 'app', self.app, [self._plan('A', [['f0', 'f1'], ['f2', 'f3']])])
+        after = record_run(self.user, 'octo', 'app', self.app, [self._plan('B', [['f0', 'f1', 'f2'], ['f3']])])
+        diff = diff_plans(before.results.get(), after.results.get())
+        self.assertTrue(diff['sameApplication'])
+        self.assertEqual(diff['unchangedGroups'], [])
+        self.assertEqual(diff['removedGroups'], [['f0', 'f1'], ['f2', 'f3']])
+        self.assertEqual(diff['addedGroups'], [['f0', 'f1', 'f2'], ['f3']])
+        self.assertEqual(diff['movedFunctions'], ['f0', 'f1', 'f2', 'f3'])
+        self.assertEqual(diff['newlyCutEdges'], [['f2', 'f3']])
+        self.assertEqual(diff['newlyMergedEdges'], [['f0', 'f2']])
+        self.assertAlmostEqual(diff['costDelta'], after.results.get().cost - before.results.get().cost)
+
+        same = diff_plans(before.results.get(), before.results.get())
+        self.assertEqual((same['unchangedGroups'], same['movedFunctions'], same['costDelta']),
+                         ([['f0', 'f1'], ['f2', 'f3']], [], 0.0))
+
+    def test_diff_endpoint(self):
+        before = record_run(self.user, 'octo', 'app', self.app, [self._plan('A', [['f0', 'f1'], ['f2', 'f3']])])
+        after = record_run(self.user, 'octo', 'app', self.app, [self._plan('B', [['f0', 'f1', 'f2'], ['f3']])])
+        other = record_run(User.objects.create(username='hubot'), 'octo', 'app', self.app,
+                           [self._plan('C', [['f0'], ['f1'], ['f2'], ['f3']])])
+        ids = [run.results.get().id for run in (before, after, other)]
+
+        response = self.client.get('/api/simulate/history/diff/', {'from': ids[0], 'to': ids[1]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['newlyMergedEdges'], [['f0', 'f2']])
+        self.assertEqual(self.client.get('/api/simulate/history/diff/', {'from': ids[0], 'to': ids[2]}).status_code, 404)
+        self.assertEqual(self.client.get('/api/simulate/history/diff/', {'from': ids[2], 'to': ids[2]}).status_code, 404)
+        self.assertEqual(self.client.get('/api/simulate/history/diff/', {'from': ids[0]}).status_code, 400)
+
+    def test_history_endpoint(self):
+        for i in range(25):
+            record_run(self.user, 'octo', 'app' if i % 5 else 'other', self.app, [self._plan('A', [['f0', 'f1', 'f2', 'f3']])])
+        record_run(User.objects.create(username='hubot'), 'octo', 'app', self.app, [])
+
+        page = self.client.get('/api/simulate/history/').json()
+        self.assertEqual(page['count'], 25)
+        self.assertEqual(len(page['results']), 20)
+        self.assertIsNotNone(page['next'])
+        ids = [run['id'] for run in page['results']]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertNotIn('groups', page['results'][0]['results'][0])
+
+        page = self.client.get('/api/simulate/history/', {'repoName': 'other', 'pageSize': 2, 'includeGroups': 'true'}).json()
+        self.assertEqual(page['count'], 5)
+        self.assertEqual(len(page['results']), 2)
+        self.assertEqual(page['results'][0]['functions'], ['f0', 'f1', 'f2', 'f3'])
+        self.assertEqual(page['results'][0]['results'][0]['groups'], [0, 0, 0, 0])
+        self.assertEqual(self.client.get('/api/simulate/history/', {'owner': 'someone'}).json()['count'], 0)
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/simulate/history/').status_code, 401)
+
+
+class AsyncLiveSimulationTests(LiveStubTestCase):
+    # Slow enough that overlapping GitHub and STS shows in the wall time; queries answer 'Running' twice.
+    STUB_CONFIG = StubConfig(functions=30, github_latency=0.2, sts_latency=0.4, logs_latency=0, logs_pending_polls=2)
+
+    @staticmethod
+    def _plans(results: list[dict]) -> list[tuple]:
+        return [(r['name'], sorted(map(sorted, r.get('groups') or [])), r.get('cost'), r.get('latency'), r['feasible'])
+                for r in results]
+
+    async def test_stages_overlap_and_match_the_sync_view(self):
+        started = time.perf_counter()
+        response = await AsyncClient().post('/api/simulate/live/async/', {'owner': 'octo', 'repoName': 'app'},
+                                            content_type='application/json', headers={'Authorization': f'Token {self.token.key}'})
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.assertEqual(response.status_code, 200)
+        stages = parse_server_timing(response['Server-Timing'])
+        self.assertGreaterEqual(stages['github'], 400)
+        self.assertGreaterEqual(stages['sts'], 400)
+        # Run one after the other, the stages would take at least their sum.
+        self.assertLess(elapsed_ms, sum(stages.values()) - 300)
+        self.assertIsNotNone(response['X-Simulation-Run'])
+
+        sync = await sync_to_async(self._post)('/api/simulate/live/')
+        self.assertEqual(sync.status_code, 200)
+        self.assertEqual(self._plans(json.loads(response.content)), self._plans(sync.json()))
+        self.assertEqual(len(json.loads(response.content)), len(self.ALGORITHMS))
+
+    async def test_pending_queries_do_not_hold_the_event_loop(self):
+        session = await asyncio.to_thread(get_assumed_role_session, 'arn:aws:iam::000000000000:role/test', 'external')
+        function_ids = [function_name(i) for i in range(self.STUB_CONFIG.functions)]
+        with override_settings(OPTIFUSE_LOGS_POLL_INTERVAL=0.3):
+            started = time.perf_counter()
+            fetched = await asyncio.gather(*[fetch_live_xray_data_async(session, 'loadtest', 'dev', function_ids)
+                                             for _ in range(8)])
+            elapsed = time.perf_counter() - started
+            expected = await asyncio.to_thread(fetch_live_xray_data, session, 'loadtest', 'dev', function_ids)
+        # Each query is polled three times, 0.3 s apart; sequentially, eight would take at least 4.8 s.
+        self.assertLess(elapsed, 2.4)
+        self.assertEqual(len(expected), self.STUB_CONFIG.functions)
+        self.assertTrue(all(metrics == expected for metrics in fetched))
+
+
+class ApplicationIndexTests(SimpleTestCase):
+    def _check(self, app: Application):
+        """The index against the per-algorithm computations it replaced."""
+        index = app.index
+        self.assertEqual(sorted(f.id for f in index.order), sorted(f.id for f in app.functions))
+        # The root's tree in the BFS order no_fusion and singleton walked it; other trees interleave.
+        bfs, head = [app.root_function], 0
+        while head < len(bfs):
+            bfs.extend(bfs[head].children)
+            head += 1
+        tree = set(bfs)
+        self.assertEqual([f for f in index.order if f in tree], bfs)
+        for pos, f in enumerate(index.order):
+            self.assertEqual(index.position[f.id], pos)
+            parent = index.parent[pos]
+            self.assertEqual(parent, -1 if f.parent is None else index.position[f.parent.id])
+            self.assertLess(parent, pos)
+            self.assertEqual(index.transfer_cost(f), f.parent.get_data_transfer_cost(f.id) if f.parent else 0.0)
+
+            descendants, stack = [], [f]
+            while stack:
+                node = stack.pop()
+                descendants.append(node)
+                stack.extend(node.children)
+            self.assertEqual(index.subtree_memory[pos], sum(d.memory for d in descendants))
+            inside = {index.position[d.id] for d in descendants}
+            self.assertEqual({v for v in range(len(index)) if index.in_subtree(pos, v)}, inside)
+
+        critical = [app.functions_map[fid] for fid in app.critical_path_ids]
+        self.assertEqual(index.critical, critical)
+        self.assertEqual(index.critical_positions, [index.position[f.id] for f in critical])
+        self.assertEqual(index.chain_position, {f.id: i for i, f in enumerate(critical)})
+        self.assertEqual(index.critical_edges, {(u.id, v.id) for u, v in zip(critical, critical[1:])})
+        self.assertEqual(index.critical_runtime, sum(f.runtime for f in critical))
+
+    def test_matches_direct_computation(self):
+        for app in [generate_application(60, seed=3), forest_application(), random_forest(2, 40)]:
+            with self.subTest(app=app.name):
+                self._check(app)
+
+    def test_rebuilt_after_changes(self):
+        app = generate_application(30, seed=4)
+        index = app.index
+        self.assertIs(app.index, index)
+        critical = app.functions_map[app.critical_path_ids[1]]
+
+        critical.load_factor = 3.0
+        self.assertIsNot(app.index, index)
+        self._check(app)
+        index = app.index
+        critical.baseline_runtime += 50
+        self.assertEqual(app.index.critical_runtime, sum(app.functions_map[fid].runtime for fid in app.critical_path_ids))
+        app.functions[-1].memory += 512
+        self.assertEqual(app.index.subtree_memory[0], sum(f.memory for f in app.functions))
+
+        index = app.index
+        app.critical_path_ids = app.critical_path_ids[:2]
+        self.assertIsNot(app.index, index)
+        self._check(app)
+
+        # Edge and function changes need invalidate_indexes.
+        leaf = LambdaFunction(id='extra', name='extra', memory=128, baseline_runtime=10)
+        app.functions[-1].add_child(leaf, 1 << 30)
+        app.functions.append(leaf)
+        app.functions[0].data_out_edges[app.functions[0].children[0].id] = 7 << 30
+        app.invalidate_indexes()
+        self.assertIn(leaf, app.index.order)
+        self.assertEqual(app.index.transfer_cost(leaf), 0.01)
+        self._check(app)
+        self.assertEqual(calculate_metrics([[f] for f in app.functions], app)['cost'],
+                         sum(f.get_execution_cost() for f in app.functions)
+                         + sum(f.get_data_transfer_cost(c.id) for f in app.functions for c in f.children))
+
+
+class SkylineTests(SimpleTestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(5)
+        for _ in range(20):
+            skyline, points = Skyline(), []
+            for i in range(200):
+                x, y = rng.randint(0, 50), rng.randint(0, 50)
+                points.append((x, y, i))
+                skyline.insert(x, y, i)
+            front = sorted({(x, y) for x, y, _ in points
+                            if not any(a <= x and b <= y and (a, b) != (x, y) for a, b, _ in points)})
+            self.assertEqual([(x, y) for x, y, _ in skyline.points()], front)
+            self.assertTrue(all((x, y, item) in points for x, y, item in skyline.points()))
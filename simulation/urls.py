@@ -1,8 +1,17 @@
 
 from django.urls import path
-from .views import LiveSimulationView
+from .views import (
+    LiveSimulationView, AsyncLiveSimulationView, SimulationHistoryView, PlanDiffView, ScenarioEvaluationView,
+    ConstraintSweepView,
+)
 
 # This is a list of URL patterns for the 'simulation' app.
 urlpatterns = [
     path('live/', LiveSimulationView.as_view(), name='run_live_simulation'),
+    # Same workflow, native async; use it when serving through backend.asgi
+    path('live/async/', AsyncLiveSimulationView.as_view(), name='run_live_simulation_async'),
+    path('history/', SimulationHistoryView.as_view(), name='simulation_history'),
+    path('history/diff/', PlanDiffView.as_view(), name='simulation_plan_diff'),
+    path('scenarios/', ScenarioEvaluationView.as_view(), name='simulation_scenarios'),
+    path('sweep/', ConstraintSweepView.as_view(), name='simulation_sweep'),
 ]
\ No newline at end of file
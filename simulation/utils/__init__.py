@@ -1,5 +1,7 @@
 """Utils"""
 
 from .group_map import _get_func_to_group_map
+from .timing import StageTimer
+from .skyline import Skyline
 
-__all__ = ["_get_func_to_group_map"]
\ No newline at end of file
+__all__ = ["_get_func_to_group_map", "StageTimer", "Skyline"]
\ No newline at end of file
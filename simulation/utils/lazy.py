@@ -0,0 +1,66 @@
+import importlib
+import sys
+import threading
+import types
+
+# Stacks that are only needed once a request actually solves, talks to AWS,
+# evaluates scenarios or plots; see lazy_import.
+HEAVY_MODULES = ('pulp', 'boto3', 'httpx', 'numpy')
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that is imported on first attribute access, so
+    importing the code that uses it stays cheap. Use it only for modules whose
+    attributes are accessed inside functions, not at import time (annotations
+    included; quote those).
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lock'] = threading.Lock()
+        self.__dict__['_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            with self.__dict__['_lock']:
+                module = self.__dict__['_module']
+                if module is None:
+                    module = self.__dict__['_module'] = importlib.import_module(self.__name__)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """The module itself if it is already imported, otherwise a LazyModule for it."""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def loaded_module(name: str):
+    """The module if something has imported it, else None; for isinstance checks that must not import it."""
+    return sys.modules.get(name)
+
+
+def preload(modules=HEAVY_MODULES) -> list[str]:
+    """
+    Imports the given modules now, e.g. in a pre-forking server's master so
+    workers share them copy-on-write instead of each paying for the import on
+    its first request. Returns the ones that are not installed.
+    """
+    missing = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            missing.append(name)
+    return missing
@@ -0,0 +1,94 @@
+# Opt-in cProfile/tracemalloc profiling of algorithm runs
+import cProfile
+import multiprocessing
+import pstats
+import threading
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Optional
+from django.conf import settings
+
+# Entries kept per ranking (functions by cumulative time, allocation sites by size)
+PROFILE_TOP = 15
+
+# tracemalloc's peak and traces are process-wide, so profiled runs take turns.
+_profile_lock = threading.Lock()
+
+_profile_executor = None
+_profile_executor_lock = threading.Lock()
+
+
+def _location(filename: str, lineno: int, name: Optional[str] = None) -> str:
+    # The last two path components are enough to find the line, and keep hosts' paths out of stored profiles.
+    short = '/'.join(Path(filename).parts[-2:]) if filename not in ('~', '') else '~'
+    return f"{short}:{lineno}({name})" if name else f"{short}:{lineno}"
+
+
+def profiled_call(func: Callable, *args, top: int = PROFILE_TOP, **kwargs) -> tuple[Any, dict]:
+    """
+    Calls func(*args, **kwargs) under cProfile and tracemalloc and returns
+    (its result, profile). The profile holds the `top` functions by cumulative
+    time, the peak traced memory above what was allocated before the call, and
+    the largest allocation sites still held when it returned (typically the
+    result and caches). Exceptions from func propagate.
+
+    tracemalloc traces every thread of the process, so the memory figures are
+    only exact in a process that runs nothing else meanwhile; the server runs
+    profiled solves in get_profile_executor's workers for that reason.
+    """
+    with _profile_lock:
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            profiler = cProfile.Profile()
+            result = profiler.runcall(func, *args, **kwargs)
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, cProfile.__file__),
+            ])
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+
+    stats = pstats.Stats(profiler).stats
+    ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+    return result, {
+        'functions': [
+            {'function': _location(*key), 'calls': calls, 'totalMs': total * 1000, 'cumulativeMs': cumulative * 1000}
+            for key, (_, calls, total, cumulative, _) in ranked
+        ],
+        'peakMemoryBytes': max(peak, 0),
+        'allocations': [
+            {'location': _location(stat.traceback[0].filename, stat.traceback[0].lineno), 'bytes': stat.size,
+             'count': stat.count}
+            for stat in snapshot.statistics('lineno')[:top]
+        ],
+    }
+
+
+def get_profile_executor() -> ProcessPoolExecutor:
+    """
+    Worker processes for profiled solves (OPTIFUSE_SOLVER_SLOTS of them, as
+    every solve holds a slot). Each runs one call at a time, so tracemalloc
+    and cProfile there see nothing but that call, and the server's other
+    threads are neither slowed down nor counted. Spawned rather than forked,
+    so they do not inherit the server's threads and locks.
+    """
+    global _profile_executor
+    with _profile_executor_lock:
+        if _profile_executor is None:
+            _profile_executor = ProcessPoolExecutor(max_workers=getattr(settings, 'OPTIFUSE_SOLVER_SLOTS', 4),
+                                                    mp_context=multiprocessing.get_context('spawn'))
+        return _profile_executor
+
+
+def reset_profile_executor():
+    """Drops a broken pool (e.g. a worker was killed); the next profiled solve starts a fresh one."""
+    global _profile_executor
+    with _profile_executor_lock:
+        _profile_executor = None
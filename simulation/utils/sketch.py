@@ -0,0 +1,106 @@
+import math
+from typing import Any, Optional
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with bounded memory and relative-error
+    guarantees (the DDSketch scheme). Positive values fall into logarithmic
+    buckets whose width is `relative_accuracy` of their value, so every
+    quantile is within that relative error of an actual sample. Sketches with
+    the same accuracy merge by adding bucket counts, so per-file or per-worker
+    sketches can be combined later. At most `max_buckets` buckets are kept; past
+    that the lowest ones are folded together, losing accuracy only at the far
+    low end.
+    """
+    __slots__ = ('relative_accuracy', 'max_buckets', '_log_gamma', 'buckets', 'zeros', 'count', 'sum', 'min', 'max')
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1.")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._log_gamma = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self.buckets: dict[int, int] = {}
+        self.zeros = 0  # Values <= 0 (e.g. a 0 ms duration)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, count: int = 1):
+        # Called once per sample on the ingestion path, hence the plain comparisons.
+        if value > 0:
+            buckets = self.buckets
+            index = math.ceil(math.log(value) / self._log_gamma)
+            buckets[index] = buckets.get(index, 0) + count
+            if len(buckets) > self.max_buckets:
+                self._collapse()
+        else:
+            self.zeros += count
+        self.count += count
+        self.sum += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def _collapse(self):
+        """Folds the lowest buckets into the lowest one that is kept."""
+        indexes = sorted(self.buckets)
+        excess = len(indexes) - self.max_buckets
+        folded = sum(self.buckets.pop(i) for i in indexes[:excess])
+        keep = indexes[excess]
+        self.buckets[keep] += folded
+
+    def merge(self, other: 'QuantileSketch'):
+        """Adds `other`'s samples into this sketch; both must use the same relative accuracy."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same relative_accuracy can be merged.")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+        self.zeros += other.zeros
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0..1), or None if the sketch is empty."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zeros:
+            return min(max(0.0, self.min), self.max)
+        seen = self.zeros
+        gamma = math.exp(self._log_gamma)
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # Bucket i covers (gamma^(i-1), gamma^i]; its midpoint is within the relative accuracy.
+                value = 2 * gamma ** index / (gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'relative_accuracy': self.relative_accuracy, 'max_buckets': self.max_buckets,
+            'buckets': {str(i): c for i, c in self.buckets.items()}, 'zeros': self.zeros,
+            'count': self.count, 'sum': self.sum,
+            'min': self.min if self.count else None, 'max': self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'QuantileSketch':
+        sketch = cls(data['relative_accuracy'], data.get('max_buckets', 2048))
+        sketch.buckets = {int(i): c for i, c in data['buckets'].items()}
+        sketch.zeros, sketch.count, sketch.sum = data['zeros'], data['count'], data['sum']
+        if sketch.count:
+            sketch.min, sketch.max = data['min'], data['max']
+        return sketch
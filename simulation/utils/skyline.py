@@ -0,0 +1,58 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterator
+
+
+class Skyline:
+    """
+    Set of mutually non-dominated (x, y) points, minimizing both, each carrying
+    an item. Points are kept sorted by x with y strictly decreasing, so the
+    dominance test is one binary search and the points a new one dominates are
+    adjacent to it. An insert is still O(n): it splices three parallel lists,
+    which moves the points after it (a memmove, cheap at the sizes the label
+    sets are capped to).
+    """
+    __slots__ = ('_xs', '_ys', '_items')
+
+    def __init__(self):
+        self._xs = []
+        self._ys = []
+        self._items = []
+
+    def dominates(self, x, y) -> bool:
+        """True if some point has x' <= x and y' <= y."""
+        # Among points with x' <= x, the last one has the smallest y'.
+        i = bisect_right(self._xs, x) - 1
+        return i >= 0 and self._ys[i] <= y
+
+    def insert(self, x, y, item: Any) -> bool:
+        """Adds the point unless it is dominated, dropping the points it dominates; O(log n) + a list splice."""
+        if self.dominates(x, y):
+            return False
+        start = bisect_left(self._xs, x)
+        end = start
+        while end < len(self._xs) and self._ys[end] >= y:
+            end += 1
+        self._xs[start:end] = [x]
+        self._ys[start:end] = [y]
+        self._items[start:end] = [item]
+        return True
+
+    def thin(self, size: int) -> bool:
+        """Keeps at most `size` points, always including both ends. Returns True if any were dropped."""
+        n = len(self._xs)
+        if n <= size:
+            return False
+        keep = sorted({round(i * (n - 1) / (size - 1)) for i in range(size)}) if size > 1 else [0]
+        self._xs = [self._xs[i] for i in keep]
+        self._ys = [self._ys[i] for i in keep]
+        self._items = [self._items[i] for i in keep]
+        return True
+
+    def points(self) -> Iterator[tuple[Any, Any, Any]]:
+        return zip(self._xs, self._ys, self._items)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
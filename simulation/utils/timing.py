@@ -0,0 +1,27 @@
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """
+    Collects wall-clock durations of named pipeline stages and renders them as a
+    Server-Timing header, so clients (and the load-test driver) can see where a
+    request spent its time.
+    """
+
+    def __init__(self):
+        self.durations = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def header(self) -> str:
+        return ', '.join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.durations.items())
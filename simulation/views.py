@@ -1,16 +1,37 @@
-import requests
-import base64
-import yaml
+import asyncio
+import json
+import time
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from botocore.exceptions import ClientError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import AuthenticationFailed
 
+from core.authentication import CachedTokenAuthentication
 from core.models import Profile
+from .models import SimulationRun, AlgorithmResult
 from .core.builder import ApplicationBuilder
-from .connectors.aws import get_assumed_role_session, fetch_live_xray_data
-from .runner import run_all_simulations
+from .connectors.aws import (
+    get_assumed_role_session, fetch_live_xray_data,
+    get_assumed_role_session_async, fetch_live_xray_data_async,
+)
+from .connectors.github import RepositoryFiles, AsyncRepositoryFiles
+from .encoding import encode_results, encode_results_compact, decode_group_labels, dumps, compress
+from .history import record_run, serialize_run, diff_plans, application_from_run
+from .scenarios import Scenario, evaluate_plans, find_robust_plan, evaluation_rows, OBJECTIVES
+from .sweep import sweep_grid, run_sweep
+from .scheduler import get_scheduler, SchedulerBusy
+from .pipeline import (
+    load_serverless_spec, load_serverless_spec_async, service_and_stage,
+    previous_plan_inputs, profiling_requested, solve, get_solver_executor, error_payload,
+)
+from .coalesce import coalescing_enabled, live_simulation_key, single_flight, single_flight_async
+from .utils.timing import StageTimer
 
 DEMO_REPO_OWNER = "Vaivaswat2244" 
 DEMO_REPO_NAME = "optifuse-image-processing-test"
@@ -72,33 +93,22 @@ GOLDEN_RESULT_DATA = [
     }
 ]
 
-def fetch_github_file(github_token: str, owner: str, repo: str, file_path: str) -> str:
+RESPONSE_FORMATS = ('default', 'compact')
+
+
+def compact_response(request, results: list, function_ids: list = None) -> HttpResponse:
     """
-    Fetches the content of a specific file from a GitHub repository.
-    Raises an exception if the file cannot be fetched or decoded.
+    Renders results in the compact format (shared function-ID table plus integer
+    group labels per algorithm), compressed according to Accept-Encoding.
     """
-    api_url = f"https://api.github.com/repos/{owner}/{repo}/contents/{file_path}"
-    headers = {
-        'Authorization': f'token {github_token}',
-        'Accept': 'application/vnd.github.v3+json',
-    }
-    
-    res = requests.get(api_url, headers=headers)
-    res.raise_for_status() # Raises HTTPError for 4xx/5xx responses
-    
-    file_data = res.json()
-    base64_content = file_data.get('content')
-    if not base64_content:
-        raise ValueError("File content from GitHub is empty.")
-
-    try:
-        cleaned_content = base64_content.strip()
-        padding = len(cleaned_content) % 4
-        if padding > 0:
-            cleaned_content += "=" * (4 - padding)
-        return base64.b64decode(cleaned_content).decode('utf-8')
-    except Exception as e:
-        raise ValueError(f"Failed to decode file content: {e}")
+    body = dumps(encode_results_compact(results, function_ids))
+    body, content_encoding = compress(body, request.headers.get('Accept-Encoding', ''))
+    response = HttpResponse(body, content_type='application/json', status=status.HTTP_200_OK)
+    if content_encoding:
+        response['Content-Encoding'] = content_encoding
+    response['Vary'] = 'Accept-Encoding'
+    return response
+
 
 class LiveSimulationView(APIView):
     """
@@ -109,15 +119,23 @@ class LiveSimulationView(APIView):
     def post(self, request, *args, **kwargs):
         repo_owner = request.data.get('owner')
         repo_name = request.data.get('repoName')
+        # 'compact' returns a function-ID table plus per-algorithm group label arrays
+        response_format = request.data.get('responseFormat', 'default')
+        # Re-check the last stored plan against fresh metrics instead of solving from scratch
+        reoptimize = bool(request.data.get('reoptimize', False))
         
         if not repo_owner or not repo_name:
             return Response({'error': 'owner and repoName are required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if response_format not in RESPONSE_FORMATS:
+            return Response({'error': f"responseFormat must be one of {', '.join(RESPONSE_FORMATS)}."}, status=status.HTTP_400_BAD_REQUEST)
         
         if repo_owner == DEMO_REPO_OWNER and repo_name == DEMO_REPO_NAME:
             print("--- DEMO MODE ACTIVATED ---")
             print("Returning hardcoded golden result for presentation.")
-            import time
             time.sleep(2) # Add a small delay to simulate processing time
+            if response_format == 'compact':
+                return compact_response(request, GOLDEN_RESULT_DATA)
             return Response(GOLDEN_RESULT_DATA, status=status.HTTP_200_OK)
             
         try:
@@ -128,86 +146,382 @@ class LiveSimulationView(APIView):
         if not profile.github_access_token or not profile.aws_role_arn:
             return Response({'error': 'GitHub token and AWS Role ARN must be configured.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Per-stage durations, returned in the Server-Timing header
+        timer = StageTimer()
         try:
-            # Step 1: Fetch the serverless.yml from GitHub
-            print("Step 1/7: Fetching serverless.yml from GitHub...")
-            yaml_content = fetch_github_file(
-                github_token=profile.github_access_token,
-                owner=repo_owner,
-                repo=repo_name,
-                file_path='serverless.yml'
-            )
+            # Step 1: Fetch the serverless.yml and the files it references from GitHub
+            print("Step 1/7: Fetching serverless.yml and referenced files from GitHub...")
+            with timer.stage('github'):
+                spec = load_serverless_spec(RepositoryFiles(profile.github_access_token, repo_owner, repo_name))
             
             # Step 2: Build the base application model from the YAML file
             print("Step 2/7: Parsing YAML and building base application model...")
-            base_application = ApplicationBuilder.create_from_yaml_content(repo_name, yaml_content)
+            with timer.stage('parse'):
+                base_application = ApplicationBuilder.create_from_spec(repo_name, spec)
 
             # Step 3: Extract function names needed for the CloudWatch query
             print("Step 3/7: Extracting function names for AWS query...")
             function_ids = [func.id for func in base_application.functions]
             
-            # --- NEW STEP: Extract service and stage from YAML ---
+            # Step 4: Extract service and stage from YAML
             print("Step 4/7: Extracting service and stage from YAML...")
-            try:
-                yml_spec = yaml.safe_load(yaml_content)
-                service_name = yml_spec.get('service', 'unknown-service')
-                stage = yml_spec.get('provider', {}).get('stage', 'dev')
-            except (yaml.YAMLError, AttributeError):
-                raise ValueError("Could not parse service name or stage from serverless.yml.")
-            # --- END OF NEW STEP ---
+            service_name, stage = service_and_stage(spec)
 
             # Step 5: Assume the user's AWS role
             print("Step 5/7: Assuming user's AWS IAM Role...")
-            aws_session = get_assumed_role_session(
-                user_role_arn=profile.aws_role_arn,
-                external_id=str(profile.aws_external_id)
-            )
+            with timer.stage('sts'):
+                aws_session = get_assumed_role_session(
+                    user_role_arn=profile.aws_role_arn,
+                    external_id=str(profile.aws_external_id)
+                )
 
-            # Step 6: Fetch live performance data from AWS
-            print("Step 6/7: Fetching live performance data from CloudWatch Logs...")
-            live_metrics = fetch_live_xray_data(aws_session, service_name, stage, function_ids)
-            
-            # Step 7: Enrich the application model with the live data
-            print("Step 7/7: Enriching application model with live data...")
-            live_application = ApplicationBuilder.enrich_with_live_data(base_application, live_metrics)
+            profiling = profiling_requested(request.user, request.data)
+
+            def run_live():
+                # Step 6: Fetch live performance data from AWS
+                print("Step 6/7: Fetching live performance data from CloudWatch Logs...")
+                with timer.stage('cloudwatch'):
+                    live_metrics = fetch_live_xray_data(aws_session, service_name, stage, function_ids)
+
+                # Step 7: Enrich the application model with the live data
+                print("Step 7/7: Enriching application model with live data...")
+                live_application = ApplicationBuilder.enrich_with_live_data(base_application, live_metrics)
+
+                # Solving is admission-controlled per subscription tier
+                previous = previous_plan_inputs(request.user, repo_owner, repo_name, live_application) if reoptimize else None
+                return live_application, solve(live_application, profile.subscription, timer, previous, profile=profiling)
+
+            # Identical requests (same repo, spec, AWS role and tier) share one CloudWatch query and solve;
+            # re-optimizations depend on the user's own history and profiled runs on the flag, so they run alone.
+            if coalescing_enabled() and not reoptimize and not profiling:
+                key = live_simulation_key(repo_owner, repo_name, spec, profile.aws_role_arn, profile.subscription)
+                live_application, results, coalesced = single_flight(key, run_live, timer)
+                if coalesced:
+                    print("Shared the result of an identical in-flight simulation.")
+            else:
+                live_application, results = run_live()
 
-            # Run the final simulation
-            print("Running simulations...")
-            results = run_all_simulations(live_application)
+            # Persist the run so the dashboard can show history without re-running
+            run_id = None
+            with timer.stage('persist'):
+                try:
+                    run_id = record_run(request.user, repo_owner, repo_name, live_application, results).id
+                except Exception as e:
+                    print(f"WARNING: Could not store simulation history: {e}")
 
             # Clean results for JSON serialization
-            for result in results:
-                if 'groups' in result and result.get('groups'):
-                    result['groups'] = [[func.id for func in group] for group in result['groups']]
+            with timer.stage('encode'):
+                if response_format == 'compact':
+                    response = compact_response(request, results, [func.id for func in live_application.functions])
+                else:
+                    response = Response(encode_results(results), status=status.HTTP_200_OK)
+            if run_id is not None:
+                response['X-Simulation-Run'] = str(run_id)
+            response['Server-Timing'] = timer.header()
+            return response
+
+        except Exception as e:
+            body, status_code, headers = error_payload(e)
+            response = Response(body, status=status_code)
+            for name, value in headers.items():
+                response[name] = value
+            return response
+
+
+class AsyncLiveSimulationView(View):
+    """
+    LiveSimulationView for ASGI deployments, with the same request body and
+    responses. The GitHub fetch and the STS assume-role run concurrently,
+    CloudWatch polling waits on the event loop instead of a thread, and the
+    solver runs on the solver executor, so a worker can keep many requests in
+    their I/O stages while a few are solving.
+    """
+    http_method_names = ['post', 'options']
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Token-authenticated like the DRF views, so CSRF does not apply.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def post(self, request, *args, **kwargs):
+        try:
+            authenticated = await sync_to_async(CachedTokenAuthentication().authenticate)(request)
+        except AuthenticationFailed as e:
+            return _json_response({'detail': str(e.detail)}, status.HTTP_401_UNAUTHORIZED)
+        if authenticated is None:
+            return _json_response({'detail': 'Authentication credentials were not provided.'}, status.HTTP_401_UNAUTHORIZED)
+        user = authenticated[0]
+
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return _json_response({'error': 'Request body must be JSON.'}, status.HTTP_400_BAD_REQUEST)
+        repo_owner = data.get('owner')
+        repo_name = data.get('repoName')
+        response_format = data.get('responseFormat', 'default')
+        reoptimize = bool(data.get('reoptimize', False))
+
+        if not repo_owner or not repo_name:
+            return _json_response({'error': 'owner and repoName are required.'}, status.HTTP_400_BAD_REQUEST)
 
-            return Response(results, status=status.HTTP_200_OK)
+        if response_format not in RESPONSE_FORMATS:
+            return _json_response({'error': f"responseFormat must be one of {', '.join(RESPONSE_FORMATS)}."}, status.HTTP_400_BAD_REQUEST)
 
-        except requests.exceptions.HTTPError as e:
-            status_code = e.response.status_code if e.response is not None else 500
-            if status_code == 404:
-                error_message = "serverless.yml not found in the specified repository."
+        if repo_owner == DEMO_REPO_OWNER and repo_name == DEMO_REPO_NAME:
+            print("--- DEMO MODE ACTIVATED ---")
+            await asyncio.sleep(2)
+            if response_format == 'compact':
+                return compact_response(request, GOLDEN_RESULT_DATA)
+            return _json_response(GOLDEN_RESULT_DATA, status.HTTP_200_OK)
+
+        try:
+            profile = await sync_to_async(lambda: user.profile)()
+        except Profile.DoesNotExist:
+            return _json_response({'error': 'User profile not found.'}, status.HTTP_404_NOT_FOUND)
+
+        if not profile.github_access_token or not profile.aws_role_arn:
+            return _json_response({'error': 'GitHub token and AWS Role ARN must be configured.'}, status.HTTP_400_BAD_REQUEST)
+
+        timer = StageTimer()
+
+        async def timed(name, awaitable):
+            with timer.stage(name):
+                return await awaitable
+
+        try:
+            # The GitHub fetch and the STS assume-role are independent; overlap them.
+            files = AsyncRepositoryFiles(profile.github_access_token, repo_owner, repo_name)
+            spec, aws_session = await asyncio.gather(
+                timed('github', load_serverless_spec_async(files)),
+                timed('sts', get_assumed_role_session_async(profile.aws_role_arn, str(profile.aws_external_id))),
+            )
+
+            with timer.stage('parse'):
+                base_application = ApplicationBuilder.create_from_spec(repo_name, spec)
+                service_name, stage = service_and_stage(spec)
+            function_ids = [func.id for func in base_application.functions]
+
+            profiling = profiling_requested(user, data)
+
+            async def run_live():
+                live_metrics = await timed('cloudwatch', fetch_live_xray_data_async(aws_session, service_name, stage, function_ids))
+                live_application = ApplicationBuilder.enrich_with_live_data(base_application, live_metrics)
+
+                previous = None
+                if reoptimize:
+                    previous = await sync_to_async(previous_plan_inputs)(user, repo_owner, repo_name, live_application)
+                loop = asyncio.get_running_loop()
+                return live_application, await loop.run_in_executor(get_solver_executor(), solve, live_application,
+                                                                    profile.subscription, timer, previous, profiling)
+
+            if coalescing_enabled() and not reoptimize and not profiling:
+                key = live_simulation_key(repo_owner, repo_name, spec, profile.aws_role_arn, profile.subscription)
+                live_application, results, _ = await single_flight_async(key, run_live, timer)
             else:
-                error_message = "Failed to fetch file from GitHub."
-            return Response({'error': error_message, 'details': e.response.text}, status=status_code)
-        
+                live_application, results = await run_live()
+
+            run_id = None
+            with timer.stage('persist'):
+                try:
+                    run = await sync_to_async(record_run)(user, repo_owner, repo_name, live_application, results)
+                    run_id = run.id
+                except Exception as e:
+                    print(f"WARNING: Could not store simulation history: {e}")
+
+            with timer.stage('encode'):
+                if response_format == 'compact':
+                    response = compact_response(request, results, function_ids)
+                else:
+                    response = _json_response(encode_results(results), status.HTTP_200_OK)
+            if run_id is not None:
+                response['X-Simulation-Run'] = str(run_id)
+            response['Server-Timing'] = timer.header()
+            return response
+
+        except Exception as e:
+            body, status_code, headers = error_payload(e)
+            response = _json_response(body, status_code)
+            for name, value in headers.items():
+                response[name] = value
+            return response
+
+
+def _json_response(data, status_code: int) -> HttpResponse:
+    return HttpResponse(dumps(data), content_type='application/json', status=status_code)
+
+
+class HistoryPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'pageSize'
+    max_page_size = 100
+
+
+class SimulationHistoryView(APIView):
+    """
+    Lists the authenticated user's stored simulation runs, newest first.
+    Optional query params: owner + repoName to narrow to one repository,
+    includeGroups=true to add the function table and group-label arrays.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        runs = SimulationRun.objects.filter(user=request.user)
+        repo_owner = request.query_params.get('owner')
+        repo_name = request.query_params.get('repoName')
+        if repo_owner:
+            runs = runs.filter(repo_owner=repo_owner)
+        if repo_name:
+            runs = runs.filter(repo_name=repo_name)
+        include_groups = request.query_params.get('includeGroups', '').lower() in ('1', 'true', 'yes')
+
+        paginator = HistoryPagination()
+        page = paginator.paginate_queryset(runs.prefetch_related('results'), request, view=self)
+        return paginator.get_paginated_response([serialize_run(run, include_groups) for run in page])
+
+
+class PlanDiffView(APIView):
+    """
+    Structural diff between two stored plans, given as algorithm result IDs
+    in the `from` and `to` query params.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            from_id = int(request.query_params.get('from', ''))
+            to_id = int(request.query_params.get('to', ''))
+        except ValueError:
+            return Response({'error': 'from and to must be algorithm result IDs.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        plans = AlgorithmResult.objects.select_related('run').filter(run__user=request.user, id__in=[from_id, to_id])
+        plans_by_id = {plan.id: plan for plan in plans}
+        if from_id not in plans_by_id or to_id not in plans_by_id:
+            return Response({'error': 'Plan not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(diff_plans(plans_by_id[from_id], plans_by_id[to_id]), status=status.HTTP_200_OK)
+
+
+MAX_SCENARIOS = 1000
+
+
+def _parse_scenarios(payload) -> list[Scenario]:
+    """[{name, loadFactors: {functionId: factor}, default}] -> Scenarios; raises ValueError."""
+    if not isinstance(payload, list) or not payload:
+        raise ValueError('scenarios must be a non-empty list.')
+    if len(payload) > MAX_SCENARIOS:
+        raise ValueError(f"At most {MAX_SCENARIOS} scenarios can be evaluated at once.")
+    scenarios = []
+    for i, item in enumerate(payload):
+        if not isinstance(item, dict):
+            raise ValueError('Each scenario must be an object.')
+        load_factors = item.get('loadFactors') or {}
+        default = item.get('default')
+        if not isinstance(load_factors, dict):
+            raise ValueError('loadFactors must map function IDs to numbers.')
+        factors = list(load_factors.values()) + ([default] if default is not None else [])
+        if any(isinstance(x, bool) or not isinstance(x, (int, float)) or x < 0 for x in factors):
+            raise ValueError('Load factors must be non-negative numbers.')
+        scenarios.append(Scenario(name=str(item.get('name') or f"scenario-{i + 1}"),
+                                  load_factors=load_factors, default=default))
+    return scenarios
+
+
+class ScenarioEvaluationView(APIView):
+    """
+    What-if evaluation of a stored run's plans under several load profiles.
+    Body: runId, scenarios ([{name, loadFactors, default}]), and optionally
+    searchRobust with objective ('expected' or 'worst') to also look for the
+    cheapest plan that is feasible in every scenario.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        try:
+            run = SimulationRun.objects.prefetch_related('results').get(user=request.user, id=int(request.data.get('runId')))
+        except (TypeError, ValueError):
+            return Response({'error': 'runId must be a simulation run ID.'}, status=status.HTTP_400_BAD_REQUEST)
+        except SimulationRun.DoesNotExist:
+            return Response({'error': 'Simulation run not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        objective = request.data.get('objective', 'expected')
+        if objective not in OBJECTIVES:
+            return Response({'error': f"objective must be one of {', '.join(OBJECTIVES)}."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            scenarios = _parse_scenarios(request.data.get('scenarios'))
         except ValueError as e:
-            # Catches errors from our builder/parser logic
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        
-        except ClientError as e:
-            # Catches specific AWS/boto3 errors
-            error_response = e.response
-            error_code = error_response.get('Error', {}).get('Code', 'Unknown')
-            error_message = error_response.get('Error', {}).get('Message', 'No details from AWS.')
-            return Response({
-                'error': 'An error occurred while communicating with AWS.',
-                'details': f"{error_code}: {error_message}"
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
-        except Exception as e:
-            # A final catch-all for any other unexpected errors
-            print(f"UNEXPECTED ERROR: {e}") # Log the full error for debugging
-            return Response(
-                {'error': 'An unexpected internal server error occurred.', 'details': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+
+        app = application_from_run(run)
+        stored = list(run.results.all())
+        results = [{'name': r.name, 'groups': decode_group_labels(r.group_labels, run.function_ids) if r.group_labels else []}
+                   for r in stored]
+
+        robust = None
+        if request.data.get('searchRobust'):
+            profile = getattr(request.user, 'profile', None)
+            try:
+                # The robust search runs the solver suite, so it is admission-controlled like a live run.
+                with get_scheduler().slot(profile.subscription if profile else 'FREE') as policy:
+                    evaluation = find_robust_plan(app, scenarios, results, objective=objective,
+                                                  algorithms=policy.algorithms,
+                                                  time_limits={'mtx_ilp': policy.ilp_time_limit, 'mtx_ilp_portfolio': policy.ilp_time_limit})
+            except SchedulerBusy as e:
+                response = Response({'error': str(e), 'retryAfter': e.retry_after}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+                response['Retry-After'] = str(e.retry_after)
+                return response
+            results, robust = evaluation['candidates'], evaluation['robust']
+        else:
+            evaluation = evaluate_plans(app, results, scenarios)
+
+        plans = evaluation_rows(evaluation)
+        for i, plan in enumerate(plans):
+            if i < len(stored):
+                plan['id'] = stored[i].id
+            else:
+                # Plans found by the robust search are not stored; return their groups.
+                plan['id'] = None
+                plan['groups'] = [[f.id for f in group] for group in results[i]['groups']]
+        return Response({'scenarios': evaluation['scenarios'], 'plans': plans, 'robust': robust,
+                         'objective': objective}, status=status.HTTP_200_OK)
+
+
+class ConstraintSweepView(APIView):
+    """
+    Solves a stored run's application over a grid of constraints without
+    re-fetching anything. Body: runId plus any of maxLatencyMS, maxMemoryMB and
+    networkHopMS, each a number, a list of numbers or {start, stop, step};
+    constraints left out keep the run's values. The number of grid points is
+    capped per tier (TierPolicy.max_sweep_points).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        try:
+            run = SimulationRun.objects.get(user=request.user, id=int(request.data.get('runId')))
+        except (TypeError, ValueError):
+            return Response({'error': 'runId must be a simulation run ID.'}, status=status.HTTP_400_BAD_REQUEST)
+        except SimulationRun.DoesNotExist:
+            return Response({'error': 'Simulation run not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        profile = getattr(request.user, 'profile', None)
+        tier = profile.subscription if profile else 'FREE'
+        scheduler = get_scheduler()
+        try:
+            grid = sweep_grid(request.data, application_from_run(run), scheduler.policy_for(tier).max_sweep_points)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        lines = len(grid['maxMemoryMB']) * len(grid['networkHopMS'])
+        try:
+            # Every grid line solved at once on the sweep worker pool holds a solver slot,
+            # and every point gets the tier's algorithms, time limit and deadline.
+            with scheduler.slot(tier) as policy, scheduler.extra_slots(tier, lines - 1) as extra:
+                sweep = run_sweep(run.repo_name, run.function_ids, run.inputs, grid,
+                                  algorithms=policy.algorithms,
+                                  time_limits={'mtx_ilp': policy.ilp_time_limit, 'mtx_ilp_portfolio': policy.ilp_time_limit},
+                                  deadline=policy.deadline, parallel=1 + extra)
+        except SchedulerBusy as e:
+            response = Response({'error': str(e), 'retryAfter': e.retry_after}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            response['Retry-After'] = str(e.retry_after)
+            return response
+        return Response(sweep, status=status.HTTP_200_OK)